@@ -0,0 +1,28 @@
+from timeit import default_timer
+
+from generate import generate_bfl
+from run_bfl import execute_str
+
+# Compares the z3 and the BDD backend on generated fault trees. The queries
+# are answered after the fault tree is parsed, so the times include building
+# the BDDs of the events.
+QUERIES = ('\\exists g1 && !g2;', '[[\\MCS(g1)]];', '|[[g1 || !g2]]|;',
+           '\\IDP(g1, g2);')
+SIZES = ((5, 12), (10, 20), (20, 40), (50, 100))
+
+
+def run(text: str, backend: str) -> float:
+    start = default_timer()
+    execute_str(text, backend=backend)
+    return default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"query":20} {"events":>7} {"z3":>9} {"bdd":>9}')
+    for n_gates, n_basic_events in SIZES:
+        for query in QUERIES:
+            text = generate_bfl(n_gates, n_basic_events, query)
+            z3_time = run(text, 'z3')
+            bdd_time = run(text, 'bdd')
+            print(f'{query:20} {n_basic_events:7} {z3_time:8.3f}s '
+                  f'{bdd_time:8.3f}s', flush=True)
@@ -0,0 +1,33 @@
+from timeit import default_timer
+
+import numpy as np
+
+from bfl.bulk import check_vectors
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse, parser
+
+# Measures how many status vectors per second `check_vectors` evaluates on
+# generated fault trees. Every basic event fails with probability 1/2, so
+# the minimality checks see many candidates.
+QUERIES = ('g0', 'g1 && !g2[e0: 1]', '\\mcs(g1)')
+SIZES = ((40, 50), (160, 200), (640, 800))
+VECTORS = 1_000_000
+
+if __name__ == '__main__':
+    print(f'{"query":24} {"events":>7} {"seconds":>9} {"vectors/min":>13}')
+    rng = np.random.default_rng(0)
+    for query in QUERIES:
+        phi = parser.parse(query, 'phi')
+        for n_gates, n_basic_events in SIZES:
+            fault_tree = CompactFaultTree.from_graph(build_fault_tree(
+                parse(generate_bfl(n_gates, n_basic_events, '[[a]];',
+                                   gates=('and', 'or')))))
+            vectors = rng.integers(0, 2, (VECTORS, n_basic_events),
+                                   dtype=np.uint8).view(bool)
+            start = default_timer()
+            check_vectors(phi, fault_tree, vectors)
+            seconds = default_timer() - start
+            print(f'{query:24} {n_basic_events:7} {seconds:8.2f}s '
+                  f'{VECTORS / seconds * 60:13,.0f}', flush=True)
@@ -0,0 +1,32 @@
+from timeit import default_timer
+
+from run_bfl import execute_str
+
+# A single `2ofn` top event over `n` basic events, like the `vot>=2` top event
+# of the case study, but with a much larger fan-in.
+SIZES = (25, 50, 100, 200, 400)
+K = 2
+ENCODINGS = ('pb', 'sequential', 'totalizer', 'sorting', 'auto')
+QUERIES = (
+    '\\exists \\mcs(top) && e0;',
+    '\\forall \\mcs(top) => top;',
+    '[[\\mps(top)]];',
+)
+
+
+def vot_bfl(n: int, query: str) -> str:
+    bes = ' '.join(f'e{i}' for i in range(n))
+    return f'toplevel top;\ntop {K}of{n} {bes};\n---\n{query}\n'
+
+
+if __name__ == '__main__':
+    print(f'{"query":28} {"n":>5}' + ''.join(f' {e:>11}' for e in ENCODINGS))
+    for query in QUERIES:
+        for n in SIZES:
+            times = []
+            for encoding in ENCODINGS:
+                start = default_timer()
+                execute_str(vot_bfl(n, query), cardinality=encoding)
+                times.append(default_timer() - start)
+            print(f'{query:28} {n:5}' + ''.join(f' {t:10.3f}s' for t in times),
+                  flush=True)
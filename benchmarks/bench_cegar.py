@@ -0,0 +1,48 @@
+from timeit import default_timer
+
+from z3 import Solver
+
+from bfl.build_bfl import build_formula
+from bfl.execute_bfl import get_bfl_tree, quantified_statement
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse
+
+# Compares deciding statements with `\mcs` and `\mps` with the CEGAR loop of
+# `MinimalityProblem` to solving their quantified formulas with z3, which is
+# stopped after `QBF_TIMEOUT` seconds.
+QUERIES = ('\\exists \\mcs(g1) && !g2;', '\\forall \\mcs(g0) => g0;',
+           '\\exists \\mcs(g0) && \\mps(g1);')
+SIZES = ((20, 25), (40, 50), (80, 100), (160, 200), (640, 800))
+QBF_TIMEOUT = 30
+
+
+def bench(text: str) -> tuple[float, str]:
+    """Returns the seconds taken by CEGAR and by z3, or `-` if z3 ran out of
+    time."""
+    parse_tree = parse(text)
+    graph = build_fault_tree(parse_tree)
+    statement = get_bfl_tree(parse_tree).children[0]
+
+    start = default_timer()
+    quantified_statement(statement, CompactFaultTree.from_graph(graph))
+    cegar = default_timer() - start
+
+    start = default_timer()
+    s = Solver()
+    s.set(timeout=QBF_TIMEOUT * 1000)
+    s.add(build_formula(statement, CompactFaultTree.from_graph(graph)))
+    result = s.check()
+    qbf = default_timer() - start
+    return cegar, f'{qbf:8.3f}s' if str(result) != 'unknown' else '-'
+
+
+if __name__ == '__main__':
+    print(f'{"query":32} {"events":>7} {"cegar":>9} {"qbf":>9}')
+    for query in QUERIES:
+        for n_gates, n_basic_events in SIZES:
+            cegar, qbf = bench(generate_bfl(n_gates, n_basic_events, query,
+                                            gates=('and', 'or')))
+            print(f'{query:32} {n_basic_events:7} {cegar:8.3f}s {qbf:>9}',
+                  flush=True)
@@ -0,0 +1,30 @@
+import os
+import tempfile
+from timeit import default_timer as timer
+
+from generate import generate_bfl
+from galileo.compiled_fault_tree import compile_fault_tree, load_fault_tree
+
+SIZES = (10_000, 100_000)
+
+
+def time_load(source_path: str, compiled_file: str | None):
+    start = timer()
+    with open(source_path) as f:
+        fault_tree, _ = load_fault_tree(f, compiled_file)
+    fault_tree.get_root()
+    return timer() - start
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as d:
+        for n in SIZES:
+            source_path = os.path.join(d, f'tree_{n}.bfl')
+            with open(source_path, 'w') as f:
+                f.write(generate_bfl(n, n, '\\exists g0;'))
+            _, compiled_file = compile_fault_tree(source_path)
+
+            print(f'{2 * n} events')
+            print(f'  from text:     {time_load(source_path, None):8.3f}s')
+            print(f'  from compiled: '
+                  f'{time_load(source_path, compiled_file):8.3f}s')
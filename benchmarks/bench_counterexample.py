@@ -0,0 +1,71 @@
+from timeit import default_timer
+
+from z3 import Solver, Bool, Not, unsat, is_true
+
+from bfl.build_bfl import build_formula, get_definitions
+from bfl.exceptions import BFLError
+from bfl.execute_bfl import get_bfl_tree, check_model, status_vector_literals
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse
+
+# Compares the closest counterexamples of `check_model` to the previous
+# greedy ones, which kept the value of one basic event after the other with
+# one solver call each. Every status vector fails every third basic event.
+QUERIES = ('g1 && !g0', '(g1 || g2) && !g3', '\\vot[>=2](g1, g2, g3)')
+SIZES = ((40, 50), (160, 200), (640, 800))
+
+
+def greedy(statement, fault_tree) -> frozenset[str]:
+    literals = status_vector_literals(statement.children[0], fault_tree)
+    formula = build_formula(statement.children[1], fault_tree)
+    _, definitions = get_definitions(formula, fault_tree)
+    s = Solver()
+    s.add(formula, *definitions)
+    for literal in literals:
+        s.push()
+        s.add(literal)
+        if s.check() == unsat:
+            s.pop()
+            s.add(Not(literal))
+    s.check()
+    model = s.model()
+    return frozenset(be for be in fault_tree.get_basic_events()
+                     if is_true(model.eval(Bool(be), model_completion=True)))
+
+
+def distance(failed: set[str], vector) -> int:
+    return len(failed.symmetric_difference(map(str, vector)))
+
+
+if __name__ == '__main__':
+    print(f'{"query":24} {"events":>7} {"greedy":>9} {"dist":>5} '
+          f'{"closest":>9} {"dist":>5}')
+    for query in QUERIES:
+        for n_gates, n_basic_events in SIZES:
+            failed = {f'e{i}' for i in range(0, n_basic_events, 3)}
+            text = generate_bfl(n_gates, n_basic_events,
+                                f'{", ".join(sorted(failed))} |= {query};',
+                                gates=('and', 'or'))
+            parse_tree = parse(text)
+            graph = build_fault_tree(parse_tree)
+            statement = get_bfl_tree(parse_tree).children[0]
+
+            start = default_timer()
+            try:
+                new = check_model(statement,
+                                  CompactFaultTree.from_graph(graph))
+            except BFLError:
+                print(f'{query:24} {n_basic_events:7} unsatisfiable')
+                continue
+            closest_time = default_timer() - start
+            if new is True:
+                print(f'{query:24} {n_basic_events:7} satisfied')
+                continue
+            start = default_timer()
+            old = greedy(statement, CompactFaultTree.from_graph(graph))
+            greedy_time = default_timer() - start
+            print(f'{query:24} {n_basic_events:7} {greedy_time:8.3f}s '
+                  f'{distance(failed, old):5} {closest_time:8.3f}s '
+                  f'{distance(failed, new):5}', flush=True)
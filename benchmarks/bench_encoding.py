@@ -0,0 +1,33 @@
+from timeit import default_timer
+
+from generate import generate_bfl
+from run_bfl import execute_str
+
+# Sizes of the generated trees as (gates, basic events). Shared subtrees make
+# the inline formulas grow much faster than the Tseitin definitions.
+SIZES = ((10, 12), (40, 50), (160, 200), (640, 800))
+SMALL_SIZES = ((10, 12), (20, 25), (40, 50), (80, 100))
+QUERIES = (
+    ('\\exists g0;', SIZES),
+    ('\\forall g0 => g1;', SIZES),
+    # Minimal cut sets are second-order queries, so they are much slower.
+    ('\\exists \\mcs(g0);', SMALL_SIZES),
+    ('\\idp(g1, g2);', SMALL_SIZES),
+)
+
+
+def bench(n_gates, n_basic_events, query, encoding):
+    text = generate_bfl(n_gates, n_basic_events, query, gates=('and', 'or'))
+    start = default_timer()
+    execute_str(text, encoding=encoding)
+    return default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"query":22} {"size":>10} {"inline":>9} {"tseitin":>9}')
+    for query, sizes in QUERIES:
+        for n_gates, n_basic_events in sizes:
+            inline = bench(n_gates, n_basic_events, query, 'inline')
+            tseitin = bench(n_gates, n_basic_events, query, 'tseitin')
+            print(f'{query:22} {n_gates + n_basic_events:10} '
+                  f'{inline:8.3f}s {tseitin:8.3f}s')
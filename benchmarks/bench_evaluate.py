@@ -0,0 +1,56 @@
+from timeit import default_timer
+
+from z3 import Solver
+
+from bfl.build_bfl import build_formula, get_definitions
+from bfl.evaluate import Evaluator
+from bfl.execute_bfl import status_vector_literals
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse, parser
+
+# Compares checking whether a status vector satisfies a formula by evaluating
+# it to checking it with z3 under assumptions, like `check_model` did before.
+# The status vector is a minimal cut set of `g1`, so it satisfies all
+# queries.
+QUERIES = ('g1', '\\mcs(g1)', '\\mcs(g1) && !\\mps(g2)')
+SIZES = ((40, 50), (160, 200), (640, 800), (2560, 3200))
+
+
+def minimal_cut_set(fault_tree, evaluator: Evaluator) -> frozenset[str]:
+    phi = parser.parse('g1', 'phi')
+    failed = frozenset(fault_tree.get_basic_events())
+    for be in fault_tree.get_basic_events():
+        if evaluator.evaluate(phi, failed - {be}):
+            failed -= {be}
+    return failed
+
+
+if __name__ == '__main__':
+    print(f'{"query":28} {"events":>7} {"z3":>9} {"evaluate":>9}')
+    for query in QUERIES:
+        for n_gates, n_basic_events in SIZES:
+            graph = build_fault_tree(
+                parse(generate_bfl(n_gates, n_basic_events, '[[a]];',
+                                   gates=('and', 'or'))))
+            fault_tree = CompactFaultTree.from_graph(graph)
+            failed = minimal_cut_set(fault_tree, Evaluator(fault_tree))
+            statement = parser.parse(
+                f'{", ".join(sorted(failed))} |= {query}', 'bfl_statement')
+            phi = statement.children[1]
+
+            start = default_timer()
+            formula = build_formula(phi, fault_tree)
+            _, definitions = get_definitions(formula, fault_tree)
+            s = Solver()
+            s.add(formula, *definitions)
+            s.check(*status_vector_literals(statement.children[0],
+                                            fault_tree))
+            solver_time = default_timer() - start
+
+            fault_tree = CompactFaultTree.from_graph(graph)
+            start = default_timer()
+            assert Evaluator(fault_tree).evaluate(phi, failed)
+            print(f'{query:28} {n_basic_events:7} {solver_time:8.3f}s '
+                  f'{default_timer() - start:8.4f}s', flush=True)
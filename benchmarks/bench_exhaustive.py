@@ -0,0 +1,38 @@
+from timeit import default_timer
+
+from bfl import exhaustive
+from bfl.execute_bfl import satisfaction_vectors
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse, parser
+
+# Compares computing satisfaction sets of small fault trees on all status
+# vectors with truth tables to the solver-based paths, which are used when
+# the threshold is lowered.
+QUERIES = ('g1', '\\mcs(g1)', '\\mcs(g1) && !\\mps(g2)')
+SIZES = ((8, 10), (12, 15), (16, 20))
+
+
+def run(statement, fault_tree, max_events: int) -> tuple[int, float]:
+    exhaustive.EXHAUSTIVE_MAX_EVENTS = max_events
+    start = default_timer()
+    count = sum(1 for _ in satisfaction_vectors(statement, fault_tree))
+    return count, default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"query":24} {"events":>7} {"vectors":>8} {"solver":>9} '
+          f'{"tables":>9}')
+    for query in QUERIES:
+        for n_gates, n_basic_events in SIZES:
+            fault_tree = CompactFaultTree.from_graph(build_fault_tree(
+                parse(generate_bfl(n_gates, n_basic_events, '[[a]];',
+                                   gates=('and', 'or')))))
+            statement = parser.parse(f'[[{query}]]', 'bfl_statement')
+            count, solver_time = run(statement, fault_tree, -1)
+            tables_count, tables_time = run(statement, fault_tree,
+                                            n_basic_events)
+            assert count == tables_count
+            print(f'{query:24} {n_basic_events:7} {count:8} '
+                  f'{solver_time:8.3f}s {tables_time:8.3f}s', flush=True)
@@ -0,0 +1,56 @@
+import gc
+import io
+import random
+import tracemalloc
+from timeit import timeit
+
+from generate import generate_galileo
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.stream_graph import stream_fault_tree
+
+N_GATES = 50_000
+N_BASIC_EVENTS = 60_000
+LOOKUPS = 100_000
+
+
+def retained_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def bench_lookups(name, tree, nodes):
+    def run(stmt, number):
+        return timeit(stmt, number=number, globals={'tree': tree,
+                                                    'nodes': nodes})
+
+    print(f'  {name}:')
+    for label, stmt, number in (
+            ('get_basic_events x10', 'tree.get_basic_events()', 10),
+            ('get_root x10', 'tree.get_root()', 10),
+            (f'in_degree x{LOOKUPS}', 'for n in nodes: tree.in_degree(n)', 1),
+            (f'predecessors x{LOOKUPS}',
+             'for n in nodes: list(tree.predecessors(n))', 1)):
+        print(f'    {label:25} {run(stmt, number):8.3f}s')
+
+
+if __name__ == '__main__':
+    text = generate_galileo(N_GATES, N_BASIC_EVENTS) + '---\n'
+    print(f'{N_GATES + N_BASIC_EVENTS} nodes')
+
+    graph, graph_bytes = retained_memory(
+        lambda: stream_fault_tree(io.StringIO(text))[0])
+    compact, compact_bytes = retained_memory(
+        lambda: CompactFaultTree.from_graph(graph))
+    print('Retained memory')
+    print(f'  networkx: {graph_bytes / 2 ** 20:8.1f} MiB')
+    print(f'  compact:  {compact_bytes / 2 ** 20:8.1f} MiB')
+
+    nodes = random.Random(0).choices(list(graph.nodes), k=LOOKUPS)
+    print('Lookups')
+    bench_lookups('networkx', graph, nodes)
+    bench_lookups('compact', compact, nodes)
@@ -0,0 +1,32 @@
+from timeit import default_timer
+
+from generate import generate_galileo
+from run_bfl import execute_str
+
+# Adds a small gate `small` with three basic events to a large generated tree,
+# and queries its minimal cut sets. Only the basic events below `small` get
+# primed copies, so the minimality check does not grow with the tree.
+# Enumerating satisfaction sets still grows with the number of basic events.
+QUERIES = (
+    ('\\exists \\mcs(small) && sa;',
+     ((100, 120), (1000, 1200), (10_000, 12_000))),
+    ('[[\\mcs(small)]];', ((10, 12), (100, 120), (500, 600))),
+)
+
+
+def small_gate_bfl(n_gates, n_basic_events, query):
+    text = generate_galileo(n_gates, n_basic_events, gates=('and', 'or'))
+    text = text.replace('toplevel g0;', 'toplevel top;\ntop or g0 small;', 1)
+    return text + 'small or sa sb;\nsa and e0 e1;\nsb and e1 e2;\n' \
+                  f'---\n{query}\n'
+
+
+if __name__ == '__main__':
+    print(f'{"query":28} {"size":>10} {"time":>9}')
+    for query, sizes in QUERIES:
+        for n_gates, n_basic_events in sizes:
+            text = small_gate_bfl(n_gates, n_basic_events, query)
+            start = default_timer()
+            execute_str(text)
+            elapsed = default_timer() - start
+            print(f'{query:28} {n_gates + n_basic_events:10} {elapsed:8.3f}s')
@@ -0,0 +1,29 @@
+from timeit import default_timer
+
+from generate import generate_bfl
+from run_bfl import execute_str
+
+# Compares counting the models of a formula with `|[[phi]]|` to enumerating
+# its satisfaction set with `[[phi]]`. Enumeration is only run on the small
+# trees, because the number of models grows exponentially.
+QUERY = 'g1 || !g2'
+SIZES = ((4, 12), (5, 16), (20, 100), (50, 300), (100, 500), (200, 1000))
+MAX_ENUMERATED_EVENTS = 16
+
+
+def run(text: str) -> float:
+    start = default_timer()
+    execute_str(text)
+    return default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"query":12} {"events":>7} {"count":>9} {"enumerate":>10}')
+    for n_gates, n_basic_events in SIZES:
+        count = run(generate_bfl(n_gates, n_basic_events, f'|[[{QUERY}]]|;'))
+        enumerate_time = '-'
+        if n_basic_events <= MAX_ENUMERATED_EVENTS:
+            enumerate_time = '{:9.3f}s'.format(
+                run(generate_bfl(n_gates, n_basic_events, f'[[{QUERY}]];')))
+        print(f'{QUERY:12} {n_basic_events:7} {count:8.3f}s '
+              f'{enumerate_time:>10}', flush=True)
@@ -0,0 +1,43 @@
+import os
+import tempfile
+from timeit import default_timer as timer
+
+from generate import generate_bfl
+from parser.parser import build_parser
+
+SIZES = (1_000, 10_000)
+
+
+def bench_startup():
+    print('Parser construction')
+    start = timer()
+    build_parser('earley')
+    print(f'  earley:             {timer() - start:8.3f}s')
+
+    with tempfile.TemporaryDirectory() as d:
+        cache_path = os.path.join(d, 'grammar.lalr.cache')
+        start = timer()
+        build_parser('lalr', cache_path)
+        print(f'  lalr (cold cache):  {timer() - start:8.3f}s')
+        start = timer()
+        build_parser('lalr', cache_path)
+        print(f'  lalr (warm cache):  {timer() - start:8.3f}s')
+
+
+def bench_parse():
+    print('Parse throughput')
+    parsers = {'earley': build_parser('earley'),
+               'lalr': build_parser('lalr', None)}
+    for n in SIZES:
+        text = generate_bfl(n, n, '\\exists g0;')
+        for name, parser in parsers.items():
+            start = timer()
+            parser.parse(text, 'start')
+            elapsed = timer() - start
+            print(f'  {name:6} {n:7} lines: {elapsed:8.3f}s '
+                  f'({n / elapsed:10.0f} lines/s)')
+
+
+if __name__ == '__main__':
+    bench_startup()
+    bench_parse()
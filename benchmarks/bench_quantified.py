@@ -0,0 +1,61 @@
+import os
+from timeit import default_timer
+
+from z3 import Solver
+
+from bfl.build_bfl import build_formula
+from bfl.execute_bfl import get_bfl_tree, quantified_statement
+from bfl.incremental_solver import IncrementalSolver
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse
+
+# Compares deciding quantified statements with quantifier-free bodies on an
+# incremental SAT solver to solving them as closed QBFs, like before.
+CASE_STUDY = os.path.join(os.path.dirname(__file__), '..', 'examples',
+                          'case-study.bfl')
+QUERIES = ('\\exists g1 && !g2;', '\\forall g0 => g1 || g2;',
+           '\\exists (g1 && !g0)[e0: 1, e1: 0];')
+SIZES = ((40, 50), (160, 200), (640, 800), (2560, 3200))
+
+
+def bench(text: str, encoding='inline') -> tuple[int, float, float]:
+    """Returns the number of quantified statements in `text`, and the seconds
+    taken to solve them as QBFs and with SAT."""
+    parse_tree = parse(text)
+    graph = build_fault_tree(parse_tree)
+    statements = [statement for statement in get_bfl_tree(parse_tree).children
+                  if statement.data in ('exists', 'forall')]
+
+    # Each side gets its own tree, so it builds the event formulas itself.
+    fault_tree = CompactFaultTree.from_graph(graph)
+    start = default_timer()
+    for statement in statements:
+        s = Solver()
+        s.add(build_formula(statement, fault_tree, encoding))
+        s.check()
+    qbf = default_timer() - start
+
+    fault_tree = CompactFaultTree.from_graph(graph)
+    start = default_timer()
+    solver = IncrementalSolver(fault_tree)
+    for statement in statements:
+        quantified_statement(statement, fault_tree, encoding, solver)
+    return len(statements), qbf, default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"queries":44} {"events":>7} {"qbf":>9} {"sat":>9}')
+    with open(CASE_STUDY) as f:
+        n, qbf, sat_time = bench(f.read())
+    print(f'{f"case study ({n} queries)":44} {"-":>7} {qbf:8.3f}s '
+          f'{sat_time:8.3f}s', flush=True)
+    for query in QUERIES:
+        for n_gates, n_basic_events in SIZES:
+            for encoding in ('inline', 'tseitin'):
+                _, qbf, sat_time = bench(
+                    generate_bfl(n_gates, n_basic_events, query * 5,
+                                 gates=('and', 'or')), encoding)
+                print(f'{query + " " + encoding:44} {n_basic_events:7} '
+                      f'{qbf:8.3f}s {sat_time:8.3f}s', flush=True)
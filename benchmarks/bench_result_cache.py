@@ -0,0 +1,41 @@
+import tempfile
+from pathlib import Path
+from timeit import default_timer
+
+from bfl.execute_bfl import execute_bfl
+from bfl.result_cache import ResultCache
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from generate import generate_bfl
+from parser.parser import parse
+
+# Compares running the statements of a BFL file without a result cache, with
+# an empty cache, and again with the cache filled by the previous run, like
+# a nightly run of an unchanged file.
+STATEMENTS = ('\\exists g1 && !g2;\n\\forall g1 => g2;\n[[\\mcs(g1)]];\n'
+              '|[[g1 || g2]]|;\n')
+SIZES = ((20, 25), (40, 50), (160, 200))
+
+
+def run(parse_tree, fault_tree, cache: ResultCache | None) -> float:
+    start = default_timer()
+    execute_bfl(parse_tree, fault_tree, cache=cache)
+    return default_timer() - start
+
+
+if __name__ == '__main__':
+    print(f'{"events":>7} {"no cache":>9} {"cold":>9} {"warm":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        for n_gates, n_basic_events in SIZES:
+            parse_tree = parse(generate_bfl(n_gates, n_basic_events,
+                                            STATEMENTS, gates=('and', 'or')))
+            fault_tree = CompactFaultTree.from_graph(
+                build_fault_tree(parse_tree))
+            cache = ResultCache(Path(directory) / f'{n_basic_events}.sqlite')
+            times = [run(parse_tree, fault_tree, None),
+                     run(parse_tree, fault_tree, cache),
+                     run(parse_tree, fault_tree, cache)]
+            cache.close()
+            print(f'{n_basic_events:7} ' + ' '.join(f'{t:8.3f}s'
+                                                    for t in times),
+                  flush=True)
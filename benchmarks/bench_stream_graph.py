@@ -0,0 +1,46 @@
+import os
+import tempfile
+import tracemalloc
+from timeit import default_timer as timer
+
+from generate import generate_bfl
+from galileo.build_graph import build_fault_tree
+from galileo.stream_graph import stream_fault_tree
+from parser.parser import parse, parse_bfl
+
+SIZES = (10_000, 50_000)
+
+
+def load_parse_tree(file_path: str):
+    with open(file_path) as f:
+        parse_tree = parse(f.read())
+    return build_fault_tree(parse_tree), parse_tree
+
+
+def load_streaming(file_path: str):
+    with open(file_path) as f:
+        fault_tree, rest = stream_fault_tree(f)
+    return fault_tree, parse_bfl(rest)
+
+
+def measure(load, file_path: str):
+    tracemalloc.start()
+    start = timer()
+    load(file_path)
+    elapsed = timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as d:
+        for n in SIZES:
+            file_path = os.path.join(d, f'tree_{n}.bfl')
+            with open(file_path, 'w') as f:
+                f.write(generate_bfl(n, n, '\\exists g0;'))
+            for name, load in (('parse tree', load_parse_tree),
+                               ('streaming', load_streaming)):
+                elapsed, peak = measure(load, file_path)
+                print(f'{name:10} {n:7} gates: {elapsed:7.3f}s, '
+                      f'peak {peak / 2 ** 20:8.1f} MiB')
@@ -0,0 +1,42 @@
+import random
+
+GATES = ('and', 'or', 'vot')
+
+
+def generate_galileo(n_gates: int, n_basic_events: int, fan_in=3, seed=0,
+                     gates=GATES) -> str:
+    """
+    Generates the Galileo section of a random fault tree with `n_gates`
+    intermediate events and `n_basic_events` basic events. Gate `g0` is the
+    top-level event, and every gate only has children with a higher index, so
+    the result is always a valid DAG with exactly one root.
+    """
+    rng = random.Random(seed)
+    children = [[] for _ in range(n_gates)]
+
+    # Connect every node to the tree first, so `g0` is the only root.
+    for i in range(1, n_gates):
+        children[rng.randrange(i)].append(f'g{i}')
+    for i in range(n_basic_events):
+        children[rng.randrange(n_gates)].append(f'e{i}')
+
+    for i, cs in enumerate(children):
+        while len(cs) < fan_in:
+            j = rng.randrange(i + 1, n_gates + n_basic_events)
+            child = f'g{j}' if j < n_gates else f'e{j - n_gates}'
+            if child not in cs:
+                cs.append(child)
+
+    lines = ['toplevel g0;']
+    for i, cs in enumerate(children):
+        gate = rng.choice(gates)
+        if gate == 'vot':
+            gate = f'{rng.randint(1, len(cs))}of{len(cs)}'
+        lines.append(f'g{i} {gate} {" ".join(cs)};')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_bfl(n_gates: int, n_basic_events: int, statements: str,
+                 **kwargs) -> str:
+    return generate_galileo(n_gates, n_basic_events, **kwargs) \
+        + '---\n' + statements + '\n'
@@ -0,0 +1 @@
+from .bdd import *
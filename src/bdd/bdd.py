@@ -0,0 +1,319 @@
+from typing import Iterable, Sequence, Iterator, Mapping, Collection
+
+# Nodes are integers that index the node arrays of a `BDD`. The terminals
+# come first, so `FALSE` and `TRUE` are the same in every manager.
+FALSE, TRUE = 0, 1
+
+
+class NodeLimitExceeded(Exception):
+    pass
+
+
+class BDD:
+    """
+    Manager of reduced ordered binary decision diagrams over the variables in
+    `order`, from top to bottom. Node `u` tests the variable at
+    `levels[u]`, and continues with `lows[u]` if it is false and `highs[u]`
+    if it is true. The unique table guarantees that equal functions are the
+    same node, and the computed table caches the results of `ite`. If
+    `max_nodes` is given, creating more nodes raises `NodeLimitExceeded`.
+
+    All operations use explicit stacks instead of recursion, so the number of
+    variables is not limited by the recursion limit.
+    """
+
+    def __init__(self, order: Iterable[str], max_nodes: int | None = None):
+        self.order = list(order)
+        self.max_nodes = max_nodes
+        self.var_levels = {name: i for i, name in enumerate(self.order)}
+        if len(self.var_levels) != len(self.order):
+            raise ValueError('Variable order contains duplicates')
+        bottom = len(self.order)
+        self.levels = [bottom, bottom]
+        self.lows = [FALSE, TRUE]
+        self.highs = [FALSE, TRUE]
+        self.unique: dict[tuple[int, int, int], int] = {}
+        self.computed: dict[tuple[int, int, int], int] = {}
+
+    def __len__(self):
+        return len(self.levels)
+
+    def node(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = self.new_id()
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique[key] = u
+        return u
+
+    def new_id(self) -> int:
+        if self.max_nodes is not None and len(self.levels) >= self.max_nodes:
+            raise NodeLimitExceeded(f'BDD exceeds {self.max_nodes} nodes')
+        return len(self.levels)
+
+    def var(self, name: str) -> int:
+        return self.node(self.var_levels[name], FALSE, TRUE)
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """Returns the node of `if f then g else h`."""
+        levels, lows, highs = self.levels, self.lows, self.highs
+        computed, unique = self.computed, self.unique
+        results = []
+        # A task is either `(f, g, h)`, which computes `ite(f, g, h)`, or
+        # `(key, level, None, None)`, which combines the two results on top
+        # of `results`.
+        tasks: list[tuple] = [(f, g, h)]
+        while tasks:
+            task = tasks.pop()
+            if len(task) == 4:
+                key, level, _, _ = task
+                high = results.pop()
+                low = results.pop()
+                if low == high:
+                    u = low
+                else:
+                    u = unique.get((level, low, high))
+                    if u is None:
+                        u = unique[level, low, high] = self.new_id()
+                        levels.append(level)
+                        lows.append(low)
+                        highs.append(high)
+                computed[key] = u
+                results.append(u)
+                continue
+
+            f, g, h = task
+            if f == TRUE or g == h:
+                results.append(g)
+                continue
+            if f == FALSE:
+                results.append(h)
+                continue
+            if g == TRUE and h == FALSE:
+                results.append(f)
+                continue
+            # Conjunctions and disjunctions are commutative, so their
+            # operands are sorted to share entries in the computed table.
+            if h == FALSE and g < f or g == TRUE and h < f:
+                if h == FALSE:
+                    f, g = g, f
+                else:
+                    f, h = h, f
+            key = (f, g, h)
+            u = computed.get(key)
+            if u is not None:
+                results.append(u)
+                continue
+
+            lf, lg, lh = levels[f], levels[g], levels[h]
+            level = min(lf, lg, lh)
+            tasks.append((key, level, None, None))
+            tasks.append((highs[f] if lf == level else f,
+                          highs[g] if lg == level else g,
+                          highs[h] if lh == level else h))
+            tasks.append((lows[f] if lf == level else f,
+                          lows[g] if lg == level else g,
+                          lows[h] if lh == level else h))
+        return results[0]
+
+    def negate(self, f: int) -> int:
+        return self.ite(f, FALSE, TRUE)
+
+    def by_level(self, fs: Iterable[int]) -> list[int]:
+        """
+        Sorts `fs` from the bottom of the order to the top. Combining nodes
+        in this order adds every operand above the previous result, instead
+        of traversing the result again for every operand.
+        """
+        return sorted(fs, key=self.levels.__getitem__, reverse=True)
+
+    def conjoin(self, fs: Iterable[int]) -> int:
+        result = TRUE
+        for f in self.by_level(fs):
+            result = self.ite(f, result, FALSE)
+        return result
+
+    def disjoin(self, fs: Iterable[int]) -> int:
+        result = FALSE
+        for f in self.by_level(fs):
+            result = self.ite(f, TRUE, result)
+        return result
+
+    def equiv(self, f: int, g: int) -> int:
+        return self.ite(f, g, self.negate(g))
+
+    def at_least(self, fs: Sequence[int], k: int) -> int:
+        """
+        Returns the node that holds iff at least `k` of `fs` hold, using
+        `O(len(fs) * k)` calls to `ite`.
+        """
+        if k <= 0:
+            return TRUE
+        if k > len(fs):
+            return FALSE
+        # `counts[j]` holds iff at least `j` of the remaining `fs` hold.
+        counts = [TRUE] + [FALSE] * k
+        for f in reversed(fs):
+            for j in range(k, 0, -1):
+                counts[j] = self.ite(f, counts[j - 1], counts[j])
+        return counts[k]
+
+    def post_order(self, f: int) -> list[int]:
+        """Returns the nodes reachable from `f`, children before parents."""
+        result = []
+        visited = {FALSE, TRUE}
+        stack = [f]
+        while stack:
+            u = stack[-1]
+            if u in visited:
+                stack.pop()
+                continue
+            missing = [v for v in (self.lows[u], self.highs[u])
+                       if v not in visited]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            visited.add(u)
+            result.append(u)
+        return result
+
+    def count(self, f: int) -> int:
+        """Returns the number of assignments to all variables that satisfy
+        `f`."""
+        levels, lows, highs = self.levels, self.lows, self.highs
+        counts = {FALSE: 0, TRUE: 1}
+        for u in self.post_order(f):
+            # Variables skipped between a node and its children are free.
+            low, high = lows[u], highs[u]
+            counts[u] = (counts[low] << (levels[low] - levels[u] - 1)) \
+                + (counts[high] << (levels[high] - levels[u] - 1))
+        return counts[f] << levels[f]
+
+    def support(self, f: int) -> set[str]:
+        """Returns the variables that `f` depends on."""
+        return {self.order[self.levels[u]] for u in self.post_order(f)}
+
+    def restrict(self, f: int, values: Mapping[str, bool]) -> int:
+        """Returns `f` with the variables in `values` set to their values.
+        Variables outside of the order are ignored."""
+        levels = {self.var_levels[name]: value
+                  for name, value in values.items() if name in self.var_levels}
+        results = {FALSE: FALSE, TRUE: TRUE}
+        for u in self.post_order(f):
+            level, low, high = self.levels[u], self.lows[u], self.highs[u]
+            if level in levels:
+                results[u] = results[high] if levels[level] else results[low]
+            else:
+                results[u] = self.node(level, results[low], results[high])
+        return results[f]
+
+    def flip(self, f: int) -> int:
+        """Returns `f` with all variables negated."""
+        results = {FALSE: FALSE, TRUE: TRUE}
+        for u in self.post_order(f):
+            results[u] = self.node(self.levels[u], results[self.highs[u]],
+                                   results[self.lows[u]])
+        return results[f]
+
+    def upward_closure(self, f: int) -> int:
+        """Returns the node that holds for every assignment that is at least
+        as large as an assignment that satisfies `f`."""
+        results = {FALSE: FALSE, TRUE: TRUE}
+        for u in self.post_order(f):
+            low = results[self.lows[u]]
+            results[u] = self.node(self.levels[u], low,
+                                   self.ite(low, TRUE, results[self.highs[u]]))
+        return results[f]
+
+    def minimal(self, f: int) -> int:
+        """
+        Returns the node that holds for the minimal assignments that satisfy
+        `f`, i.e., the ones where no variable can be set to false without
+        falsifying `f`. A minimal assignment with a true variable `x` on top
+        consists of a minimal assignment of the high branch that is not
+        above any assignment of the low branch.
+        """
+        levels = self.levels
+        ups = {FALSE: FALSE, TRUE: TRUE}
+        results = {FALSE: FALSE, TRUE: TRUE}
+        for u in self.post_order(f):
+            level, low, high = levels[u], self.lows[u], self.highs[u]
+            ups[u] = self.node(level, ups[low],
+                               self.ite(ups[low], TRUE, ups[high]))
+            results[u] = self.node(
+                level, self.zeros(results[low], level + 1, levels[low]),
+                self.ite(ups[low], FALSE,
+                         self.zeros(results[high], level + 1, levels[high])))
+        return self.zeros(results[f], 0, levels[f])
+
+    def zeros(self, f: int, start: int, stop: int) -> int:
+        """Returns `f` and all variables from level `start` up to `stop`
+        being false, where `f` does not depend on the latter."""
+        for level in range(stop - 1, start - 1, -1):
+            f = self.node(level, f, FALSE)
+        return f
+
+    def evaluate(self, f: int, true_vars: Collection[str]) -> bool:
+        while f not in (FALSE, TRUE):
+            f = self.highs[f] if self.order[self.levels[f]] in true_vars \
+                else self.lows[f]
+        return f == TRUE
+
+    def closest(self, f: int, true_vars: Collection[str]) -> set[str] | None:
+        """
+        Returns a satisfying assignment of `f` that differs from `true_vars`
+        in as few variables as possible, as its set of true variables. The
+        distance to the closest assignment is computed bottom-up for every
+        node, and ties are broken by keeping the value of the highest
+        variable. Returns `None` if `f` is unsatisfiable.
+        """
+        if f == FALSE:
+            return None
+        levels, lows, highs = self.levels, self.lows, self.highs
+        # Variables skipped between a node and its children keep their value,
+        # so only the tested variables count.
+        infinity = len(self.order) + 1
+        distances = {FALSE: infinity, TRUE: 0}
+        for u in self.post_order(f):
+            value = self.order[levels[u]] in true_vars
+            distances[u] = min(distances[lows[u]] + value,
+                               distances[highs[u]] + (not value))
+
+        result = set(true_vars).intersection(self.order)
+        while f != TRUE:
+            name = self.order[levels[f]]
+            value = name in true_vars
+            kept = highs[f] if value else lows[f]
+            if distances[kept] != distances[f]:
+                value = not value
+            if value:
+                result.add(name)
+            else:
+                result.discard(name)
+            f = highs[f] if value else lows[f]
+        return result
+
+    def models(self, f: int) -> Iterator[frozenset[str]]:
+        """Yields the sets of true variables of all assignments that satisfy
+        `f`."""
+        bottom = len(self.order)
+        stack = [(f, 0, ())]
+        while stack:
+            u, level, true_levels = stack.pop()
+            if u == FALSE:
+                continue
+            if level == bottom:
+                yield frozenset(self.order[i] for i in true_levels)
+                continue
+            if self.levels[u] > level:
+                low = high = u
+            else:
+                low, high = self.lows[u], self.highs[u]
+            stack.append((high, level + 1, true_levels + (level,)))
+            stack.append((low, level + 1, true_levels))
@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, Literal
+
+from lark import Tree
+from z3 import FuncDeclRef
+
+BackendName = Literal['z3', 'bdd', 'auto']
+backend_names = {'z3', 'bdd', 'auto'}
+
+
+class Backend(ABC):
+    """
+    Answers BFL statements on a fault tree. Every method takes the parse tree
+    of a statement of the matching kind, e.g., `quantified` takes an `exists`
+    or `forall` statement. Status vectors are returned as sets of the
+    function declarations of the failed basic events, like z3 models.
+    """
+
+    @abstractmethod
+    def quantified(self, statement: Tree) -> bool:
+        pass
+
+    @abstractmethod
+    def satisfaction_vectors(self, statement: Tree) \
+            -> Iterator[frozenset[FuncDeclRef]]:
+        pass
+
+    def satisfaction_set(self, statement: Tree) -> set[frozenset[FuncDeclRef]]:
+        return set(self.satisfaction_vectors(statement))
+
+    @abstractmethod
+    def count(self, statement: Tree) -> int:
+        pass
+
+    @abstractmethod
+    def check_model(self, statement: Tree) -> bool | frozenset[FuncDeclRef]:
+        pass
+
+    @abstractmethod
+    def idp(self, statement: Tree) -> bool:
+        pass
+
+    @abstractmethod
+    def sup(self, statement: Tree) -> bool:
+        pass
+
+    @abstractmethod
+    def sup_all(self) -> frozenset[FuncDeclRef]:
+        pass
+
+    def close(self):
+        """Saves what the backend learned while answering statements, e.g.,
+        timing statistics. Does nothing by default."""
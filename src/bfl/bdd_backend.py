@@ -0,0 +1,239 @@
+from typing import Iterator
+
+from lark import Transformer, Tree
+from lark.exceptions import VisitError
+from z3 import Bool, FuncDeclRef
+
+from bdd import BDD, TRUE, FALSE, NodeLimitExceeded
+from bfl.backend import Backend
+from bfl.evaluate import Evaluator, EvaluationLimitExceeded
+from bfl.exceptions import BFLError
+from bfl.model_count import dfs_order
+from galileo.fault_tree import FaultTree
+from gates import AndGate, OrGate, VotGate, Gate
+from utils.list_to_tuple import list_to_tuple
+from utils.memoize_method import memoize_method
+
+
+def to_decls(names) -> frozenset[FuncDeclRef]:
+    return frozenset(Bool(name).decl() for name in names)
+
+
+class BddBackend(Backend):
+    """
+    Answers BFL statements with a BDD of every event and formula. All BDDs
+    share one manager, whose variables are the basic events in depth-first
+    order, so the BDDs of the events are built once and reused by every
+    statement. If `max_nodes` is given, statements whose BDDs would exceed it
+    raise `NodeLimitExceeded`.
+    """
+
+    def __init__(self, fault_tree: FaultTree, max_nodes: int | None = None):
+        self.fault_tree = fault_tree
+        self.bdd = BDD(dfs_order(fault_tree), max_nodes)
+        self.events: dict[str, int] = {}
+
+    def event(self, event: str) -> int:
+        """
+        Returns the BDD of `event`. The BDDs of all events below it are built
+        bottom-up first, visiting them in post-order with an explicit stack.
+        """
+        event = str(event)
+        if event not in self.fault_tree.nodes:
+            raise BFLError(f'Unknown event `{event}`')
+
+        events = self.events
+        stack = [(event, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if current in events:
+                continue
+
+            # noinspection PyCallingNonCallable
+            if self.fault_tree.in_degree(current) == 0:  # basic event
+                events[current] = self.bdd.var(current)
+                continue
+
+            children = list(self.fault_tree.predecessors(current))
+            if children_done:
+                events[current] = self.gate(
+                    self.fault_tree.nodes[current]['gate'],
+                    [events[c] for c in children])
+            else:
+                stack.append((current, True))
+                stack.extend((c, False) for c in children if c not in events)
+
+        return events[event]
+
+    def gate(self, gate: Gate, children: list[int]) -> int:
+        match gate:
+            case AndGate():
+                return self.bdd.conjoin(children)
+            case OrGate():
+                return self.bdd.disjoin(children)
+            case VotGate():
+                return self.vot(children, gate.comp, gate.k)
+        raise ValueError(f'Unknown gate type: {type(gate)}')
+
+    def vot(self, args: list[int], comp: str, k: int) -> int:
+        bdd = self.bdd
+        match comp:
+            case '<':
+                return bdd.negate(bdd.at_least(args, k))
+            case '<=':
+                return bdd.negate(bdd.at_least(args, k + 1))
+            case '>':
+                return bdd.at_least(args, k + 1)
+            case '>=':
+                return bdd.at_least(args, k)
+            case '==':
+                return bdd.ite(bdd.at_least(args, k + 1), FALSE,
+                               bdd.at_least(args, k))
+        raise ValueError('Unknown comp')
+
+    def formula(self, phi: Tree) -> int:
+        try:
+            return BddTransformer(self).transform(phi)
+        except VisitError as e:
+            if isinstance(e.orig_exc, (BFLError, NodeLimitExceeded)):
+                raise e.orig_exc
+            raise e
+
+    def quantified(self, statement: Tree) -> bool:
+        assert statement.data == 'forall' or statement.data == 'exists'
+        f = self.formula(statement.children[0])
+        return f == TRUE if statement.data == 'forall' else f != FALSE
+
+    def satisfaction_vectors(self, statement: Tree) \
+            -> Iterator[frozenset[FuncDeclRef]]:
+        # The BDD is built before the first vector is requested, so running
+        # out of nodes is reported by this call, not by the iterator.
+        f = self.formula(statement.children[0])
+        return map(to_decls, self.bdd.models(f))
+
+    def count(self, statement: Tree) -> int:
+        return self.bdd.count(self.formula(statement.children[0]))
+
+    def check_model(self, statement: Tree) -> bool | frozenset[FuncDeclRef]:
+        assert statement.data == 'check_model'
+        failed = {token.value for token in statement.children[0].children}
+        if not failed.issubset(self.fault_tree.get_basic_events_set()):
+            raise BFLError('Status vector can only contain basic events')
+        try:
+            # The BDD is only needed for a counterexample.
+            satisfied = Evaluator(self.fault_tree).evaluate(
+                statement.children[1], frozenset(failed))
+        except EvaluationLimitExceeded:
+            satisfied = None
+        if satisfied:
+            return True
+        f = self.formula(statement.children[1])
+        if satisfied is None and self.bdd.evaluate(f, failed):
+            return True
+        counterexample = self.bdd.closest(f, failed)
+        if counterexample is None:
+            raise BFLError('Cannot generate counterexample for unsatisfiable '
+                           'formula')
+        return to_decls(counterexample)
+
+    def idp(self, statement: Tree) -> bool:
+        assert statement.data == 'idp'
+        f1, f2 = map(self.formula, statement.children)
+        return self.bdd.support(f1).isdisjoint(self.bdd.support(f2))
+
+    def sup(self, statement: Tree) -> bool:
+        f = self.formula(statement.children[0])
+        root = self.event(self.fault_tree.get_root())
+        return self.bdd.support(f).isdisjoint(self.bdd.support(root))
+
+    def sup_all(self) -> frozenset[FuncDeclRef]:
+        root_support = self.bdd.support(self.event(self.fault_tree.get_root()))
+        return to_decls(
+            event for event in self.fault_tree.nodes
+            if self.bdd.support(self.event(event)).isdisjoint(root_support))
+
+
+class BddTransformer(Transformer):
+    def __init__(self, backend: BddBackend):
+        super().__init__()
+        self.backend = backend
+        self.bdd = backend.bdd
+        self.cache = {}
+
+    @list_to_tuple
+    @memoize_method
+    def event(self, args):
+        return self.backend.event(args[0])
+
+    @list_to_tuple
+    @memoize_method
+    def with_evidence(self, args):
+        phi, evidence = args
+        values = dict(evidence)
+        if len(values) < len(set(evidence)):
+            # Like `BflTransformer.with_evidence`, no status vector satisfies
+            # contradicting evidence, so the formula holds vacuously.
+            return TRUE
+        return self.bdd.restrict(phi, values)
+
+    @list_to_tuple
+    @memoize_method
+    def evidence(self, args):
+        return args
+
+    @list_to_tuple
+    @memoize_method
+    def mapping(self, args):
+        return args[0].value, args[1] == '1'
+
+    @list_to_tuple
+    @memoize_method
+    def mcs(self, args):
+        return self.bdd.minimal(args[0])
+
+    @list_to_tuple
+    @memoize_method
+    def mps(self, args):
+        # The minimal path sets are the minimal vectors of the negated
+        # formula with all basic events negated, like `BflTransformer.mps`.
+        return self.bdd.minimal(self.bdd.flip(self.bdd.negate(args[0])))
+
+    @list_to_tuple
+    @memoize_method
+    def vot(self, args):
+        return self.backend.vot(list(args[2]), args[0].value, int(args[1]))
+
+    @list_to_tuple
+    @memoize_method
+    def basic_events(self, args):
+        return tuple(self.backend.event(token) for token in args)
+
+    @list_to_tuple
+    @memoize_method
+    def and_(self, args):
+        return self.bdd.conjoin(args)
+
+    @list_to_tuple
+    @memoize_method
+    def or_(self, args):
+        return self.bdd.disjoin(args)
+
+    @list_to_tuple
+    @memoize_method
+    def implies(self, args):
+        return self.bdd.ite(args[0], args[1], TRUE)
+
+    @list_to_tuple
+    @memoize_method
+    def equiv(self, args):
+        return self.bdd.equiv(*args)
+
+    @list_to_tuple
+    @memoize_method
+    def nequiv(self, args):
+        return self.bdd.negate(self.bdd.equiv(*args))
+
+    @list_to_tuple
+    @memoize_method
+    def neg(self, args):
+        return self.bdd.negate(args[0])
@@ -1,43 +1,234 @@
-from functools import lru_cache
+from typing import Literal
 
 from lark import Transformer, Token, Tree
 from lark.exceptions import VisitError
-from z3 import Bool, And, Or, Implies, Not, ForAll, Exists, Bools, BoolRef, \
-    substitute
+from z3 import Bool, And, Or, Implies, Not, ForAll, Exists, BoolRef, \
+    substitute, BoolVal, is_and, is_not, is_const
 
 from bfl.exceptions import BFLError
 from galileo.fault_tree import FaultTree
 from gates import Gate, VotGate
 from utils.get_vars import get_vars
 from utils.list_to_tuple import list_to_tuple
-
-CACHE_SIZE = 1000
-
-
-def build_formula(parse_tree: Tree, fault_tree: FaultTree) -> BoolRef:
+from utils.memoize_method import memoize_method
+from utils.variable_pool import VariablePool
+
+Encoding = Literal['inline', 'tseitin']
+encodings = {'inline', 'tseitin'}
+# Prefix of the variables that represent an intermediate event evaluated with
+# all basic events negated, see `dual_var`.
+DUAL_PREFIX = '~'
+# Prefix of the primed copies of basic events in `\mcs` and `\mps`. Like
+# `DUAL_PREFIX`, it cannot occur in event names, so the copies never collide
+# with events of the fault tree.
+PRIME_PREFIX = "'"
+
+
+def build_formula(parse_tree: Tree, fault_tree: FaultTree,
+                  encoding: Encoding = 'inline',
+                  substitute_evidence=False) -> BoolRef:
+    """
+    Builds the z3 formula of `parse_tree`. With the `tseitin` encoding, the
+    formula can contain variables for intermediate events, which are defined
+    by the formulas returned by `get_definitions`. Evidence is encoded by
+    quantifying over the variables it sets. With `substitute_evidence`, the
+    values are substituted instead, unless the formula has Tseitin
+    variables, so quantifier-free formulas stay quantifier-free.
+    """
     try:
-        return BflTransformer(fault_tree).transform(parse_tree)
+        return BflTransformer(fault_tree, encoding,
+                              substitute_evidence).transform(parse_tree)
     except VisitError as e:
         if isinstance(e.orig_exc, BFLError):
             raise e.orig_exc
         raise e
 
 
-@lru_cache(maxsize=CACHE_SIZE)
 def event_to_formula(event: Token | str, fault_tree: FaultTree) -> BoolRef:
+    """
+    Returns the formula of `event`, using the formula table of `fault_tree`.
+    The table is filled bottom-up for all events below `event` that are not
+    in it yet, visiting them in post-order with an explicit stack.
+    """
+    event = str(event)
     if event not in fault_tree.nodes:
         raise BFLError(f'Unknown event `{event}`')
 
-    # noinspection PyCallingNonCallable
-    if fault_tree.in_degree(event) == 0:  # basic event
-        return Bool(event)
-
-    if 'gate' not in fault_tree.nodes[event]:
-        raise ValueError(f'Event ({event}) does not have gate')
+    formulas = fault_tree.formulas
+    stack = [(event, False)]
+    while stack:
+        current, children_done = stack.pop()
+        if current in formulas:
+            continue
+
+        # noinspection PyCallingNonCallable
+        if fault_tree.in_degree(current) == 0:  # basic event
+            formulas[current] = Bool(current)
+            continue
+
+        if 'gate' not in fault_tree.nodes[current]:
+            raise ValueError(f'Event ({current}) does not have gate')
+
+        children = fault_tree.predecessors(current)
+        if children_done:
+            gate: Gate = fault_tree.nodes[current]['gate']
+            formulas[current] = gate.to_z3(
+                *(formulas[c] for c in children),
+                cardinality=fault_tree.cardinality)
+        else:
+            stack.append((current, True))
+            stack.extend((c, False) for c in children if c not in formulas)
+
+    return formulas[event]
+
+
+def event_to_var(event: Token | str, fault_tree: FaultTree) -> BoolRef:
+    """
+    Tseitin encoding of `event`: returns a variable for `event`, and adds the
+    definitions of all intermediate events below `event` to the definition
+    table of `fault_tree`. Each definition states that the variable of an
+    intermediate event equals its gate applied to the variables of its
+    children.
+    """
+    event = str(event)
+    if event not in fault_tree.nodes:
+        raise BFLError(f'Unknown event `{event}`')
 
-    gate: Gate = fault_tree.nodes[event]['gate']
-    return gate.to_z3(*map(lambda e: event_to_formula(e, fault_tree),
-                           fault_tree.predecessors(event)))
+    definitions = fault_tree.definitions
+    stack = [event]
+    while stack:
+        current = stack.pop()
+        # noinspection PyCallingNonCallable
+        if current in definitions or fault_tree.in_degree(current) == 0:
+            continue
+
+        if 'gate' not in fault_tree.nodes[current]:
+            raise ValueError(f'Event ({current}) does not have gate')
+
+        gate: Gate = fault_tree.nodes[current]['gate']
+        children = list(fault_tree.predecessors(current))
+        # noinspection PyCallingNonCallable
+        intermediate_children = [c for c in children
+                                 if fault_tree.in_degree(c) > 0]
+        definitions[current] = (
+            Bool(current) == gate.to_z3(
+                *map(Bool, children), cardinality=fault_tree.cardinality),
+            intermediate_children)
+        stack.extend(intermediate_children)
+
+    return Bool(event)
+
+
+def build_event_formula(event: Token | str, fault_tree: FaultTree,
+                        encoding: Encoding = 'inline') -> BoolRef:
+    if encoding == 'tseitin':
+        return event_to_var(event, fault_tree)
+    return event_to_formula(event, fault_tree)
+
+
+def dual_name(name: str) -> str:
+    return name.removeprefix(DUAL_PREFIX) if name.startswith(DUAL_PREFIX) \
+        else DUAL_PREFIX + name
+
+
+def dual_var(name: str, fault_tree: FaultTree) -> BoolRef:
+    """
+    Returns the dual of the variable of intermediate event `name`, i.e., a
+    variable that holds the value of the event when all basic events are
+    negated. The definitions of the duals below `name` are added to the
+    definition table of `fault_tree`.
+    """
+    definitions = fault_tree.definitions
+    stack = [name]
+    while stack:
+        current = stack.pop()
+        dual = dual_name(current)
+        if dual in definitions:
+            continue
+
+        definition, intermediate_children = definitions[current]
+        gate_formula = definition.arg(1)
+        negated = [(v, Bool(dual_name(v.decl().name())))
+                   if v.decl().name() in intermediate_children else (v, Not(v))
+                   for v in get_vars(gate_formula)]
+        definitions[dual] = (Bool(dual) == substitute(gate_formula, *negated),
+                             list(map(dual_name, intermediate_children)))
+        stack.extend(intermediate_children)
+
+    return Bool(dual_name(name))
+
+
+def get_definitions(formula: BoolRef, fault_tree: FaultTree) \
+        -> tuple[list[BoolRef], list[BoolRef]]:
+    """
+    Returns the Tseitin variables that occur freely in `formula`, including
+    the ones they depend on, and the definitions of these variables. For
+    formulas built with the `inline` encoding, both lists are empty.
+    """
+    definitions = fault_tree.definitions
+    if not definitions:
+        return [], []
+
+    stack = [v.decl().name() for v in get_vars(formula)
+             if v.decl().name() in definitions]
+    seen = dict.fromkeys(stack)
+    while stack:
+        for child in definitions[stack.pop()][1]:
+            if child not in seen:
+                seen[child] = None
+                stack.append(child)
+
+    return [Bool(name) for name in seen], \
+        [definitions[name][0] for name in seen]
+
+
+def close_forall(formula: BoolRef, fault_tree: FaultTree) -> BoolRef:
+    """Returns `formula`, together with the definitions of its Tseitin
+    variables, universally quantified over all its variables."""
+    _, definitions = get_definitions(formula, fault_tree)
+    body = Implies(And(*definitions), formula) if definitions else formula
+    free_vars = get_vars(body)
+    return ForAll(free_vars, body) if len(free_vars) > 0 else body
+
+
+def close_exists(formula: BoolRef, fault_tree: FaultTree) -> BoolRef:
+    """Returns `formula`, together with the definitions of its Tseitin
+    variables, existentially quantified over all its variables."""
+    _, definitions = get_definitions(formula, fault_tree)
+    body = And(*definitions, formula) if definitions else formula
+    free_vars = get_vars(body)
+    return Exists(free_vars, body) if len(free_vars) > 0 else body
+
+
+def evidence_values(evidence: BoolRef) -> dict[str, bool] | None:
+    """
+    Returns the values that the conjunction of literals `evidence` assigns
+    to its variables, or `None` if it assigns both values to a variable.
+    """
+    values = {}
+    literals = evidence.children() if is_and(evidence) else [evidence]
+    for literal in literals:
+        value = not is_not(literal)
+        name = (literal.arg(0) if is_not(literal) else literal).decl().name()
+        if values.setdefault(name, value) != value:
+            return None
+    return values
+
+
+def negated_conjuncts(formula: BoolRef) -> set[str]:
+    """
+    Returns the names of the variables that occur negated as a top-level
+    conjunct of `formula`, i.e., that are false whenever `formula` holds.
+    """
+    result = set()
+    stack = [formula]
+    while stack:
+        current = stack.pop()
+        if is_and(current):
+            stack.extend(current.children())
+        elif is_not(current) and is_const(current.arg(0)):
+            result.add(current.arg(0).decl().name())
+    return result
 
 
 def replace_with_primes(formula: BoolRef,
@@ -45,130 +236,182 @@ def replace_with_primes(formula: BoolRef,
     return substitute(formula, *bes_and_primes.items())
 
 
-def negate_atoms(formula: BoolRef):
+def negate_atoms(formula: BoolRef, fault_tree: FaultTree | None = None):
+    """
+    Negates all basic events in `formula`. Tseitin variables are replaced by
+    their duals instead, which requires `fault_tree`.
+    """
     atoms = get_vars(formula)
-    return substitute(formula, *zip(atoms, map(Not, atoms)))
+    definitions = fault_tree.definitions if fault_tree is not None else {}
+    return substitute(formula, *(
+        (atom, dual_var(atom.decl().name(), fault_tree))
+        if atom.decl().name() in definitions else (atom, Not(atom))
+        for atom in atoms))
 
 
 # noinspection PyMethodMayBeStatic
 class BflTransformer(Transformer):
-    def __init__(self, fault_tree: FaultTree):
+    def __init__(self, fault_tree: FaultTree, encoding: Encoding = 'inline',
+                 substitute_evidence=False):
         super().__init__()
+        if encoding not in encodings:
+            raise ValueError(f'Unknown encoding `{encoding}`')
         self.fault_tree = fault_tree
-        self.prime_counter = 0
+        self.encoding = encoding
+        self.substitute_evidence = substitute_evidence
+        self.prime_pool = VariablePool(PRIME_PREFIX)
+        self.cache = {}
+
+    # The quantifiers below also bind the Tseitin variables in their scope,
+    # together with their definitions. For the inline encoding, there are no
+    # such variables, and the definitions are empty.
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def forall(self, args):
-        free_vars = get_vars(args[0])
-        return ForAll(free_vars, args[0]) if len(free_vars) > 0 else args[0]
+        return close_forall(args[0], self.fault_tree)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def exists(self, args):
-        free_vars = get_vars(args[0])
-        return Exists(free_vars, args[0]) if len(free_vars) > 0 else args[0]
+        return close_exists(args[0], self.fault_tree)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def with_evidence(self, args):
         phi, evidence = args
+        tseitin_vars, definitions = get_definitions(phi, self.fault_tree)
+        if definitions:
+            values = evidence_values(evidence)
+            if values is None:
+                return BoolVal(True)
+            # Like in the inline encoding, evidence on intermediate events has
+            # no effect, so their Tseitin variables are not constrained.
+            bes = self.fault_tree.get_basic_events_set()
+            literals = [Bool(name) if value else Not(Bool(name))
+                        for name, value in values.items() if name in bes]
+            return ForAll([Bool(name) for name in values if name in bes]
+                          + tseitin_vars,
+                          Implies(And(*literals, *definitions), phi))
+        if self.substitute_evidence:
+            values = evidence_values(evidence)
+            if values is None:
+                return BoolVal(True)
+            return substitute(phi, *((Bool(name), BoolVal(value))
+                                     for name, value in values.items()))
         return ForAll(get_vars(evidence), Implies(evidence, phi))
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def evidence(self, args):
         return And(*args) if len(args) > 1 else args[0]
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def mcs(self, args):
-        bes_and_primes = self.primes()
-        return And(
-            args[0],
-            Not(Exists(
-                list(bes_and_primes.values()),
-                And(
-                    And(*(Implies(p, b) for b, p in bes_and_primes.items())),
-                    Or(*(p != b for b, p in bes_and_primes.items())),
-                    replace_with_primes(args[0], bes_and_primes)
-                )
-            ))
-        )
+        return self.minimal(args[0])
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def mps(self, args):
-        bes_and_primes = self.primes()
-        return And(
-            negate_atoms(Not(args[0])),
-            Not(Exists(
-                list(bes_and_primes.values()),
+        return self.minimal(negate_atoms(Not(args[0]), self.fault_tree))
+
+    def minimal(self, formula: BoolRef) -> BoolRef:
+        """
+        Returns a formula that holds iff the current status vector is a
+        minimal one that satisfies `formula`. Only the basic events in the
+        cone of influence of `formula` get primed copies. All other basic
+        events must be false in a minimal vector, so they are negated.
+        """
+        tseitin_vars, definitions = get_definitions(formula, self.fault_tree)
+        bes = self.fault_tree.get_basic_events_set()
+        names = [v.decl().name()
+                 for v in get_vars(And(formula, *definitions))]
+        free_bes = [name for name in names if name in bes]
+        # Basic events that are false whenever `formula` holds are also false
+        # in every smaller vector, so they do not need a primed copy either.
+        negated = negated_conjuncts(formula)
+        cone = [be for be in free_bes if be not in negated]
+        outside = set(free_bes)
+        return And(formula,
+                   Not(self.exists_smaller(formula, cone, tseitin_vars,
+                                           definitions)),
+                   *(Not(Bool(be)) for be in self.fault_tree.get_basic_events()
+                     if be not in outside))
+
+    def exists_smaller(self, formula: BoolRef, cone: list[str],
+                       tseitin_vars: list[BoolRef],
+                       definitions: list[BoolRef]) -> BoolRef:
+        """
+        Returns a formula that holds iff `formula` holds for a status vector
+        that is strictly smaller than the current one, and only differs from
+        it in the basic events in `cone`.
+        """
+        if not cone:
+            return BoolVal(False)
+        with self.prime_pool.scope(len(cone)) as primes:
+            bes_and_primes = dict(zip(map(Bool, cone), primes))
+            return Exists(
+                primes + tseitin_vars,
                 And(
                     And(*(Implies(p, b) for b, p in bes_and_primes.items())),
                     Or(*(p != b for b, p in bes_and_primes.items())),
-                    negate_atoms(
-                        replace_with_primes(Not(args[0]), bes_and_primes))
+                    replace_with_primes(And(*definitions, formula),
+                                        bes_and_primes)
+                    if definitions else
+                    replace_with_primes(formula, bes_and_primes)
                 )
-            ))
-        )
+            )
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def vot(self, args):
-        return VotGate(args[0], int(args[1])).to_z3(*args[2])
+        return VotGate(args[0], int(args[1])).to_z3(
+            *args[2], cardinality=self.fault_tree.cardinality)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def basic_events(self, args):
-        return tuple((event_to_formula(be, self.fault_tree) for be in args))
+        return tuple((build_event_formula(be, self.fault_tree, self.encoding)
+                      for be in args))
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def mapping(self, args):
         return Bool(args[0].value) if args[1] == '1' \
             else Not(Bool(args[0].value))
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def and_(self, args):
         return And(*args)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def or_(self, args):
         return Or(*args)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def implies(self, args):
         return Implies(*args)
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def equiv(self, args):
         return args[0] == args[1]
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def nequiv(self, args):
         return args[0] != args[1]
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def neg(self, args):
         return Not(args[0])
 
     @list_to_tuple
-    @lru_cache(maxsize=CACHE_SIZE)
+    @memoize_method
     def event(self, args):
-        return event_to_formula(args[0], self.fault_tree)
-
-    def primes(self) -> dict[BoolRef, BoolRef]:
-        self.prime_counter += 1
-        bes = self.fault_tree.get_basic_events()
-        primes = [be + "'" * self.prime_counter for be in bes]
-        as_str = ' '.join(bes + primes)
-        bools = Bools(as_str)
-        half = len(bools) // 2
-        return {bools[i]: bools[i + half] for i in range(half)}
+        return build_event_formula(args[0], self.fault_tree, self.encoding)
@@ -0,0 +1,310 @@
+import csv
+import os
+from itertools import islice
+from typing import TextIO, Iterator, Iterable
+
+import numpy as np
+from lark import Tree, Token
+from z3 import Solver, Bool, Not, sat
+
+from bfl.build_bfl import build_formula, get_definitions
+from bfl.evaluate import Evaluator, EvaluationLimitExceeded
+from bfl.exceptions import BFLError
+from galileo.fault_tree import FaultTree
+from gates import AndGate, OrGate, VotGate, Gate, compare
+
+# Status vectors are evaluated in chunks of this many rows, so the columns
+# of all events of a chunk fit in the CPU cache and memory-mapped files are
+# never read at once.
+CHUNK_ROWS = 1 << 14
+
+
+class Columns:
+    """
+    The values of the basic events in a chunk of status vectors, one boolean
+    array per basic event, together with the arrays of the intermediate
+    events computed from them.
+    """
+
+    def __init__(self, basic_events: dict[str, np.ndarray], rows: int):
+        self.basic_events = basic_events
+        self.rows = rows
+        self.events: dict[str, np.ndarray] = dict(basic_events)
+
+    def replace(self, values: dict[str, np.ndarray | bool]) -> 'Columns':
+        """Returns the columns with the basic events in `values` replaced."""
+        basic_events = dict(self.basic_events)
+        for be, value in values.items():
+            basic_events[be] = np.full(self.rows, value) \
+                if isinstance(value, bool) else value
+        return Columns(basic_events, self.rows)
+
+    def negate(self) -> 'Columns':
+        return Columns({be: ~column for be, column
+                        in self.basic_events.items()}, self.rows)
+
+    def take(self, rows: np.ndarray) -> 'Columns':
+        """Returns the columns of the vectors at the indices `rows`."""
+        return Columns({be: column[rows] for be, column
+                        in self.basic_events.items()}, len(rows))
+
+
+class BulkEvaluator:
+    """
+    Evaluates a BFL formula on many status vectors at once. Every event is a
+    NumPy boolean array over a chunk of vectors, and gates are computed with
+    vectorized operations in topological order of the fault tree.
+
+    A vector is a minimal one for the argument of `\\mcs` if no failed basic
+    event outside the argument's cone exists, and clearing any failed event
+    in the cone falsifies the argument. Nested `\\mcs` and `\\mps` depend on
+    all basic events, so their cone contains all of them. For monotone
+    arguments, this is exact. For other arguments, the vectors that pass this
+    check are confirmed one by one with `Evaluator`, or with z3 if they have
+    too many failed events for it.
+    """
+
+    def __init__(self, fault_tree: FaultTree):
+        self.fault_tree = fault_tree
+        self.basic_events = fault_tree.get_basic_events()
+        self.evaluator = Evaluator(fault_tree)
+        # Solvers of `\\mcs` and `\\mps` subformulas by their `id`, see
+        # `solve`.
+        self.solvers: dict[int, Solver] = {}
+
+    def evaluate(self, phi: Tree, vectors: np.ndarray) -> np.ndarray:
+        """
+        Returns a boolean array with the value of `phi` for every row of
+        `vectors`, a matrix with one column per basic event, in the order of
+        `FaultTree.get_basic_events`.
+        """
+        if vectors.ndim != 2 or vectors.shape[1] != len(self.basic_events):
+            raise BFLError(f'Status vectors need {len(self.basic_events)} '
+                           f'columns, one per basic event')
+        result = np.empty(len(vectors), dtype=bool)
+        for start in range(0, len(vectors), CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + CHUNK_ROWS], dtype=bool)
+            # Columns of the transposed chunk are contiguous.
+            transposed = np.ascontiguousarray(chunk.T)
+            columns = Columns(dict(zip(self.basic_events, transposed)),
+                              len(chunk))
+            result[start:start + len(chunk)] = self.value(phi, columns)
+        return result
+
+    def value(self, phi: Tree, columns: Columns) -> np.ndarray:
+        args = phi.children
+        match phi.data:
+            case 'event':
+                return self.event(args[0], columns)
+            case 'neg':
+                return ~self.value(args[0], columns)
+            case 'and_':
+                return np.logical_and.reduce(
+                    [self.value(arg, columns) for arg in args])
+            case 'or_':
+                return np.logical_or.reduce(
+                    [self.value(arg, columns) for arg in args])
+            case 'implies':
+                return ~self.value(args[0], columns) \
+                    | self.value(args[1], columns)
+            case 'equiv':
+                return self.value(args[0], columns) \
+                    == self.value(args[1], columns)
+            case 'nequiv':
+                return self.value(args[0], columns) \
+                    != self.value(args[1], columns)
+            case 'vot':
+                comp, k, basic_events = args
+                return self.vot([self.event(token, columns)
+                                 for token in basic_events.children],
+                                comp.value, int(k), columns.rows)
+            case 'with_evidence':
+                values = {}
+                for mapping in args[1].children:
+                    be, value = mapping.children[0].value, \
+                        mapping.children[1] == '1'
+                    if values.setdefault(be, value) != value:
+                        return np.ones(columns.rows, dtype=bool)
+                return self.value(args[0], columns.replace(
+                    {be: value for be, value in values.items()
+                     if be in columns.basic_events}))
+            case 'mcs':
+                return self.minimal(phi, columns, negate=False)
+            case 'mps':
+                return self.minimal(phi, columns, negate=True)
+        raise ValueError(f'Unknown operator `{phi.data}`')
+
+    def event(self, event: Token | str, columns: Columns) -> np.ndarray:
+        """Returns the array of `event`, after computing the arrays of all
+        events below it in post-order with an explicit stack."""
+        event = str(event)
+        if event not in self.fault_tree.nodes:
+            raise BFLError(f'Unknown event `{event}`')
+
+        events = columns.events
+        stack = [(event, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if current in events:
+                continue
+
+            children = list(self.fault_tree.predecessors(current))
+            if children_done:
+                events[current] = self.gate(
+                    self.fault_tree.nodes[current]['gate'],
+                    [events[c] for c in children], columns.rows)
+            else:
+                stack.append((current, True))
+                stack.extend((c, False) for c in children if c not in events)
+
+        return events[event]
+
+    def gate(self, gate: Gate, children: list[np.ndarray],
+             rows: int) -> np.ndarray:
+        match gate:
+            case AndGate():
+                return np.logical_and.reduce(children)
+            case OrGate():
+                return np.logical_or.reduce(children)
+            case VotGate():
+                return self.vot(children, gate.comp, gate.k, rows)
+        raise ValueError(f'Unknown gate type: {type(gate)}')
+
+    @staticmethod
+    def vot(children: list[np.ndarray], comp: str, k: int,
+            rows: int) -> np.ndarray:
+        # Adding boolean arrays would compute their disjunction.
+        count = np.zeros(rows, dtype=np.int32)
+        for child in children:
+            count += child
+        return compare(count, comp, k)
+
+    def minimal(self, phi: Tree, columns: Columns,
+                negate: bool) -> np.ndarray:
+        """
+        Returns the array of `\\mcs` or `\\mps` `phi`. `\\mps` is `\\mcs` of
+        the negated argument on the complemented vectors, like in
+        `Evaluator`.
+        """
+        argument = phi.children[0]
+
+        def holds(c: Columns) -> np.ndarray:
+            if negate:
+                return ~self.value(argument, c.negate())
+            return self.value(argument, c)
+
+        # The array of an event is cached, so it must not be changed.
+        result = holds(columns).copy()
+        cone = self.cone(argument)
+        for be, column in columns.basic_events.items():
+            if be not in cone:
+                result &= ~column
+                continue
+            # Only vectors that are still candidates are evaluated again.
+            rows = np.flatnonzero(result & column)
+            if len(rows):
+                result[rows] = ~holds(columns.take(rows).replace({be: False}))
+
+        if self.evaluator.is_monotone(argument) or not result.any():
+            return result
+        for row in np.flatnonzero(result):
+            failed = frozenset(be for be, column
+                               in columns.basic_events.items() if column[row])
+            try:
+                result[row] = self.evaluator.evaluate(phi, failed)
+            except EvaluationLimitExceeded:
+                result[row] = self.solve(phi, failed)
+        return result
+
+    def solve(self, phi: Tree, failed: frozenset[str]) -> bool:
+        """Checks a vector that is too large for `Evaluator` with z3, like
+        `check_model`. The solver of every formula is built once."""
+        if id(phi) not in self.solvers:
+            formula = build_formula(phi, self.fault_tree,
+                                    substitute_evidence=True)
+            _, definitions = get_definitions(formula, self.fault_tree)
+            s = Solver()
+            s.add(formula, *definitions)
+            self.solvers[id(phi)] = s
+        return self.solvers[id(phi)].check(
+            *(Bool(be) if be in failed else Not(Bool(be))
+              for be in self.basic_events)) == sat
+
+    def cone(self, phi: Tree) -> set[str]:
+        """Returns the basic events below the events in `phi`, or all basic
+        events if `phi` contains `\\mcs` or `\\mps`, which depend on every
+        basic event."""
+        if any(phi.find_pred(lambda t: t.data in ('mcs', 'mps'))):
+            return set(self.basic_events)
+        events = [str(token) for token in phi.scan_values(
+            lambda v: isinstance(v, Token) and v.type in ('EVENT_NAME',
+                                                          'BASIC_EVENT'))]
+        cone = set()
+        visited = set()
+        stack = [event for event in events if event in self.fault_tree.nodes]
+        while stack:
+            event = stack.pop()
+            if event in visited:
+                continue
+            visited.add(event)
+            children = list(self.fault_tree.predecessors(event))
+            if not children:
+                cone.add(event)
+            stack.extend(children)
+        return cone
+
+
+def read_csv(file: TextIO, fault_tree: FaultTree,
+             rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Reads status vectors from a CSV file whose header names basic events,
+    with a 0 or 1 per basic event in every row. Basic events without a
+    column are operational, like basic events that are not listed in a
+    `|=` statement. The vectors are yielded in chunks of at most `rows`
+    rows, so only one chunk of the file is held in memory.
+    """
+    header = next(csv.reader([file.readline()]), [])
+    indices = {be: i for i, be in enumerate(fault_tree.get_basic_events())}
+    for name in header:
+        if name.strip() not in indices:
+            raise BFLError(f'Unknown basic event `{name.strip()}` in CSV '
+                           f'header')
+    columns = [indices[name.strip()] for name in header]
+
+    while lines := list(islice(file, rows)):
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            continue
+        try:
+            values = np.loadtxt(lines, delimiter=',', dtype=np.uint8,
+                                ndmin=2)
+        except ValueError as e:
+            raise BFLError(f'Cannot read status vectors from CSV: {e}')
+        if values.shape[1] != len(header):
+            raise BFLError('CSV rows need one value per column of the header')
+        if values.max() > 1:
+            raise BFLError('CSV values must be 0 or 1')
+        vectors = np.zeros((len(values), len(indices)), dtype=bool)
+        vectors[:, columns] = values
+        yield vectors
+
+
+def load_vectors(path: str, fault_tree: FaultTree) -> Iterator[np.ndarray]:
+    """Yields the status vectors of a CSV file in chunks, see `read_csv`, or
+    memory-maps them from a `.npy` file with one column per basic event."""
+    if os.path.splitext(path)[1] == '.npy':
+        yield np.load(path, mmap_mode='r')
+        return
+    with open(path, newline='') as f:
+        yield from read_csv(f, fault_tree)
+
+
+def check_vectors(phi: Tree, fault_tree: FaultTree,
+                  vectors: np.ndarray | Iterable[np.ndarray]) -> np.ndarray:
+    """Returns whether each row of `vectors`, or of each of its chunks,
+    satisfies `phi`, see `BulkEvaluator.evaluate`."""
+    evaluator = BulkEvaluator(fault_tree)
+    if isinstance(vectors, np.ndarray):
+        return evaluator.evaluate(phi, vectors)
+    results = [evaluator.evaluate(phi, chunk) for chunk in vectors]
+    return np.concatenate(results) if results else np.zeros(0, dtype=bool)
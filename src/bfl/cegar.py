@@ -0,0 +1,294 @@
+from dataclasses import dataclass
+from typing import Iterator
+
+from lark import Tree
+from lark.exceptions import VisitError
+from z3 import Solver, Bool, BoolRef, And, Or, Not, Implies, FuncDeclRef, \
+    ModelRef, sat, is_true, substitute, BoolVal, AtMost
+
+from bfl.build_bfl import BflTransformer, Encoding, get_definitions, \
+    negate_atoms, PRIME_PREFIX
+from bfl.closest_vector import count_true, keep_earliest
+from bfl.exceptions import BFLError
+from bfl.minimal_vectors import failed_events, shrink
+from galileo.fault_tree import FaultTree
+from utils.get_vars import get_vars
+from utils.list_to_tuple import list_to_tuple
+from utils.memoize_method import memoize_method
+
+# Prefix of the variables that stand for `\mcs` and `\mps` subformulas. Like
+# `PRIME_PREFIX`, it cannot occur in event names.
+MINIMAL_PREFIX = '#'
+
+
+def has_minimal_operators(phi: Tree) -> bool:
+    return any(subtree.data in ('mcs', 'mps')
+               for subtree in phi.iter_subtrees())
+
+
+def is_two_level(phi: Tree, encoding: Encoding = 'inline') -> bool:
+    """
+    Returns whether the formula of `phi` is an ∃∀ problem that
+    `MinimalityProblem` can solve: the arguments of `\\mcs` and `\\mps` do
+    not contain these operators again, and evidence can be substituted
+    everywhere. Evidence outside of a `\\mcs` or `\\mps` would have to be
+    substituted into its argument, and evidence with the Tseitin encoding
+    is quantified, so both are not supported.
+    """
+    for subtree in phi.iter_subtrees():
+        if subtree.data in ('mcs', 'mps') \
+                and has_minimal_operators(subtree.children[0]):
+            return False
+        if subtree.data == 'with_evidence' and (
+                encoding == 'tseitin' or has_minimal_operators(subtree)):
+            return False
+    return True
+
+
+@dataclass
+class MinimalAtom:
+    """
+    A `\\mcs` subformula, which holds iff the status vector is a minimal one
+    that satisfies the quantifier-free `formula`. `\\mps` subformulas are
+    turned into `\\mcs` subformulas of the negated formula with negated
+    atoms. `cone` contains the basic events `formula` depends on, all other
+    basic events are false in a minimal vector.
+    """
+    indicator: BoolRef
+    formula: BoolRef
+    cone: list[BoolRef]
+    tseitin_vars: list[BoolRef]
+    definitions: list[BoolRef]
+
+
+# noinspection PyMethodMayBeStatic
+class CegarTransformer(BflTransformer):
+    """
+    Builds the formula of a two-level BFL formula, in which every `\\mcs` and
+    `\\mps` subformula is replaced by the indicator variable of a
+    `MinimalAtom`. Evidence is substituted.
+    """
+
+    def __init__(self, fault_tree: FaultTree, encoding: Encoding = 'inline'):
+        super().__init__(fault_tree, encoding, substitute_evidence=True)
+        self.atoms: list[MinimalAtom] = []
+
+    @list_to_tuple
+    @memoize_method
+    def mcs(self, args):
+        return self.atom(args[0])
+
+    @list_to_tuple
+    @memoize_method
+    def mps(self, args):
+        return self.atom(negate_atoms(Not(args[0]), self.fault_tree))
+
+    def atom(self, formula: BoolRef) -> BoolRef:
+        tseitin_vars, definitions = get_definitions(formula, self.fault_tree)
+        bes = self.fault_tree.get_basic_events_set()
+        cone = [v for v in get_vars(And(formula, *definitions))
+                if v.decl().name() in bes]
+        indicator = Bool(f'{MINIMAL_PREFIX}{len(self.atoms)}')
+        self.atoms.append(MinimalAtom(indicator, formula, cone, tseitin_vars,
+                                      definitions))
+        return indicator
+
+
+class MinimalityProblem:
+    """
+    Solves `formula`, whose `\\mcs` and `\\mps` subformulas are replaced by
+    the indicators of `atoms`, with counterexample-guided abstraction
+    refinement (CEGAR) on two levels of incremental SAT solvers.
+
+    The abstraction solver knows that an indicator implies its formula, and
+    that a false indicator has a witness: its formula is false, or holds for
+    a strictly smaller vector, which is given by a copy of the cone. It does
+    not know that a true indicator has no such smaller vector. Whenever a
+    candidate sets an indicator, the atom's own solver looks for a smaller
+    vector. If there is one, it is shrunk to a minimal vector `y`, and the
+    abstraction learns that the indicator excludes all strict supersets of
+    `y`. The learned clauses hold for every vector, so they are kept for all
+    later checks.
+    """
+
+    def __init__(self, formula: BoolRef, atoms: list[MinimalAtom],
+                 fault_tree: FaultTree):
+        self.atoms = atoms
+        self.basic_events = fault_tree.get_basic_events_bools()
+        self.abstraction = Solver()
+        _, definitions = get_definitions(formula, fault_tree)
+        self.abstraction.add(formula, *definitions)
+        self.verifiers = []
+        self.bounds: list[BoolRef] = []
+        for i, atom in enumerate(atoms):
+            self.abstraction.add(*atom.definitions,
+                                 *self.encode(i, atom, fault_tree))
+            verifier = Solver()
+            verifier.add(atom.formula, *atom.definitions)
+            self.verifiers.append(verifier)
+
+    def encode(self, i: int, atom: MinimalAtom,
+               fault_tree: FaultTree) -> list[BoolRef]:
+        cone = {be.decl().name() for be in atom.cone}
+        outside = [Bool(be) for be in fault_tree.get_basic_events()
+                   if be not in cone]
+        # The copies of the cone and the Tseitin variables describe the
+        # smaller vector that witnesses that the indicator is false.
+        copies = [(v, Bool(f'{PRIME_PREFIX}{i}.{v.decl().name()}'))
+                  for v in atom.cone + atom.tseitin_vars]
+        primes = [p for _, p in copies[:len(atom.cone)]]
+        smaller = And(
+            *(Implies(p, be) for be, p in zip(atom.cone, primes)),
+            Or(*(p != be for be, p in zip(atom.cone, primes))),
+            substitute(And(atom.formula, *atom.definitions), *copies)) \
+            if atom.cone else BoolVal(False)
+        return [Implies(atom.indicator, And(atom.formula, *map(Not, outside))),
+                Implies(Not(atom.indicator),
+                        Or(Not(atom.formula), *outside, smaller))]
+
+    def check(self, *assumptions: BoolRef) -> ModelRef | None:
+        """Returns a model of the formula and `assumptions`, or `None` if
+        there is none."""
+        while self.abstraction.check(*assumptions) == sat:
+            model = self.abstraction.model()
+            # `refine` has to run for every atom, so `any` cannot be used.
+            refined = [self.refine(atom, verifier, model) for atom, verifier
+                       in zip(self.atoms, self.verifiers)]
+            if not any(refined):
+                return model
+        return None
+
+    def refine(self, atom: MinimalAtom, verifier: Solver,
+               model: ModelRef) -> bool:
+        """
+        Checks that the vector of `model` is minimal for `atom` if the atom's
+        indicator is set, and teaches the abstraction solver why not.
+        Returns whether it learned something.
+        """
+        if not is_true(model.eval(atom.indicator, model_completion=True)):
+            return False
+        failed = failed_events(model, atom.cone)
+        if not failed:
+            return False
+        failed_ids = {be.get_id() for be in failed}
+        verifier.push()
+        verifier.add(*(Not(be) for be in atom.cone
+                       if be.get_id() not in failed_ids))
+        verifier.add(Or(*(Not(be) for be in failed)))
+        smaller = None
+        if verifier.check() == sat:
+            smaller = failed_events(verifier.model(), failed)
+        verifier.pop()
+        if smaller is None:
+            return False
+
+        minimal = shrink(verifier, atom.cone, smaller)
+        minimal_ids = {be.get_id() for be in minimal}
+        self.abstraction.add(Implies(
+            And(atom.indicator, *minimal),
+            And(*(Not(be) for be in atom.cone
+                  if be.get_id() not in minimal_ids))))
+        return True
+
+    def failed(self, model: ModelRef) -> frozenset[FuncDeclRef]:
+        return frozenset(be.decl() for be in
+                         failed_events(model, self.basic_events))
+
+    def vectors(self) -> Iterator[frozenset[FuncDeclRef]]:
+        """
+        Yields all status vectors that satisfy the formula. Like
+        `all_models`, the search is split by the first basic event in which
+        a vector differs from a previous one, but the splits are given to
+        `check` as assumptions instead of solver scopes, so that no learned
+        clauses are lost.
+        """
+        model = self.check()
+        if model is None:
+            return
+        yield self.failed(model)
+
+        # Every frame `(values, prefix, start, i)` continues the search for
+        # vectors that satisfy `prefix` and differ from `values` in the basic
+        # events from `start` on, at the `i`th one.
+        stack = [(self.values(model), [], 0, 0)]
+        while stack:
+            values, prefix, start, i = stack.pop()
+            if start + i >= len(self.basic_events):
+                continue
+            stack.append((values, prefix, start, i + 1))
+
+            assumptions = prefix + [
+                self.literal(j, values[j]) for j in range(start, start + i)]
+            assumptions.append(
+                self.literal(start + i, not values[start + i]))
+            model = self.check(*assumptions)
+            if model is not None:
+                yield self.failed(model)
+                stack.append((self.values(model), assumptions, start + i + 1,
+                              0))
+
+    def values(self, model: ModelRef) -> list[bool]:
+        return [is_true(model.eval(be, model_completion=True))
+                for be in self.basic_events]
+
+    def literal(self, i: int, value: bool) -> BoolRef:
+        be = self.basic_events[i]
+        return be if value else Not(be)
+
+    def closest(self, literals: list[BoolRef]) \
+            -> frozenset[FuncDeclRef] | None:
+        """
+        Returns the status vector that satisfies the formula and violates as
+        few of `literals` as possible, and of those the one that keeps the
+        earliest literals, or `None` if the formula is unsatisfiable. The
+        number of violated literals is minimized by a binary search, in
+        which every bound is an `AtMost` constraint that is only enabled by
+        the assumption of its own variable, so that the abstraction keeps
+        everything it learns.
+        """
+        model = self.check()
+        if model is None:
+            return None
+        changes = [Not(literal) for literal in literals]
+        low, distance = 0, count_true(model, changes)
+        bound = self.at_most(changes, distance)
+        while low < distance:
+            middle = (low + distance) // 2
+            candidate = self.check(self.at_most(changes, middle))
+            if candidate is None:
+                low = middle + 1
+            else:
+                model = candidate
+                distance = count_true(model, changes)
+                bound = self.at_most(changes, distance)
+        model = keep_earliest(lambda *assumptions: self.check(
+            bound, *assumptions), literals, model)
+        return self.failed(model)
+
+    def at_most(self, literals: list[BoolRef], k: int) -> BoolRef:
+        """Returns a new variable that enables `AtMost(*literals, k)` when it
+        is assumed."""
+        bound = Bool(f'{MINIMAL_PREFIX}at_most{len(self.bounds)}')
+        self.bounds.append(bound)
+        self.abstraction.add(Implies(bound, AtMost(*literals, k)))
+        return bound
+
+
+def minimality_problem(phi: Tree, fault_tree: FaultTree,
+                       encoding: Encoding = 'inline',
+                       negate=False) -> MinimalityProblem | None:
+    """
+    Returns the `MinimalityProblem` of `phi`, or of its negation if `negate`
+    is set, or `None` if `phi` is not a two-level formula.
+    """
+    if not is_two_level(phi, encoding):
+        return None
+    transformer = CegarTransformer(fault_tree, encoding)
+    try:
+        formula = transformer.transform(phi)
+    except VisitError as e:
+        if isinstance(e.orig_exc, BFLError):
+            raise e.orig_exc
+        raise e
+    return MinimalityProblem(Not(formula) if negate else formula,
+                             transformer.atoms, fault_tree)
@@ -0,0 +1,29 @@
+from typing import Callable
+
+from z3 import BoolRef, ModelRef, Not, is_true
+
+
+def count_true(model: ModelRef, formulas: list[BoolRef]) -> int:
+    return sum(is_true(model.eval(f, model_completion=True))
+               for f in formulas)
+
+
+def keep_earliest(check: Callable[..., ModelRef | None],
+                  literals: list[BoolRef], model: ModelRef) -> ModelRef:
+    """
+    Returns the model that keeps the earliest of `literals`, among all
+    models that `check` returns under assumptions. `model` is one of them.
+    Solvers break ties between equally good models differently depending on
+    what they solved before, so this makes counterexamples deterministic.
+    Only literals that the current model violates need a call of `check`.
+    """
+    fixed = []
+    for literal in literals:
+        if not is_true(model.eval(literal, model_completion=True)):
+            candidate = check(*fixed, literal)
+            if candidate is None:
+                literal = Not(literal)
+            else:
+                model = candidate
+        fixed.append(literal)
+    return model
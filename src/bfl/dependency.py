@@ -0,0 +1,51 @@
+from z3 import Solver, FreshBool, BoolRef, And, Implies, Not, substitute, sat
+
+from bfl.build_bfl import get_definitions
+from galileo.fault_tree import FaultTree
+from utils.get_vars import get_vars
+
+
+class DependencyChecker:
+    """
+    Decides which variables `formula` depends on, i.e., for which variables
+    `v` there is a status vector where changing `v` changes `formula`.
+
+    The formula is encoded once, against a copy of itself with fresh
+    variables: `formula != copy`. Each variable is linked to its copy by an
+    implication with a selector literal. To check `v`, all selectors except
+    the one of `v` are assumed, so only `v` may differ between both sides.
+    All checks therefore share one solver, and what it learns.
+    """
+
+    def __init__(self, formula: BoolRef, fault_tree: FaultTree):
+        tseitin_vars, definitions = get_definitions(formula, fault_tree)
+        tseitin_ids = {v.get_id() for v in tseitin_vars}
+        variables = [v for v in get_vars(And(formula, *definitions))
+                     if v.get_id() not in tseitin_ids]
+        copies = [(v, FreshBool(v.decl().name()))
+                  for v in variables + tseitin_vars]
+
+        self.solver = Solver()
+        self.solver.add(*definitions)
+        self.solver.add(*(substitute(d, *copies) for d in definitions))
+        self.solver.add(formula != substitute(formula, *copies))
+
+        # Maps the ID of each variable to its selector and copy
+        self.links: dict[int, tuple[BoolRef, BoolRef]] = {}
+        for v, copy in copies[:len(variables)]:
+            selector = FreshBool('same')
+            self.solver.add(Implies(selector, v == copy))
+            self.links[v.get_id()] = (selector, copy)
+        self.results: dict[int, bool] = {}
+
+    def depends_on(self, var: BoolRef) -> bool:
+        key = var.get_id()
+        if key not in self.links:
+            return False
+        if key not in self.results:
+            _, copy = self.links[key]
+            assumptions = [selector for other, (selector, _)
+                           in self.links.items() if other != key]
+            self.results[key] = self.solver.check(
+                *assumptions, var, Not(copy)) == sat
+        return self.results[key]
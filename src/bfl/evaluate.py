@@ -0,0 +1,200 @@
+from itertools import combinations
+
+from lark import Tree, Token
+
+from bfl.exceptions import BFLError
+from galileo.fault_tree import FaultTree
+from gates import Gate, compare
+
+# Non-monotone arguments of `\mcs` and `\mps` are checked against every
+# smaller vector, so vectors with more failed basic events than this are left
+# to the solver.
+MAX_SUBSET_EVENTS = 12
+
+
+class EvaluationLimitExceeded(Exception):
+    pass
+
+
+class Evaluator:
+    """
+    Evaluates BFL formulas on concrete status vectors, given as the set of
+    failed basic events, without a solver. Intermediate events are evaluated
+    bottom-up over the fault tree. A status vector is minimal for the
+    argument of `\\mcs` if no strictly smaller vector satisfies it. If the
+    argument is monotone, it suffices to repair one failed event at a time,
+    otherwise all smaller vectors are evaluated, which raises
+    `EvaluationLimitExceeded` for more than `MAX_SUBSET_EVENTS` failed
+    events. `\\mps` is `\\mcs` of the negated argument on the complement of
+    the vector, like in `BflTransformer.mps`.
+    """
+
+    def __init__(self, fault_tree: FaultTree):
+        self.fault_tree = fault_tree
+        self.basic_events = fault_tree.get_basic_events_set()
+        self.monotone_events: dict[str, bool] = {}
+
+    def evaluate(self, phi: Tree, failed: frozenset[str]) -> bool:
+        return self.value(phi, failed, {})
+
+    def value(self, phi: Tree, failed: frozenset[str],
+              events: dict[str, bool]) -> bool:
+        """Returns the value of `phi` if exactly the basic events in `failed`
+        hold. `events` caches the values of events for `failed`."""
+        args = phi.children
+        match phi.data:
+            case 'event':
+                return self.event(args[0], failed, events)
+            case 'neg':
+                return not self.value(args[0], failed, events)
+            case 'and_':
+                return all(self.value(arg, failed, events) for arg in args)
+            case 'or_':
+                return any(self.value(arg, failed, events) for arg in args)
+            case 'implies':
+                return not self.value(args[0], failed, events) \
+                    or self.value(args[1], failed, events)
+            case 'equiv':
+                return self.value(args[0], failed, events) \
+                    == self.value(args[1], failed, events)
+            case 'nequiv':
+                return self.value(args[0], failed, events) \
+                    != self.value(args[1], failed, events)
+            case 'vot':
+                comp, k, basic_events = args
+                return compare(sum(self.event(token, failed, events)
+                                   for token in basic_events.children),
+                               comp.value, int(k))
+            case 'with_evidence':
+                return self.with_evidence(args[0], args[1], failed)
+            case 'mcs':
+                return self.minimal(args[0], failed, negate=False)
+            case 'mps':
+                return self.minimal(args[0], failed, negate=True)
+        raise ValueError(f'Unknown operator `{phi.data}`')
+
+    def event(self, event: Token | str, failed: frozenset[str],
+              events: dict[str, bool]) -> bool:
+        """
+        Returns the value of `event`. The values of all events below it are
+        computed bottom-up first, visiting them in post-order with an
+        explicit stack.
+        """
+        event = str(event)
+        if event not in self.fault_tree.nodes:
+            raise BFLError(f'Unknown event `{event}`')
+
+        stack = [(event, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if current in events:
+                continue
+
+            # noinspection PyCallingNonCallable
+            if self.fault_tree.in_degree(current) == 0:  # basic event
+                events[current] = current in failed
+                continue
+
+            children = list(self.fault_tree.predecessors(current))
+            if children_done:
+                gate: Gate = self.fault_tree.nodes[current]['gate']
+                events[current] = gate.evaluate(*(events[c]
+                                                  for c in children))
+            else:
+                stack.append((current, True))
+                stack.extend((c, False) for c in children if c not in events)
+
+        return events[event]
+
+    def with_evidence(self, phi: Tree, evidence: Tree,
+                      failed: frozenset[str]) -> bool:
+        values = {}
+        for mapping in evidence.children:
+            be, value = mapping.children[0].value, mapping.children[1] == '1'
+            if values.setdefault(be, value) != value:
+                # No status vector satisfies contradicting evidence.
+                return True
+        # Like in the inline encoding, evidence on intermediate events has no
+        # effect.
+        failed = failed.difference(values).union(
+            be for be, value in values.items()
+            if value and be in self.basic_events)
+        return self.value(phi, failed, {})
+
+    def minimal(self, phi: Tree, failed: frozenset[str],
+                negate: bool) -> bool:
+        """
+        Returns whether `failed` is a minimal vector that satisfies `phi`,
+        or, if `negate` is set, a minimal vector whose complement does not
+        satisfy `phi`.
+        """
+        def holds(vector: frozenset[str]) -> bool:
+            if negate:
+                return not self.value(phi, self.basic_events - vector, {})
+            return self.value(phi, vector, {})
+
+        if not holds(failed):
+            return False
+        # This also finds failed events that `phi` does not depend on.
+        if any(holds(failed - {be}) for be in failed):
+            return False
+        if self.is_monotone(phi):
+            return True
+
+        if len(failed) > MAX_SUBSET_EVENTS:
+            raise EvaluationLimitExceeded(
+                f'Minimality of {len(failed)} failed events needs the '
+                f'solver')
+        return not any(holds(frozenset(smaller))
+                       for size in range(len(failed) - 1)
+                       for smaller in combinations(sorted(failed), size))
+
+    def is_monotone(self, phi: Tree, positive: bool = True) -> bool:
+        """
+        Returns whether `phi` cannot become false when more basic events
+        fail, or, if `positive` is not set, cannot become true. `\\mcs` and
+        `\\mps` are never monotone.
+        """
+        args = phi.children
+        match phi.data:
+            case 'event':
+                return positive and self.is_monotone_event(str(args[0]))
+            case 'neg':
+                return self.is_monotone(args[0], not positive)
+            case 'and_' | 'or_':
+                return all(self.is_monotone(arg, positive) for arg in args)
+            case 'implies':
+                return self.is_monotone(args[0], not positive) \
+                    and self.is_monotone(args[1], positive)
+            case 'vot':
+                comp, _, basic_events = args
+                increasing = comp.value in ('>=', '>')
+                if comp.value == '==' or increasing != positive:
+                    return False
+                return all(self.is_monotone_event(str(token))
+                           for token in basic_events.children)
+            case 'with_evidence':
+                return self.is_monotone(args[0], positive)
+        return False
+
+    def is_monotone_event(self, event: str) -> bool:
+        """Returns whether all gates below `event` are monotone. Unknown
+        events are reported when they are evaluated."""
+        if event in self.monotone_events:
+            return self.monotone_events[event]
+        monotone = True
+        visited = set()
+        stack = [event] if event in self.fault_tree.nodes else []
+        while stack and monotone:
+            current = stack.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            # noinspection PyCallingNonCallable
+            if self.fault_tree.in_degree(current) == 0:
+                continue
+            gate: Gate = self.fault_tree.nodes[current]['gate']
+            monotone = gate.is_monotone()
+            stack.extend(self.fault_tree.predecessors(current))
+        self.monotone_events[event] = monotone
+        return monotone
@@ -1,17 +1,44 @@
-from typing import Iterable
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from time import perf_counter
+from typing import AbstractSet, Iterator, Callable
 
 from lark import Tree
 from lark.reconstruct import Reconstructor
 from z3 import Solver, sat, And, Bool, Not, ModelRef, is_true, BoolRef, \
-    substitute, BoolVal, unsat
-
-from bfl.build_bfl import build_formula, event_to_formula
+    unsat, FuncDeclRef, Optimize, AtMost
+
+from bdd import NodeLimitExceeded
+from bfl.backend import Backend, BackendName
+from bfl.bdd_backend import BddBackend
+from bfl.build_bfl import build_formula, build_event_formula, Encoding, \
+    get_definitions, negate_atoms, close_exists, close_forall
+from bfl.cegar import MinimalityProblem, has_minimal_operators, \
+    minimality_problem
+from bfl.closest_vector import count_true, keep_earliest
+from bfl.dependency import DependencyChecker
+from bfl.evaluate import Evaluator, EvaluationLimitExceeded
+from bfl.exhaustive import is_exhaustive, exhaustive_vectors, \
+    exhaustive_count
 from bfl.exceptions import BFLError
+from bfl.incremental_solver import IncrementalSolver
+from bfl.minimal_vectors import minimal_vectors
+from bfl.model_count import count_models, is_quantifier_free
+from bfl.planner import Planner, TimingStats, default_stats_path, \
+    query_features, strategies
+from bfl.result_cache import ResultCache, fault_tree_hash, result_key
+from bfl.satisfaction_stream import StreamOptions, write_vectors
+from bfl.superfluous import superfluous_events
+from galileo.compact_fault_tree import CompactFaultTree
 from galileo.fault_tree import FaultTree
 from parser.parser import parser
 from utils.all_models import all_models
 from utils.get_vars import get_vars
 
+logger = logging.getLogger(__name__)
+
 
 def get_bfl_tree(parse_tree: Tree):
     if parse_tree.data == 'bfl':
@@ -36,148 +63,592 @@ def reconstruct(parse_tree: Tree):
     return Reconstructor(parser, terminals).reconstruct(parse_tree)
 
 
-def quantified_statement(parse_tree: Tree, fault_tree: FaultTree):
+def quantified_statement(parse_tree: Tree, fault_tree: FaultTree,
+                         encoding: Encoding = 'inline',
+                         solver: IncrementalSolver | None = None):
+    """
+    Decides `\\exists phi` or `\\forall phi`. If `phi` is quantifier-free
+    once its evidence is substituted, this is SAT(phi) or UNSAT(!phi), which
+    is checked with `solver`. If its `\\mcs` and `\\mps` subformulas are not
+    nested, it is solved as a `MinimalityProblem`. Only the remaining
+    formulas are closed by the quantifier and solved as a QBF.
+    """
     assert parse_tree.data == 'forall' or parse_tree.data == 'exists'
+    exists = parse_tree.data == 'exists'
+    phi = parse_tree.children[0]
+    minimal = has_minimal_operators(phi)
+    if minimal:
+        problem = minimality_problem(phi, fault_tree, encoding,
+                                     negate=not exists)
+        if problem is not None:
+            return (problem.check() is not None) == exists
+
+    formula = build_formula(phi, fault_tree, encoding,
+                            substitute_evidence=True)
+    if is_quantifier_free_phi(phi, formula, encoding):
+        solver = solver or IncrementalSolver(fault_tree)
+        if exists:
+            return solver.check(formula) == sat
+        return solver.check(Not(formula)) == unsat
+
     s = Solver()
-    s.add(build_formula(parse_tree, fault_tree))
+    s.add(close_exists(formula, fault_tree) if exists
+          else close_forall(formula, fault_tree))
     return s.check() == sat
 
 
-def sup_statement(parse_tree: Tree, fault_tree: FaultTree):
-    formula = build_formula(parse_tree.children[0], fault_tree)
-    root_formula = event_to_formula(fault_tree.get_root(), fault_tree)
-    return are_formulas_independent(formula, root_formula)
+def sup_statement(parse_tree: Tree, fault_tree: FaultTree,
+                  encoding: Encoding = 'inline'):
+    formula = build_formula(parse_tree.children[0], fault_tree, encoding)
+    root_formula = build_event_formula(fault_tree.get_root(), fault_tree,
+                                       encoding)
+    return are_formulas_independent(formula, root_formula, fault_tree)
 
 
-def get_dependent_variables(formula: BoolRef,
-                            check_vars: Iterable[BoolRef]) -> set[BoolRef]:
-    result = set()
-
-    for var in check_vars:
-        s = Solver()
-        s.add(substitute(formula, (var, BoolVal(True)))
-              != substitute(formula, (var, BoolVal(False))))
-        if s.check() == sat:
-            result.add(var)
-
-    return result
+def idp_statement(parse_tree: Tree, fault_tree: FaultTree,
+                  encoding: Encoding = 'inline'):
+    assert parse_tree.data == 'idp'
+    formula1 = build_formula(parse_tree.children[0], fault_tree, encoding)
+    formula2 = build_formula(parse_tree.children[1], fault_tree, encoding)
+    return are_formulas_independent(formula1, formula2, fault_tree)
 
 
-def idp_statement(parse_tree: Tree, fault_tree: FaultTree):
-    assert parse_tree.data == 'idp'
-    formula1 = build_formula(parse_tree.children[0], fault_tree)
-    formula2 = build_formula(parse_tree.children[1], fault_tree)
-    return are_formulas_independent(formula1, formula2)
+def get_basic_event_vars(formula: BoolRef,
+                         fault_tree: FaultTree) -> set[BoolRef]:
+    tseitin_vars, definitions = get_definitions(formula, fault_tree)
+    return set(get_vars(And(formula, *definitions))) - set(tseitin_vars)
 
 
-def are_formulas_independent(formula1, formula2):
-    vars1 = set(get_vars(formula1))
-    vars2 = set(get_vars(formula2))
+def are_formulas_independent(formula1, formula2, fault_tree: FaultTree):
+    vars1 = get_basic_event_vars(formula1, fault_tree)
+    vars2 = get_basic_event_vars(formula2, fault_tree)
     intersection = vars1.intersection(vars2)
+    if not intersection:
+        return True
 
-    dvars1 = get_dependent_variables(formula1, intersection)
-    dvars2 = get_dependent_variables(formula2, intersection)
-    return dvars1.isdisjoint(dvars2)
+    # The formulas are dependent as soon as one variable influences both.
+    checker1 = DependencyChecker(formula1, fault_tree)
+    checker2 = DependencyChecker(formula2, fault_tree)
+    return not any(checker1.depends_on(var) and checker2.depends_on(var)
+                   for var in intersection)
 
 
-def get_status_vector(parse_tree: Tree, fault_tree: FaultTree):
+def status_vector_literals(parse_tree: Tree,
+                           fault_tree: FaultTree) -> list[BoolRef]:
+    """Returns the value of every basic event in the status vector
+    `parse_tree` as a literal, in the order of the basic events of
+    `fault_tree`."""
     assert parse_tree.data == 'basic_events'
     bes_in_sv = {token.value for token in parse_tree.children}
-    all_bes = fault_tree.get_basic_events_set()
-    if not bes_in_sv.issubset(all_bes):
+    if not bes_in_sv.issubset(fault_tree.get_basic_events_set()):
         raise BFLError(
             'Status vector can only contain basic events')
-    bes_not_in_sv = all_bes - bes_in_sv
-    return And(*(map(Bool, bes_in_sv)), *(Not(Bool(b)) for b in bes_not_in_sv))
-
-
-def generate_counterexample(status_vector: BoolRef, formula: BoolRef):
+    return [Bool(be) if be in bes_in_sv else Not(Bool(be))
+            for be in fault_tree.get_basic_events()]
+
+
+def generate_counterexample(literals: list[BoolRef], formula: BoolRef,
+                            fault_tree: FaultTree,
+                            quantifier_free: bool = True):
+    """
+    Returns the status vector that satisfies `formula` and differs from the
+    status vector of `literals` in as few basic events as possible, and of
+    those the one that keeps the earliest basic events. z3's MaxSAT solver
+    `Optimize` finds the smallest distance by keeping as many `literals` as
+    possible, but it does not support quantifiers. Quantified formulas are
+    solved by a binary search on the distance instead, with one solver call
+    per step.
+    """
     s = Solver()
     s.add(formula)
     if s.check() == unsat:
         raise BFLError('Cannot generate counterexample for unsatisfiable '
                        'formula')
-    counterexample = []
-    for truth_val in status_vector.children():
-        # Note: the order of `children()` can differ between different instances
-        # of the same `status_vector`, and the result of this function can be
-        # different based on this order.
-        s.push()
-
-        s.add(truth_val)
-        if s.check() == unsat:
-            counterexample.append(Not(truth_val))
-            s.pop()
-            s.add(Not(truth_val))
-            assert s.check() == sat
-        else:
-            counterexample.append(truth_val)
-
-    # `s2` is just used to generate proper input for `get_true_events`
-    s2 = Solver()
-    s2.add(And(*counterexample))
-    s2.check()
-    return get_true_events(s2.model())
-
-
-def check_model(parse_tree: Tree, fault_tree: FaultTree):
+    changes = [Not(literal) for literal in literals]
+    if quantifier_free:
+        o = Optimize()
+        o.add(formula)
+        for literal in literals:
+            o.add_soft(literal)
+        o.check()
+        model = o.model()
+        distance = count_true(model, changes)
+    else:
+        model = s.model()
+        low, distance = 0, count_true(model, changes)
+        while low < distance:
+            middle = (low + distance) // 2
+            if s.check(AtMost(*changes, middle)) == sat:
+                model = s.model()
+                distance = count_true(model, changes)
+            else:
+                low = middle + 1
+
+    s.add(AtMost(*changes, distance))
+    model = keep_earliest(
+        lambda *assumptions: s.model() if s.check(*assumptions) == sat
+        else None, literals, model)
+    return get_true_events(model, fault_tree.get_basic_events_set())
+
+
+def is_quantifier_free_phi(phi: Tree, formula: BoolRef,
+                           encoding: Encoding) -> bool:
+    """
+    Returns whether the `formula` of `phi`, built with substituted evidence,
+    is quantifier-free. Inline formulas can be huge, so they are not
+    traversed: their only quantifiers come from `\\mcs` and `\\mps`.
+    Tseitin formulas also quantify over the evidence, but they are small.
+    """
+    return not has_minimal_operators(phi) and (
+            encoding == 'inline' or is_quantifier_free(formula))
+
+
+def check_model(parse_tree: Tree, fault_tree: FaultTree,
+                encoding: Encoding = 'inline'):
+    """
+    Returns `True` if the status vector satisfies the formula, and the
+    closest status vector that does otherwise. The status vector is
+    evaluated without a solver, which is only needed for the counterexample.
+    If the evaluation is too expensive, the status vector is checked under
+    assumptions instead, so the solver does not have to be rebuilt for the
+    counterexample.
+    """
     assert parse_tree.data == 'check_model'
-    status_vector = get_status_vector(parse_tree.children[0], fault_tree)
-    formula = build_formula(parse_tree.children[1], fault_tree)
-    s = Solver()
-    s.add(formula)
-    s.add(status_vector)
-    if s.check() == sat:
+    literals = status_vector_literals(parse_tree.children[0], fault_tree)
+    phi = parse_tree.children[1]
+    failed = frozenset(token.value
+                       for token in parse_tree.children[0].children)
+    try:
+        if Evaluator(fault_tree).evaluate(phi, failed):
+            return True
+        evaluated = True
+    except EvaluationLimitExceeded:
+        evaluated = False
+
+    if has_minimal_operators(phi):
+        problem = minimality_problem(phi, fault_tree, encoding)
+        if problem is not None:
+            return check_minimality_model(literals, problem, evaluated)
+    formula = build_formula(phi, fault_tree, encoding,
+                            substitute_evidence=True)
+    _, definitions = get_definitions(formula, fault_tree)
+    if definitions:
+        formula = And(formula, *definitions)
+    if not evaluated:
+        s = Solver()
+        s.add(formula)
+        if s.check(*literals) == sat:
+            return True
+    return generate_counterexample(
+        literals, formula, fault_tree,
+        is_quantifier_free_phi(phi, formula, encoding))
+
+
+def check_minimality_model(literals: list[BoolRef],
+                           problem: MinimalityProblem, evaluated=False):
+    """Like `check_model`, for formulas that are solved as
+    `MinimalityProblem`s. If `evaluated` is set, the status vector is known
+    not to satisfy the formula."""
+    if not evaluated and problem.check(*literals) is not None:
         return True
-    else:
-        return generate_counterexample(status_vector, formula)
-
-
-def get_true_events(model: ModelRef):
-    return frozenset((e for e in model.decls() if is_true(model[e])))
-
-
-def satisfaction_set(parse_tree: Tree, fault_tree: FaultTree):
-    formula = build_formula(parse_tree.children[0], fault_tree)
+    counterexample = problem.closest(literals)
+    if counterexample is None:
+        raise BFLError('Cannot generate counterexample for unsatisfiable '
+                       'formula')
+    return counterexample
+
+
+def get_true_events(model: ModelRef, events: AbstractSet[str] | None = None):
+    return frozenset((e for e in model.decls() if is_true(model[e])
+                      and (events is None or e.name() in events)))
+
+
+def satisfaction_set(parse_tree: Tree, fault_tree: FaultTree,
+                     encoding: Encoding = 'inline'):
+    return set(satisfaction_vectors(parse_tree, fault_tree, encoding))
+
+
+def satisfaction_vectors(parse_tree: Tree, fault_tree: FaultTree,
+                         encoding: Encoding = 'inline') \
+        -> Iterator[frozenset[FuncDeclRef]]:
+    """
+    Yields the status vectors of a satisfaction set as they are found. Small
+    fault trees are evaluated on all status vectors at once, see
+    `exhaustive`.
+    """
+    assert parse_tree.data in ('satisfaction_set', 'count')
+    phi = parse_tree.children[0]
+    if is_exhaustive(phi, fault_tree, encoding):
+        yield from exhaustive_vectors(phi, fault_tree)
+        return
+
+    if phi.data in ('mcs', 'mps'):
+        yield from minimal_vectors(
+            minimal_argument(phi, fault_tree, encoding), fault_tree)
+        return
+
+    if has_minimal_operators(phi):
+        problem = minimality_problem(phi, fault_tree, encoding)
+        if problem is not None:
+            yield from problem.vectors()
+            return
+
+    formula = build_formula(phi, fault_tree, encoding)
+    _, definitions = get_definitions(formula, fault_tree)
     s = Solver()
-    s.add(formula)
-    s.check()
-    return set(map(get_true_events,
-                   all_models(s, fault_tree.get_basic_events_bools())))
-
-
-def execute_bfl_statement(parse_tree: Tree, fault_tree: FaultTree):
+    s.add(formula, *definitions)
+    bes = fault_tree.get_basic_events_set()
+    for model in all_models(s, fault_tree.get_basic_events_bools()):
+        yield get_true_events(model, bes)
+
+
+def count_satisfaction_set(parse_tree: Tree, fault_tree: FaultTree,
+                           encoding: Encoding = 'inline') -> int:
+    """
+    Returns the size of the satisfaction set of `|[[phi]]|`. Quantifier-free
+    formulas are counted with a BDD, without enumerating their models, and
+    formulas over small fault trees with truth tables. Other formulas fall
+    back to enumeration.
+    """
+    assert parse_tree.data == 'count'
+    phi = parse_tree.children[0]
+    if is_exhaustive(phi, fault_tree, encoding):
+        return exhaustive_count(phi, fault_tree)
+    if phi.data not in ('mcs', 'mps'):
+        formula = build_formula(phi, fault_tree, encoding)
+        if is_quantifier_free(formula):
+            return count_models(formula, fault_tree)
+    return sum(1 for _ in satisfaction_vectors(parse_tree, fault_tree,
+                                               encoding))
+
+
+def minimal_argument(parse_tree: Tree, fault_tree: FaultTree,
+                     encoding: Encoding = 'inline') -> BoolRef:
+    """
+    Returns the formula whose minimal vectors satisfy the `\\mcs` or `\\mps`
+    formula `parse_tree`.
+    """
+    assert parse_tree.data == 'mcs' or parse_tree.data == 'mps'
+    formula = build_formula(parse_tree.children[0], fault_tree, encoding)
+    if parse_tree.data == 'mps':
+        formula = negate_atoms(Not(formula), fault_tree)
+    return formula
+
+
+class Z3Backend(Backend):
+    """Answers BFL statements by encoding them as (quantified) z3
+    formulas."""
+
+    def __init__(self, fault_tree: FaultTree, encoding: Encoding = 'inline'):
+        self.fault_tree = fault_tree
+        self.encoding = encoding
+        # Shared by all quantifier-free quantified statements
+        self.solver = IncrementalSolver(fault_tree)
+
+    def quantified(self, statement: Tree) -> bool:
+        return quantified_statement(statement, self.fault_tree, self.encoding,
+                                    self.solver)
+
+    def satisfaction_vectors(self, statement: Tree) \
+            -> Iterator[frozenset[FuncDeclRef]]:
+        return satisfaction_vectors(statement, self.fault_tree, self.encoding)
+
+    def count(self, statement: Tree) -> int:
+        return count_satisfaction_set(statement, self.fault_tree,
+                                      self.encoding)
+
+    def check_model(self, statement: Tree) -> bool | frozenset[FuncDeclRef]:
+        return check_model(statement, self.fault_tree, self.encoding)
+
+    def idp(self, statement: Tree) -> bool:
+        return idp_statement(statement, self.fault_tree, self.encoding)
+
+    def sup(self, statement: Tree) -> bool:
+        return sup_statement(statement, self.fault_tree, self.encoding)
+
+    def sup_all(self) -> frozenset[FuncDeclRef]:
+        return superfluous_events(self.fault_tree)
+
+
+# `auto` stops using BDDs once they need more nodes than this.
+AUTO_MAX_BDD_NODES = 500_000
+
+
+class AutoBackend(Backend):
+    """
+    Answers every statement with the strategy that `planner` chooses for it,
+    and records how long it took. BDDs are limited to `AUTO_MAX_BDD_NODES`
+    nodes. The first statement that exceeds this limit is answered with z3
+    instead, and so are all later ones, because the BDD manager is full.
+    """
+
+    def __init__(self, fault_tree: FaultTree, encoding: Encoding = 'inline',
+                 planner: Planner | None = None):
+        self.fault_tree = fault_tree
+        self.bdd: BddBackend | None = BddBackend(fault_tree,
+                                                 AUTO_MAX_BDD_NODES)
+        self.z3 = Z3Backend(fault_tree, encoding)
+        self.planner = planner or Planner()
+
+    def run(self, method: str, statement: Tree, *args):
+        features = query_features(statement, self.fault_tree)
+        strategy = self.planner.choose(
+            features, strategies if self.bdd is not None else ('z3',))
+        start = perf_counter()
+        if strategy == 'bdd':
+            try:
+                result = getattr(self.bdd, method)(*args)
+            except NodeLimitExceeded:
+                logger.info('BDDs exceed %d nodes, using z3 from now on',
+                            AUTO_MAX_BDD_NODES)
+                self.bdd = None
+                result = getattr(self.z3, method)(*args)
+        else:
+            result = getattr(self.z3, method)(*args)
+
+        if isinstance(result, Iterator):
+            # Satisfaction vectors are only timed if all of them are read.
+            return then(result, lambda: self.planner.record(
+                features, strategy, perf_counter() - start))
+        self.planner.record(features, strategy, perf_counter() - start)
+        return result
+
+    def quantified(self, statement: Tree) -> bool:
+        return self.run('quantified', statement, statement)
+
+    def satisfaction_vectors(self, statement: Tree) \
+            -> Iterator[frozenset[FuncDeclRef]]:
+        return self.run('satisfaction_vectors', statement, statement)
+
+    def count(self, statement: Tree) -> int:
+        return self.run('count', statement, statement)
+
+    def check_model(self, statement: Tree) -> bool | frozenset[FuncDeclRef]:
+        return self.run('check_model', statement, statement)
+
+    def idp(self, statement: Tree) -> bool:
+        return self.run('idp', statement, statement)
+
+    def sup(self, statement: Tree) -> bool:
+        return self.run('sup', statement, statement)
+
+    def sup_all(self) -> frozenset[FuncDeclRef]:
+        return self.run('sup_all', Tree('sup_all', []))
+
+    def close(self):
+        self.planner.close()
+
+
+def then(iterator: Iterator, done: Callable[[], None]) -> Iterator:
+    """Yields from `iterator`, and calls `done` once it is exhausted."""
+    yield from iterator
+    done()
+
+
+def make_backend(name: BackendName, fault_tree: FaultTree,
+                 encoding: Encoding = 'inline') -> Backend:
+    match name:
+        case 'z3':
+            return Z3Backend(fault_tree, encoding)
+        case 'bdd':
+            return BddBackend(fault_tree)
+        case 'auto':
+            return AutoBackend(fault_tree, encoding,
+                               Planner(TimingStats(default_stats_path())))
+    raise ValueError(f'Unknown backend `{name}`')
+
+
+def execute_bfl_statement(parse_tree: Tree, fault_tree: FaultTree,
+                          encoding: Encoding = 'inline',
+                          stream: StreamOptions | None = None,
+                          backend: Backend | None = None):
+    """
+    Executes a single statement with `backend`, which defaults to a
+    `Z3Backend`. If `stream` is given, satisfaction sets are written while
+    they are enumerated, and their result is their size.
+    """
+    backend = backend or Z3Backend(fault_tree, encoding)
     match parse_tree.data:
         case 'exists' | 'forall':
-            return quantified_statement(parse_tree, fault_tree)
+            return backend.quantified(parse_tree)
         case 'sup':
-            return sup_statement(parse_tree, fault_tree)
+            return backend.sup(parse_tree)
+        case 'sup_all':
+            return backend.sup_all()
         case 'idp':
-            return idp_statement(parse_tree, fault_tree)
+            return backend.idp(parse_tree)
         case 'check_model':
-            return check_model(parse_tree, fault_tree)
+            return backend.check_model(parse_tree)
+        case 'satisfaction_set' if stream is not None:
+            return write_vectors(backend.satisfaction_vectors(parse_tree),
+                                 reconstruct(parse_tree), stream)
         case 'satisfaction_set':
-            return satisfaction_set(parse_tree, fault_tree)
+            return backend.satisfaction_set(parse_tree)
+        case 'count':
+            return backend.count(parse_tree)
         case _:
             raise ValueError('Unknown statement')
 
 
-def execute_bfl(parse_tree: Tree, fault_tree: FaultTree, print_output=False):
+def execute_bfl(parse_tree: Tree, fault_tree: FaultTree, print_output=False,
+                encoding: Encoding = 'inline', jobs=1,
+                stream: StreamOptions | None = None,
+                backend: BackendName = 'z3',
+                cache: ResultCache | None = None):
+    """
+    Executes all statements in `parse_tree` with the backend `backend` and
+    returns their results in order. With `jobs > 1`, the statements are
+    distributed over a pool of `jobs` processes, which each get a copy of
+    `fault_tree` and their own backend. Satisfaction sets can only be
+    streamed with a single job. If `cache` is given, statements whose result
+    it holds are not executed, and the results of the others are added to
+    it, see `cache_keys`.
+    """
     bfl_tree = get_bfl_tree(parse_tree)
+    if jobs > 1 and stream is not None:
+        raise ValueError('Satisfaction sets cannot be streamed in parallel')
+    keys = cache_keys(bfl_tree.children, fault_tree, encoding, stream) \
+        if cache is not None else {}
+    cached = {}
+    for i, key in keys.items():
+        result = cache.get(key)
+        if result is not None:
+            cached[i] = from_event_names(result)
+    pending = [statement for i, statement in enumerate(bfl_tree.children)
+               if i not in cached]
+    solver = None
+    if jobs > 1:
+        outcomes = execute_parallel(pending, fault_tree, encoding, jobs,
+                                    backend)
+    else:
+        solver = make_backend(backend, fault_tree, encoding)
+        outcomes = (execute_safely(statement, fault_tree, encoding, stream,
+                                   solver)
+                    for statement in pending)
+    # Outcomes are computed lazily, so in sequential mode, progress is printed
+    # before each statement is solved.
+    # JSON lines are kept machine-readable by moving everything else to stderr.
+    log = sys.stderr if stream is not None and stream.format == 'jsonl' \
+        else sys.stdout
+
     results = []
-    for statement in bfl_tree.children:
-        if print_output:
-            print(f'Solving {reconstruct(statement)}\n...')
+    try:
+        for i, statement in enumerate(bfl_tree.children):
+            if print_output:
+                print(f'Solving {reconstruct(statement)}\n...', file=log)
+
+            if i in cached:
+                result, error = cached[i], None
+            else:
+                result, error = next(outcomes)
+                if i in keys and error is None and result is not None:
+                    cache.put(keys[i], to_event_names(result))
+            if error is not None:
+                print(f'Error: {error}\n', file=log)
+
+            results.append(result)
+
+            # Streamed satisfaction sets have already been written
+            streamed = stream is not None \
+                and statement.data == 'satisfaction_set'
+            if print_output and result is not None and not streamed:
+                print(result, '\n', file=log)
+            elif print_output and streamed:
+                print(file=log)
+    finally:
+        if solver is not None:
+            solver.close()
+
+    if cache is not None:
+        logger.info('Result cache: %d hits, %d misses', len(cached),
+                    len(keys) - len(cached))
+    return results
 
-        try:
-            result = execute_bfl_statement(statement, fault_tree)
-        except BFLError as e:
-            result = None
-            print(f'Error: {e}\n')
 
-        results.append(result)
+def cache_keys(statements: list[Tree], fault_tree: FaultTree,
+               encoding: Encoding,
+               stream: StreamOptions | None = None) -> dict[int, str]:
+    """
+    Returns the result cache key of every statement by its index. Keys
+    combine the hash of the fault tree, the encoding and the reconstructed
+    statement, so they do not depend on the order of the fault tree's
+    statements or the formatting of the query. Streamed satisfaction sets
+    are written as they are found, so they are not cached.
+    """
+    tree_hash = fault_tree_hash(fault_tree)
+    return {i: result_key(tree_hash, encoding, reconstruct(statement))
+            for i, statement in enumerate(statements)
+            if stream is None or statement.data != 'satisfaction_set'}
+
+
+def execute_safely(statement: Tree, fault_tree: FaultTree,
+                   encoding: Encoding = 'inline',
+                   stream: StreamOptions | None = None,
+                   backend: Backend | None = None):
+    """Returns the result of `statement` and the `BFLError` it raised."""
+    try:
+        return execute_bfl_statement(statement, fault_tree, encoding,
+                                     stream, backend), None
+    except BFLError as e:
+        return None, e
+
+
+def execute_parallel(statements: list[Tree], fault_tree: FaultTree,
+                     encoding: Encoding, jobs: int,
+                     backend: BackendName = 'z3'):
+    """
+    Executes `statements` in a pool of `jobs` processes, and yields their
+    outcomes like `execute_safely` in the original order. Every process
+    receives the fault tree once, and solves statements in its own z3
+    context. z3 objects cannot be sent between processes, so results are
+    sent as event names.
+    """
+    if not isinstance(fault_tree, CompactFaultTree):
+        graph, fault_tree = fault_tree, CompactFaultTree.from_graph(fault_tree)
+        fault_tree.cardinality = graph.cardinality
+
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(fault_tree, encoding,
+                                       backend)) as executor:
+        for result, error in executor.map(_execute_in_worker, statements):
+            yield from_event_names(result), error
+
+
+_worker_state: tuple[CompactFaultTree, Encoding, Backend] | None = None
+
+
+def _init_worker(fault_tree: CompactFaultTree, encoding: Encoding,
+                 backend: BackendName):
+    global _worker_state
+    solver = make_backend(backend, fault_tree, encoding)
+    _worker_state = (fault_tree, encoding, solver)
+    # Workers are only shut down with the pool, so their backend is closed
+    # when the process exits.
+    Finalize(None, solver.close, exitpriority=0)
+
+
+def _execute_in_worker(statement: Tree):
+    fault_tree, encoding, backend = _worker_state
+    result, error = execute_safely(statement, fault_tree, encoding, None,
+                                   backend)
+    return to_event_names(result), error
+
+
+def to_event_names(result):
+    match result:
+        case set():
+            return {to_event_names(vector) for vector in result}
+        case frozenset():
+            return frozenset(event.name() for event in result)
+        case _:
+            return result
 
-        if print_output and result is not None:
-            print(result, '\n')
 
-    return results
+def from_event_names(result):
+    match result:
+        case set():
+            return {from_event_names(vector) for vector in result}
+        case frozenset():
+            return frozenset(Bool(event).decl() for event in result)
+        case _:
+            return result
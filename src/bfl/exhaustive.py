@@ -0,0 +1,246 @@
+from typing import Iterator
+
+from lark import Tree, Token
+from z3 import Bool, FuncDeclRef
+
+from bfl.build_bfl import Encoding
+from bfl.exceptions import BFLError
+from galileo.fault_tree import FaultTree
+from gates import AndGate, OrGate, VotGate, Gate
+
+# Fault trees with at most this many basic events are evaluated on all their
+# status vectors. Every truth table then takes at most 128 KiB.
+EXHAUSTIVE_MAX_EVENTS = 20
+# Satisfying vectors are decoded from this many bits of a truth table at a
+# time.
+DECODE_BITS = 1 << 16
+
+
+class TruthTables:
+    """
+    Evaluates BFL formulas on all `2^n` status vectors of a fault tree with
+    `n` basic events at once. A formula is represented by its truth table,
+    a Python integer whose bit `v` is its value on the status vector in
+    which the `i`th basic event fails iff bit `i` of `v` is set. Integers
+    are stored as machine words, so every gate and operator processes many
+    vectors per instruction.
+
+    Evidence restricts a table to one half and copies it to the other half.
+    The minimal vectors of a table `f` are the ones in `f` without a strict
+    subset in `f`. The subsets of all vectors are found with `n` shifts: the
+    table of the vectors with a subset in `f` starts as `f`, and is extended
+    from every vector without basic event `i` to the same vector with it.
+    """
+
+    def __init__(self, fault_tree: FaultTree):
+        self.fault_tree = fault_tree
+        self.basic_events = fault_tree.get_basic_events()
+        n = len(self.basic_events)
+        self.size = 1 << n
+        self.full = (1 << self.size) - 1
+        # `self.masks[i]` is the table of the `i`th basic event.
+        self.masks = [self.repeat(((1 << (1 << i)) - 1) << (1 << i), 2 << i)
+                      for i in range(n)]
+        self.indices = {be: i for i, be in enumerate(self.basic_events)}
+        self.events: dict[str, int] = {
+            be: mask for be, mask in zip(self.basic_events, self.masks)}
+
+    def repeat(self, pattern: int, width: int) -> int:
+        """Returns the table that repeats the `width` bits of `pattern`."""
+        # Doubling needs a logarithmic number of shifts, unlike a division
+        # of the full table, which is quadratic in its size.
+        while width < self.size:
+            pattern |= pattern << width
+            width *= 2
+        return pattern
+
+    def table(self, phi: Tree) -> int:
+        args = phi.children
+        match phi.data:
+            case 'event':
+                return self.event(args[0])
+            case 'neg':
+                return self.full ^ self.table(args[0])
+            case 'and_':
+                result = self.full
+                for arg in args:
+                    result &= self.table(arg)
+                return result
+            case 'or_':
+                result = 0
+                for arg in args:
+                    result |= self.table(arg)
+                return result
+            case 'implies':
+                return (self.full ^ self.table(args[0])) | self.table(args[1])
+            case 'equiv':
+                return self.full ^ self.table(args[0]) ^ self.table(args[1])
+            case 'nequiv':
+                return self.table(args[0]) ^ self.table(args[1])
+            case 'vot':
+                comp, k, basic_events = args
+                return self.vot([self.event(token)
+                                 for token in basic_events.children],
+                                comp.value, int(k))
+            case 'with_evidence':
+                return self.with_evidence(self.table(args[0]), args[1])
+            case 'mcs':
+                return self.minimal(self.table(args[0]))
+            case 'mps':
+                # Like `BflTransformer.mps`, the minimal vectors of the
+                # negated argument with all basic events negated.
+                return self.minimal(
+                    self.full ^ self.flip(self.table(args[0])))
+        raise ValueError(f'Unknown operator `{phi.data}`')
+
+    def event(self, event: Token | str) -> int:
+        """Returns the table of `event`, after computing the tables of all
+        events below it in post-order with an explicit stack."""
+        event = str(event)
+        if event not in self.fault_tree.nodes:
+            raise BFLError(f'Unknown event `{event}`')
+
+        events = self.events
+        stack = [(event, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if current in events:
+                continue
+
+            children = list(self.fault_tree.predecessors(current))
+            if children_done:
+                events[current] = self.gate(
+                    self.fault_tree.nodes[current]['gate'],
+                    [events[c] for c in children])
+            else:
+                stack.append((current, True))
+                stack.extend((c, False) for c in children if c not in events)
+
+        return events[event]
+
+    def gate(self, gate: Gate, children: list[int]) -> int:
+        match gate:
+            case AndGate():
+                result = self.full
+                for child in children:
+                    result &= child
+                return result
+            case OrGate():
+                result = 0
+                for child in children:
+                    result |= child
+                return result
+            case VotGate():
+                return self.vot(children, gate.comp, gate.k)
+        raise ValueError(f'Unknown gate type: {type(gate)}')
+
+    def vot(self, args: list[int], comp: str, k: int) -> int:
+        match comp:
+            case '<':
+                return self.full ^ self.at_least(args, k)
+            case '<=':
+                return self.full ^ self.at_least(args, k + 1)
+            case '>':
+                return self.at_least(args, k + 1)
+            case '>=':
+                return self.at_least(args, k)
+            case '==':
+                return self.at_least(args, k) & ~self.at_least(args, k + 1)
+        raise ValueError('Unknown comp')
+
+    def at_least(self, args: list[int], k: int) -> int:
+        if k <= 0:
+            return self.full
+        # `counts[j]` holds where at least `j` of the arguments so far hold.
+        counts = [self.full] + [0] * k
+        for x in args:
+            for j in range(k, 0, -1):
+                counts[j] |= counts[j - 1] & x
+        return counts[k]
+
+    def with_evidence(self, table: int, evidence: Tree) -> int:
+        values = {}
+        for mapping in evidence.children:
+            be, value = mapping.children[0].value, mapping.children[1] == '1'
+            if values.setdefault(be, value) != value:
+                # No status vector satisfies contradicting evidence.
+                return self.full
+        for be, value in values.items():
+            # Like in the inline encoding, evidence on intermediate events
+            # has no effect.
+            if be in self.indices:
+                table = self.restrict(table, self.indices[be], value)
+        return table
+
+    def restrict(self, table: int, i: int, value: bool) -> int:
+        """Returns the table whose value on every vector is the value of
+        `table` with basic event `i` set to `value`."""
+        shift = 1 << i
+        if value:
+            half = table & self.masks[i]
+            return half | (half >> shift)
+        half = table & ~self.masks[i]
+        return half | (half << shift)
+
+    def flip(self, table: int) -> int:
+        """Returns the table of the vectors whose complement is in
+        `table`."""
+        for i, mask in enumerate(self.masks):
+            shift = 1 << i
+            table = ((table & mask) >> shift) | ((table & ~mask) << shift)
+        return table
+
+    def minimal(self, table: int) -> int:
+        """Returns the table of the minimal vectors of `table`."""
+        # `below` contains the vectors with a subset in `table`, and
+        # `strictly_below` the ones with a strict subset in `table`.
+        below = table
+        for i, mask in enumerate(self.masks):
+            below |= (below & ~mask) << (1 << i)
+        strictly_below = 0
+        for i, mask in enumerate(self.masks):
+            strictly_below |= (below & ~mask) << (1 << i)
+        return table & ~strictly_below
+
+    def vectors(self, table: int) -> Iterator[frozenset[str]]:
+        """Yields the sets of failed basic events of the vectors in `table`,
+        decoding `DECODE_BITS` bits at a time."""
+        chunk_mask = (1 << DECODE_BITS) - 1
+        for start in range(0, self.size, DECODE_BITS):
+            chunk = (table >> start) & chunk_mask
+            if not chunk:
+                continue
+            # Bits from least to most significant.
+            bits = bin(chunk)[:1:-1]
+            i = bits.find('1')
+            while i >= 0:
+                v = start + i
+                yield frozenset(be for j, be in enumerate(self.basic_events)
+                                if v >> j & 1)
+                i = bits.find('1', i + 1)
+
+
+def is_exhaustive(phi: Tree, fault_tree: FaultTree,
+                  encoding: Encoding = 'inline') -> bool:
+    """
+    Returns whether the satisfaction set of `phi` is computed on all status
+    vectors. Evidence follows the inline encoding, so with the Tseitin
+    encoding, only formulas without evidence qualify.
+    """
+    if len(fault_tree.get_basic_events()) > EXHAUSTIVE_MAX_EVENTS:
+        return False
+    return encoding == 'inline' or not any(phi.find_data('with_evidence'))
+
+
+def exhaustive_vectors(phi: Tree, fault_tree: FaultTree) \
+        -> Iterator[frozenset[FuncDeclRef]]:
+    """Yields the status vectors that satisfy `phi`, by evaluating it on all
+    status vectors of the small `fault_tree`."""
+    tables = TruthTables(fault_tree)
+    decls = {be: Bool(be).decl() for be in tables.basic_events}
+    for vector in tables.vectors(tables.table(phi)):
+        yield frozenset(decls[be] for be in vector)
+
+
+def exhaustive_count(phi: Tree, fault_tree: FaultTree) -> int:
+    return TruthTables(fault_tree).table(phi).bit_count()
@@ -0,0 +1,32 @@
+from z3 import Solver, BoolRef, CheckSatResult
+
+from bfl.build_bfl import get_definitions
+from galileo.fault_tree import FaultTree
+
+
+class IncrementalSolver:
+    """
+    Checks the satisfiability of quantifier-free formulas over the events of
+    `fault_tree` with one z3 solver. The Tseitin definitions that a formula
+    needs are added permanently, the formula itself only in its own scope,
+    so later checks reuse the definitions and everything the solver learned
+    about them.
+    """
+
+    def __init__(self, fault_tree: FaultTree):
+        self.fault_tree = fault_tree
+        self.solver = Solver()
+        self.defined: set[str] = set()
+
+    def check(self, formula: BoolRef) -> CheckSatResult:
+        tseitin_vars, definitions = get_definitions(formula, self.fault_tree)
+        for var, definition in zip(tseitin_vars, definitions):
+            if var.decl().name() not in self.defined:
+                self.defined.add(var.decl().name())
+                self.solver.add(definition)
+        self.solver.push()
+        try:
+            self.solver.add(formula)
+            return self.solver.check()
+        finally:
+            self.solver.pop()
@@ -0,0 +1,55 @@
+from typing import Iterator
+
+from z3 import Solver, sat, Or, Not, And, BoolRef, FuncDeclRef, is_true, \
+    ModelRef
+
+from bfl.build_bfl import get_definitions
+from galileo.fault_tree import FaultTree
+from utils.get_vars import get_vars
+
+
+def minimal_vectors(formula: BoolRef, fault_tree: FaultTree) \
+        -> Iterator[frozenset[FuncDeclRef]]:
+    """
+    Enumerates the minimal status vectors that satisfy `formula`, as sets of
+    failed basic events. These are the satisfying vectors of `\\mcs(formula)`,
+    but they are found without the quantified minimality check: each model of
+    `formula` is shrunk to a minimal one with plain satisfiability checks, and
+    its supersets are then excluded from the search.
+    """
+    _, definitions = get_definitions(formula, fault_tree)
+    bes = fault_tree.get_basic_events_set()
+    # Basic events outside the formula are false in every minimal vector.
+    cone = [v for v in get_vars(And(formula, *definitions))
+            if v.decl().name() in bes]
+
+    s = Solver()
+    s.add(formula, *definitions)
+    while s.check() == sat:
+        failed = shrink(s, cone, failed_events(s.model(), cone))
+        yield frozenset(be.decl() for be in failed)
+        # Every superset of `failed` is a non-minimal vector.
+        s.add(Or(*(Not(be) for be in failed)))
+
+
+def failed_events(model: ModelRef, events: list[BoolRef]) -> list[BoolRef]:
+    return [e for e in events if is_true(model.eval(e, model_completion=True))]
+
+
+def shrink(s: Solver, cone: list[BoolRef],
+           failed: list[BoolRef]) -> list[BoolRef]:
+    """
+    Returns a minimal vector below `failed` that satisfies the assertions of
+    `s`, by repeatedly looking for a strictly smaller one.
+    """
+    while failed:
+        failed_ids = {be.get_id() for be in failed}
+        s.push()
+        s.add(*(Not(be) for be in cone if be.get_id() not in failed_ids))
+        s.add(Or(*(Not(be) for be in failed)))
+        if s.check() != sat:
+            s.pop()
+            break
+        failed = failed_events(s.model(), failed)
+        s.pop()
+    return failed
@@ -0,0 +1,138 @@
+from z3 import BoolRef, is_const, is_quantifier, is_true, is_false, \
+    Z3_OP_UNINTERPRETED, Z3_OP_AND, Z3_OP_OR, Z3_OP_NOT, Z3_OP_IMPLIES, \
+    Z3_OP_EQ, Z3_OP_DISTINCT, Z3_OP_XOR, Z3_OP_ITE, Z3_OP_PB_AT_LEAST, \
+    Z3_OP_PB_AT_MOST
+
+from bdd import BDD, TRUE, FALSE
+from galileo.fault_tree import FaultTree
+
+
+def is_quantifier_free(formula: BoolRef) -> bool:
+    visited = set()
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node.get_id() in visited:
+            continue
+        visited.add(node.get_id())
+        if is_quantifier(node):
+            return False
+        stack.extend(node.children())
+    return True
+
+
+def dfs_order(fault_tree: FaultTree) -> list[str]:
+    """
+    Returns the basic events of `fault_tree` in the order in which a
+    depth-first search from the root first reaches them. Basic events that
+    share a gate end up close to each other, which keeps BDDs small.
+    """
+    order = []
+    visited = set()
+    stack = [fault_tree.get_root()]
+    while stack:
+        event = stack.pop()
+        if event in visited:
+            continue
+        visited.add(event)
+        children = list(fault_tree.predecessors(event))
+        if not children:
+            order.append(event)
+        stack.extend(reversed(children))
+
+    seen = set(order)
+    order.extend(be for be in fault_tree.get_basic_events() if be not in seen)
+    return order
+
+
+class BddBuilder:
+    """
+    Builds BDDs of quantifier-free formulas over the basic events of
+    `fault_tree`. Tseitin variables are replaced by the BDDs of their
+    definitions, so formulas built with either encoding give the same BDD.
+    """
+
+    def __init__(self, fault_tree: FaultTree, bdd: BDD | None = None):
+        self.fault_tree = fault_tree
+        self.bdd = bdd or BDD(dfs_order(fault_tree))
+        # Maps the IDs of converted subformulas to their BDDs. The
+        # subformulas are kept, so z3 does not reuse their IDs.
+        self.nodes: dict[int, int] = {}
+        self.converted: list[BoolRef] = []
+
+    def build(self, formula: BoolRef) -> int:
+        # Subformulas are converted in post-order with an explicit stack, so
+        # deep fault trees do not hit the recursion limit.
+        stack = [formula]
+        while stack:
+            node = stack[-1]
+            if node.get_id() in self.nodes:
+                stack.pop()
+                continue
+            children = self.operands(node)
+            missing = [c for c in children if c.get_id() not in self.nodes]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            self.nodes[node.get_id()] = self.define(
+                node, [self.nodes[c.get_id()] for c in children])
+            self.converted.append(node)
+        return self.nodes[formula.get_id()]
+
+    def operands(self, node: BoolRef) -> list[BoolRef]:
+        """Returns the formulas that `node` is defined in terms of."""
+        if is_quantifier(node):
+            raise ValueError('Cannot build BDDs of quantified formulas')
+        definitions = self.fault_tree.definitions
+        if is_const(node) and node.decl().name() in definitions:
+            definition, _ = definitions[node.decl().name()]
+            return [definition.arg(1)]
+        return node.children()
+
+    def define(self, node: BoolRef, args: list[int]) -> int:
+        """Returns the BDD of `node`, whose operands have the BDDs `args`."""
+        bdd = self.bdd
+        if is_true(node):
+            return TRUE
+        if is_false(node):
+            return FALSE
+        if is_const(node):
+            name = node.decl().name()
+            if name in self.fault_tree.definitions:
+                return args[0]
+            if node.decl().kind() != Z3_OP_UNINTERPRETED \
+                    or name not in bdd.var_levels:
+                raise ValueError(f'Unknown variable `{node}`')
+            return bdd.var(name)
+
+        kind = node.decl().kind()
+        if kind == Z3_OP_NOT:
+            return bdd.negate(args[0])
+        if kind == Z3_OP_AND:
+            return bdd.conjoin(args)
+        if kind == Z3_OP_OR:
+            return bdd.disjoin(args)
+        if kind == Z3_OP_IMPLIES:
+            return bdd.ite(args[0], args[1], TRUE)
+        if kind == Z3_OP_EQ and len(args) == 2:
+            return bdd.equiv(*args)
+        if kind in (Z3_OP_DISTINCT, Z3_OP_XOR) and len(args) == 2:
+            return bdd.negate(bdd.equiv(*args))
+        if kind == Z3_OP_ITE:
+            return bdd.ite(*args)
+        if kind == Z3_OP_PB_AT_LEAST:
+            return bdd.at_least(args, node.decl().params()[0])
+        if kind == Z3_OP_PB_AT_MOST:
+            return bdd.negate(
+                bdd.at_least(args, node.decl().params()[0] + 1))
+        raise ValueError(f'Unsupported operator `{node.decl()}`')
+
+
+def count_models(formula: BoolRef, fault_tree: FaultTree) -> int:
+    """
+    Returns the number of status vectors of `fault_tree` that satisfy the
+    quantifier-free `formula`, by compiling it to a BDD.
+    """
+    builder = BddBuilder(fault_tree)
+    return builder.bdd.count(builder.build(formula))
@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+from lark import Tree, Token
+
+from galileo.fault_tree import FaultTree
+from utils.cache_dir import cache_dir
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks, e.g., on Windows, concurrent saves may lose runs.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+Strategy = Literal['bdd', 'z3']
+strategies: tuple[Strategy, ...] = ('bdd', 'z3')
+
+# Cones with at most this many basic events are always solved with BDDs,
+# which are tiny there.
+SMALL_CONE = 20
+# Quantified statements and counterexamples on cones with more basic events
+# than this are solved with z3, which only needs one satisfying assignment.
+LARGE_CONE = 200
+# Gates with more children than this make BDDs grow quickly.
+WIDE_GATE = 32
+# Statistics only overrule the rules once both strategies have been timed
+# this often for the same kind of statement.
+MIN_SAMPLES = 3
+# The strategy that was not chosen is tried once the chosen one takes this
+# many seconds on average, so the statistics get samples of both.
+EXPLORE_AFTER = 1.0
+# Environment variable with the path of the timing statistics. If it is set
+# to an empty string, the statistics are not persisted.
+STATS_ENV = 'BFL_STATS'
+
+
+@dataclass(frozen=True)
+class QueryFeatures:
+    """
+    Properties of a statement that decide how it is solved. `nesting` is the
+    depth of nested `\\mcs`, `\\mps` and evidence operators, which each add a
+    quantifier alternation, `basic_events` is the number of basic events in
+    the cone of the events in the statement, and `max_fan_in` is the largest
+    number of children of a gate in that cone.
+    """
+    kind: str
+    nesting: int
+    basic_events: int
+    max_fan_in: int
+
+    def bucket(self) -> str:
+        """Returns the key under which timings of similar statements are
+        collected. Cone sizes are grouped by their order of magnitude."""
+        width = 'wide' if self.max_fan_in > WIDE_GATE else 'narrow'
+        return f'{self.kind}/nesting{min(self.nesting, 2)}/' \
+               f'events{self.basic_events.bit_length()}/{width}'
+
+
+def query_features(statement: Tree, fault_tree: FaultTree) -> QueryFeatures:
+    nesting = 0
+    events = set()
+    if statement.data in ('sup', 'sup_all'):
+        events.add(fault_tree.get_root())
+
+    stack = [(statement, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, Token):
+            if node.type in ('EVENT_NAME', 'BASIC_EVENT'):
+                events.add(node.value)
+            continue
+        if node.data in ('mcs', 'mps', 'with_evidence'):
+            depth += 1
+            nesting = max(nesting, depth)
+        stack.extend((child, depth) for child in node.children)
+
+    basic_events, max_fan_in = cone_size(fault_tree, events)
+    return QueryFeatures(statement.data, nesting, basic_events, max_fan_in)
+
+
+def cone_size(fault_tree: FaultTree, events: set[str]) -> tuple[int, int]:
+    """
+    Returns the number of basic events below `events`, and the largest number
+    of children of an intermediate event below them. Unknown events are
+    ignored, they are reported when the statement is solved.
+    """
+    basic_events = max_fan_in = 0
+    visited = set()
+    stack = [event for event in events if event in fault_tree.nodes]
+    while stack:
+        event = stack.pop()
+        if event in visited:
+            continue
+        visited.add(event)
+        children = list(fault_tree.predecessors(event))
+        if not children:
+            basic_events += 1
+        max_fan_in = max(max_fan_in, len(children))
+        stack.extend(children)
+    return basic_events, max_fan_in
+
+
+def default_stats_path() -> Path | None:
+    path = os.environ.get(STATS_ENV)
+    if path is None:
+        return cache_dir() / 'planner.json'
+    return Path(path) if path else None
+
+
+class TimingStats:
+    """
+    Number of runs and total seconds of every strategy per bucket of
+    statements, see `QueryFeatures.bucket`. If `path` is given, the
+    statistics are loaded from it, and `save` adds the runs recorded since
+    the last save to the file, so that several processes can share it.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        self.path = None if path is None else Path(path)
+        self.runs: dict[str, dict[str, list[float]]] = self.load()
+        self.unsaved: dict[str, dict[str, list[float]]] = {}
+
+    def load(self) -> dict[str, dict[str, list[float]]]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                runs = json.load(f)['runs']
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+        return runs if isinstance(runs, dict) else {}
+
+    def record(self, bucket: str, strategy: Strategy, seconds: float):
+        for runs in (self.runs, self.unsaved):
+            n, total = runs.setdefault(bucket, {}).get(strategy, (0, 0.0))
+            runs[bucket][strategy] = [n + 1, total + seconds]
+
+    def mean(self, bucket: str, strategy: Strategy,
+             min_samples: int = 1) -> float | None:
+        n, total = self.runs.get(bucket, {}).get(strategy, (0, 0.0))
+        return total / n if n >= min_samples else None
+
+    def save(self):
+        if self.path is None or not self.unsaved:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Other processes may save at the same time, so the file is
+            # loaded and replaced while holding a lock.
+            with open(self.path.with_name(f'{self.path.name}.lock'),
+                      'w') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                runs = self.load()
+                for bucket, by_strategy in self.unsaved.items():
+                    for strategy, (n, total) in by_strategy.items():
+                        old_n, old_total = runs.setdefault(bucket, {}).get(
+                            strategy, (0, 0.0))
+                        runs[bucket][strategy] = [old_n + n, old_total + total]
+                tmp_path = self.path.with_name(
+                    f'{self.path.name}.{os.getpid()}.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump({'runs': runs}, f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning('Cannot save timing statistics to %s: %s',
+                           self.path, e)
+            return
+        self.runs = runs
+        self.unsaved = {}
+
+
+class Planner:
+    """
+    Chooses a strategy for every statement, first by rules on its features,
+    which are overruled by the timing statistics once they show that the
+    other strategy is faster for similar statements. Every decision is
+    logged with its reason. Timings are recorded in memory, and saved once by
+    `close`.
+    """
+
+    def __init__(self, stats: TimingStats | None = None):
+        self.stats = stats or TimingStats()
+
+    def choose(self, features: QueryFeatures,
+               available: tuple[Strategy, ...] = strategies) -> Strategy:
+        strategy, reason = self.rule(features)
+        if strategy not in available:
+            strategy, reason = available[0], f'{strategy} is not available'
+        elif len(available) > 1:
+            strategy, reason = self.measured(features, strategy, reason)
+        logger.info('Planned %s with %s: %s (nesting %d, %d basic events, '
+                    'fan-in %d)', features.kind, strategy, reason,
+                    features.nesting, features.basic_events,
+                    features.max_fan_in)
+        return strategy
+
+    @staticmethod
+    def rule(features: QueryFeatures) -> tuple[Strategy, str]:
+        if features.basic_events <= SMALL_CONE:
+            return 'bdd', 'small cone'
+        if features.nesting >= 2:
+            return 'z3', 'nested minimality operators'
+        if features.kind in ('satisfaction_set', 'count'):
+            return 'bdd', 'BDDs enumerate and count without solver calls'
+        if features.kind in ('exists', 'forall', 'check_model') \
+                and features.basic_events > LARGE_CONE:
+            return 'z3', 'one assignment on a large cone'
+        if features.max_fan_in > WIDE_GATE:
+            return 'z3', 'wide gates'
+        return 'bdd', 'default'
+
+    def measured(self, features: QueryFeatures, strategy: Strategy,
+                 reason: str) -> tuple[Strategy, str]:
+        bucket = features.bucket()
+        other: Strategy = 'z3' if strategy == 'bdd' else 'bdd'
+        mean = self.stats.mean(bucket, strategy, MIN_SAMPLES)
+        other_mean = self.stats.mean(bucket, other, MIN_SAMPLES)
+        if mean is not None and other_mean is not None:
+            if other_mean < mean:
+                return other, f'{other} is faster here ' \
+                              f'({other_mean:.3g}s vs. {mean:.3g}s)'
+            return strategy, f'{reason}, confirmed by timings ' \
+                             f'({mean:.3g}s vs. {other_mean:.3g}s)'
+        if mean is not None and mean > EXPLORE_AFTER:
+            return other, f'{strategy} is slow here ({mean:.3g}s), ' \
+                          f'timing {other}'
+        return strategy, reason
+
+    def record(self, features: QueryFeatures, strategy: Strategy,
+               seconds: float):
+        logger.debug('Solved %s with %s in %.3fs', features.kind, strategy,
+                     seconds)
+        self.stats.record(features.bucket(), strategy, seconds)
+
+    def close(self):
+        self.stats.save()
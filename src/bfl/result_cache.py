@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from time import time
+
+from galileo.compact_fault_tree import encode_gate
+from galileo.fault_tree import FaultTree
+from utils.cache_dir import cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Environment variable with the path of the result cache. If it is set to an
+# empty string, results are not cached.
+CACHE_ENV = 'BFL_RESULT_CACHE'
+# Least recently used results are evicted once all results take more bytes
+# than this.
+MAX_CACHE_BYTES = 64 << 20
+# Part of every key, so that results of older versions are never returned
+# after the semantics of a statement changed.
+CACHE_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+'''
+
+
+def fault_tree_hash(fault_tree: FaultTree) -> str:
+    """
+    Returns a hash of the events, gates and edges of `fault_tree` that does
+    not depend on the order of the statements that defined it. Events are
+    hashed by name in sorted order, with the sorted names of their children.
+    """
+    h = hashlib.sha256(json.dumps(fault_tree.get_root()).encode())
+    for event in sorted(fault_tree.nodes):
+        gate = fault_tree.nodes[event].get('gate')
+        h.update(json.dumps(
+            [event, encode_gate(gate) if gate is not None else None,
+             sorted(fault_tree.predecessors(event))]).encode())
+    return h.hexdigest()
+
+
+def result_key(tree_hash: str, encoding: str, statement: str) -> str:
+    """Returns the key of the result of `statement`, which should be
+    normalized with `reconstruct`, on the fault tree with `tree_hash`."""
+    return hashlib.sha256(json.dumps(
+        [CACHE_VERSION, tree_hash, encoding, statement]).encode()).hexdigest()
+
+
+def encode_result(result) -> str:
+    """Encodes a result whose events are names, see `to_event_names`."""
+    match result:
+        case set():
+            return json.dumps({'set': sorted(sorted(vector)
+                                             for vector in result)})
+        case frozenset():
+            return json.dumps({'frozenset': sorted(result)})
+        case _:
+            return json.dumps(result)
+
+
+def decode_result(text: str):
+    result = json.loads(text)
+    match result:
+        case {'set': vectors}:
+            return {frozenset(vector) for vector in vectors}
+        case {'frozenset': events}:
+            return frozenset(events)
+        case _:
+            return result
+
+
+class ResultCache:
+    """
+    Results of statements, stored in an SQLite database at `path` so that
+    they are kept between runs and shared by processes. Results are stored
+    with event names instead of z3 declarations. Once they take more than
+    `max_bytes`, the least recently used results are evicted. `hits` and
+    `misses` count the lookups since the cache was opened, and are added to
+    the totals in the database by `close`. If the database cannot be used,
+    a warning is logged and nothing is cached.
+    """
+
+    def __init__(self, path: Path | str, max_bytes: int = MAX_CACHE_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.connection: sqlite3.Connection | None = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=10)
+            self.connection.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            self.disable(e)
+
+    def disable(self, error: Exception):
+        logger.warning('Cannot use the result cache %s: %s', self.path,
+                       error)
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+
+    def get(self, key: str):
+        """Returns the result stored under `key`, or `None` if there is
+        none."""
+        if self.connection is None:
+            return None
+        try:
+            with self.connection:
+                row = self.connection.execute(
+                    'SELECT result FROM results WHERE key = ?',
+                    (key,)).fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        'UPDATE results SET used = ? WHERE key = ?',
+                        (time(), key))
+        except sqlite3.Error as e:
+            self.disable(e)
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode_result(row[0])
+
+    def put(self, key: str, result):
+        """Stores `result`, which must not be `None`, and evicts the least
+        recently used results if the cache got too large."""
+        if self.connection is None:
+            return
+        text = encode_result(result)
+        size = len(key) + len(text)
+        if size > self.max_bytes:
+            return
+        try:
+            with self.connection:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                    (key, text, size, time()))
+                self.evict()
+        except sqlite3.Error as e:
+            self.disable(e)
+
+    def evict(self):
+        total, = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self.connection.execute(
+                'SELECT key, size FROM results ORDER BY used'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.connection.executemany('DELETE FROM results WHERE key = ?',
+                                    evicted)
+        logger.info('Evicted %d results from the result cache', len(evicted))
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of results, their size in bytes, and the hits
+        and misses of all runs, including this one."""
+        stats = {'results': 0, 'bytes': 0, 'hits': self.hits,
+                 'misses': self.misses}
+        if self.connection is None:
+            return stats
+        try:
+            stats['results'], stats['bytes'] = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) '
+                'FROM results').fetchone()
+            for name, value in self.connection.execute(
+                    'SELECT name, value FROM stats'):
+                stats[name] += value
+        except sqlite3.Error as e:
+            self.disable(e)
+        return stats
+
+    def clear(self):
+        """Removes all results and statistics."""
+        if self.connection is None:
+            return
+        try:
+            with self.connection:
+                self.connection.execute('DELETE FROM results')
+                self.connection.execute('DELETE FROM stats')
+        except sqlite3.Error as e:
+            self.disable(e)
+        self.hits = self.misses = 0
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            with self.connection:
+                for name, value in (('hits', self.hits),
+                                    ('misses', self.misses)):
+                    self.connection.execute(
+                        'INSERT INTO stats VALUES (?, ?) ON CONFLICT (name) '
+                        'DO UPDATE SET value = value + excluded.value',
+                        (name, value))
+        except sqlite3.Error as e:
+            logger.warning('Cannot save result cache statistics to %s: %s',
+                           self.path, e)
+        self.connection.close()
+        self.connection = None
+        self.hits = self.misses = 0
+
+
+def default_cache_path() -> Path | None:
+    path = os.environ.get(CACHE_ENV)
+    if path is None:
+        return cache_dir() / 'results.sqlite'
+    return Path(path) if path else None
+
+
+def open_result_cache(max_bytes: int = MAX_CACHE_BYTES) \
+        -> ResultCache | None:
+    """Opens the result cache at `default_cache_path`, unless caching is
+    disabled there."""
+    path = default_cache_path()
+    return None if path is None else ResultCache(path, max_bytes)
@@ -0,0 +1,78 @@
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Literal, TextIO
+
+from z3 import FuncDeclRef
+
+OutputFormat = Literal['text', 'jsonl']
+output_formats = {'text', 'jsonl'}
+
+
+@dataclass
+class StreamOptions:
+    """
+    Options for writing satisfaction sets while they are enumerated, instead
+    of collecting them in a set. `max_models` and `time_limit` (in seconds,
+    checked between status vectors) stop the enumeration early. With
+    `count_only`, only the number of status vectors is written.
+    """
+    file: TextIO = field(default_factory=lambda: sys.stdout)
+    format: OutputFormat = 'text'
+    max_models: int | None = None
+    count_only: bool = False
+    time_limit: float | None = None
+
+
+def limit_vectors(vectors: Iterable, options: StreamOptions) -> Iterator:
+    """
+    Yields `vectors` until `options.max_models` have been yielded or
+    `options.time_limit` has passed. Finding a vector can take long, so no
+    vector is requested once either limit is reached. The time limit is only
+    checked between vectors, so it does not interrupt the search for one.
+    """
+    if options.max_models is not None:
+        vectors = islice(vectors, options.max_models)
+    if options.time_limit is None:
+        yield from vectors
+        return
+    deadline = time.monotonic() + options.time_limit
+    iterator = iter(vectors)
+    while time.monotonic() <= deadline:
+        vector = next(iterator, None)
+        if vector is None:
+            return
+        yield vector
+
+
+def format_vector(vector: frozenset[FuncDeclRef]) -> list[str]:
+    return sorted(event.name() for event in vector)
+
+
+def write_vectors(vectors: Iterable[frozenset[FuncDeclRef]], statement: str,
+                  options: StreamOptions) -> int:
+    """
+    Writes each status vector of the satisfaction set of `statement` to
+    `options.file` as soon as it is found, and returns their number.
+    """
+    count = 0
+    for vector in limit_vectors(vectors, options):
+        count += 1
+        if options.count_only:
+            continue
+        if options.format == 'jsonl':
+            line = json.dumps({'statement': statement,
+                               'vector': format_vector(vector)})
+        else:
+            line = '{' + ', '.join(format_vector(vector)) + '}'
+        print(line, file=options.file, flush=True)
+
+    if options.count_only:
+        if options.format == 'jsonl':
+            print(json.dumps({'statement': statement, 'count': count}),
+                  file=options.file, flush=True)
+        else:
+            print(count, file=options.file, flush=True)
+    return count
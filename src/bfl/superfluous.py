@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from z3 import Solver, FreshBool, Bool, BoolRef, FuncDeclRef, Implies, Not, \
+    sat
+
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.fault_tree import FaultTree
+
+
+class SuperfluousnessChecker:
+    """
+    Decides for events of a fault tree whether they are superfluous, like
+    `\\sup`, but with a single solver for the whole tree. The solver defines a
+    variable for every event, once for the status vector and once for a copy
+    of it, like `DependencyChecker`. Whether the root depends on a basic event
+    is computed once and shared by all events.
+    """
+
+    def __init__(self, fault_tree: FaultTree):
+        self.fault_tree = fault_tree
+        self.root = fault_tree.get_root()
+        self.copies = {event: FreshBool(event) for event in fault_tree.nodes}
+        self.solver = Solver()
+
+        for event in fault_tree.nodes:
+            # noinspection PyCallingNonCallable
+            if fault_tree.in_degree(event) == 0:
+                continue
+            gate = fault_tree.nodes[event]['gate']
+            children = list(fault_tree.predecessors(event))
+            self.solver.add(Bool(event) == gate.to_z3(
+                *map(Bool, children), cardinality=fault_tree.cardinality))
+            self.solver.add(self.copies[event] == gate.to_z3(
+                *(self.copies[c] for c in children),
+                cardinality=fault_tree.cardinality))
+
+        self.selectors: dict[str, BoolRef] = {}
+        for be in fault_tree.get_basic_events():
+            selector = FreshBool('same')
+            self.solver.add(Implies(selector, Bool(be) == self.copies[be]))
+            self.selectors[be] = selector
+
+        self.differs: dict[str, BoolRef] = {}
+        self.results: dict[tuple[str, str], bool] = {}
+
+    def depends_on(self, event: str, be: str) -> bool:
+        """Returns whether changing `be` can change `event`."""
+        if (event, be) not in self.results:
+            if event not in self.differs:
+                differs = FreshBool('differs')
+                self.solver.add(Implies(
+                    differs, Bool(event) != self.copies[event]))
+                self.differs[event] = differs
+            assumptions = [selector for other, selector
+                           in self.selectors.items() if other != be]
+            self.results[(event, be)] = self.solver.check(
+                *assumptions, Bool(be), Not(self.copies[be]),
+                self.differs[event]) == sat
+        return self.results[(event, be)]
+
+    def basic_events_below(self, event: str) -> list[str]:
+        seen = {event}
+        stack = [event]
+        result = []
+        while stack:
+            current = stack.pop()
+            children = list(self.fault_tree.predecessors(current))
+            if not children:
+                result.append(current)
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return result
+
+    def is_superfluous(self, event: str) -> bool:
+        return not any(self.depends_on(self.root, be)
+                       and self.depends_on(event, be)
+                       for be in self.basic_events_below(event))
+
+
+def superfluous_events(fault_tree: FaultTree,
+                       jobs=1) -> frozenset[FuncDeclRef]:
+    """
+    Returns all superfluous basic and intermediate events of `fault_tree`.
+    With `jobs > 1`, the events are split over a pool of `jobs` processes,
+    which each build their own `SuperfluousnessChecker`.
+    """
+    if jobs <= 1:
+        checker = SuperfluousnessChecker(fault_tree)
+        return frozenset(Bool(event).decl() for event in fault_tree.nodes
+                         if checker.is_superfluous(event))
+
+    if not isinstance(fault_tree, CompactFaultTree):
+        graph, fault_tree = fault_tree, CompactFaultTree.from_graph(fault_tree)
+        fault_tree.cardinality = graph.cardinality
+    events = list(fault_tree.nodes)
+    chunks = [events[i::jobs] for i in range(jobs)]
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(fault_tree,)) as executor:
+        return frozenset(Bool(event).decl()
+                         for chunk in executor.map(_check_in_worker, chunks)
+                         for event in chunk)
+
+
+_worker_checker: SuperfluousnessChecker | None = None
+
+
+def _init_worker(fault_tree: CompactFaultTree):
+    global _worker_checker
+    _worker_checker = SuperfluousnessChecker(fault_tree)
+
+
+def _check_in_worker(events: list[str]) -> list[str]:
+    return [event for event in events if _worker_checker.is_superfluous(event)]
@@ -1,10 +1,10 @@
-from lark import Tree
-from networkx import is_directed_acyclic_graph
+from lark import Tree, Token
+from networkx import is_directed_acyclic_graph, find_cycle
 
 from galileo.exceptions import EventAlreadyDefinedError, NotAcyclicError, \
     NotExactlyOneRootError
 from galileo.fault_tree import FaultTree
-from gates import AndGate, OrGate, VotGate
+from gates import AndGate, OrGate, VotGate, Gate
 
 
 def get_galileo_tree(parse_tree: Tree):
@@ -28,10 +28,51 @@ def get_gate(gate: Tree):
             return VotGate('>=', int(gate.children[0]))
 
 
+def line_suffix(line: int | None):
+    return f' (line {line})' if line is not None else ''
+
+
+def add_intermediate_event(graph: FaultTree, defined_events: dict[str, int],
+                           event: str, gate: Gate, children: list[str],
+                           line: int | None = None):
+    if event in defined_events:
+        raise EventAlreadyDefinedError(
+            f'Event `{event}` is already defined{line_suffix(line)}')
+
+    graph.add_node(event, gate=gate)
+    for child in children:
+        graph.add_edge(child, event)
+    defined_events[event] = line
+
+
+def add_basic_event(graph: FaultTree, defined_events: dict[str, int],
+                    event: str, line: int | None = None):
+    if event in defined_events:
+        raise EventAlreadyDefinedError(
+            f'Event `{event}` is already defined{line_suffix(line)}')
+    graph.add_node(event)
+    defined_events[event] = line
+
+
+def check_fault_tree(graph: FaultTree, defined_events: dict[str, int]):
+    if not is_directed_acyclic_graph(graph):
+        cycle = [u for u, _ in find_cycle(graph)]
+        raise NotAcyclicError(
+            'Fault tree contains a cycle: ' + ', '.join(
+                f'`{e}`{line_suffix(defined_events.get(e))}' for e in cycle))
+
+    # noinspection PyTypeChecker
+    roots = [node for (node, out) in graph.out_degree if out == 0]
+    if len(roots) != 1:
+        raise NotExactlyOneRootError(
+            'Fault tree must have exactly one root, found: ' + ', '.join(
+                f'`{e}`{line_suffix(defined_events.get(e))}' for e in roots))
+
+
 def build_fault_tree(parse_tree: Tree):
     galileo_tree = get_galileo_tree(parse_tree)
     graph = FaultTree()
-    defined_events = set()
+    defined_events: dict[str, int] = {}
 
     for line in galileo_tree.children:
         match line.data:
@@ -39,27 +80,17 @@ def build_fault_tree(parse_tree: Tree):
                 graph.add_node(line.children[0].value)
 
             case 'intermediate_event':
+                event: Token
                 event, gate, *children = line.children
-                if event in defined_events:
-                    raise EventAlreadyDefinedError()
-
-                graph.add_node(event.value, gate=get_gate(gate))
-                for child in children:
-                    graph.add_edge(child.value, event.value)
-                defined_events.add(event)
+                add_intermediate_event(graph, defined_events, event.value,
+                                       get_gate(gate),
+                                       [child.value for child in children],
+                                       event.line)
 
             case 'basic_event':
                 event = line.children[0]
-                if event in defined_events:
-                    raise EventAlreadyDefinedError()
-                graph.add_node(event.value)
-                defined_events.add(event)
-
-    if not is_directed_acyclic_graph(graph):
-        raise NotAcyclicError()
-
-    # noinspection PyTypeChecker
-    if sum(1 for (node, out) in graph.out_degree if out == 0) != 1:
-        raise NotExactlyOneRootError()
+                add_basic_event(graph, defined_events, event.value,
+                                event.line)
 
+    check_fault_tree(graph, defined_events)
     return graph
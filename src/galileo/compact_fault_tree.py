@@ -0,0 +1,198 @@
+from array import array
+
+from z3 import BoolRef, Bool
+
+from galileo.fault_tree import FaultTree
+from gates import Gate, AndGate, OrGate, VotGate, CardinalityEncoding
+
+NO_GATE, AND_GATE, OR_GATE, VOT_GATE = range(4)
+VOT_COMPS = ('<', '<=', '==', '>=', '>')
+
+
+def encode_gate(gate: Gate | None) -> tuple[int, int, int]:
+    match gate:
+        case None:
+            return NO_GATE, 0, 0
+        case AndGate():
+            return AND_GATE, 0, 0
+        case OrGate():
+            return OR_GATE, 0, 0
+        case VotGate():
+            return VOT_GATE, VOT_COMPS.index(gate.comp), gate.k
+        case _:
+            raise ValueError(f'Unknown gate type: {type(gate)}')
+
+
+class NodeView:
+    """
+    Read-only view of the nodes of a `CompactFaultTree` that mimics
+    `nx.DiGraph.nodes`, i.e., `tree.nodes[event]['gate']` returns the gate of
+    an intermediate event.
+    """
+    __slots__ = ('_tree',)
+
+    def __init__(self, tree: 'CompactFaultTree'):
+        self._tree = tree
+
+    def __contains__(self, node):
+        return node in self._tree.ids
+
+    def __iter__(self):
+        return iter(self._tree.names)
+
+    def __len__(self):
+        return len(self._tree.names)
+
+    def __getitem__(self, node: str) -> dict[str, Gate]:
+        gate = self._tree.get_gate(node)
+        return {} if gate is None else {'gate': gate}
+
+
+class CompactFaultTree:
+    """
+    Immutable fault tree that stores its nodes as integer IDs. The children of
+    node `i` are `children[child_offsets[i]:child_offsets[i + 1]]`, and the
+    gate of node `i` is described by `gate_types[i]`, `vot_comps[i]` and
+    `vot_ks[i]`. The arrays can be any sequence of integers, e.g., `array`s or
+    `memoryview`s of a memory-mapped file. The basic events and the root are
+    computed once, on construction, unless they are given.
+
+    This class offers the same query methods as `FaultTree`, so both can be
+    used interchangeably when building and executing BFL formulas.
+    """
+    __slots__ = ('names', 'ids', 'gate_types', 'vot_comps', 'vot_ks',
+                 'child_offsets', 'children', 'basic_event_ids', 'root_id',
+                 '_basic_events', '_basic_events_set', '_basic_events_bools',
+                 '_gates', 'formulas', 'definitions', 'cardinality',
+                 '__weakref__')
+
+    def __init__(self, names: list[str], gate_types: array, vot_comps: array,
+                 vot_ks: array, child_offsets: array, children: array,
+                 basic_event_ids: array | None = None,
+                 root_id: int | None = None):
+        self.names = tuple(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.gate_types = gate_types
+        self.vot_comps = vot_comps
+        self.vot_ks = vot_ks
+        self.child_offsets = child_offsets
+        self.children = children
+
+        if basic_event_ids is None:
+            basic_event_ids = array('i', (
+                i for i in range(len(self.names))
+                if child_offsets[i] == child_offsets[i + 1]))
+        if root_id is None:
+            has_parent = bytearray(len(self.names))
+            for child in children:
+                has_parent[child] = 1
+            root_id = next((i for i, p in enumerate(has_parent) if not p), -1)
+        self.basic_event_ids = basic_event_ids
+        self.root_id = root_id
+
+        self._basic_events = tuple(
+            self.names[i] for i in self.basic_event_ids)
+        self._basic_events_set = frozenset(self._basic_events)
+        self._basic_events_bools: tuple[BoolRef, ...] | None = None
+        self._gates: dict[tuple[int, int, int], Gate] = {}
+        # Formulas of the events in this tree, filled by `event_to_formula`
+        self.formulas: dict[str, BoolRef] = {}
+        # Tseitin definitions of the intermediate events in this tree, filled
+        # by `event_to_var`
+        self.definitions: dict[str, tuple[BoolRef, list[str]]] = {}
+        # Encoding of voting gates, see `FaultTree.cardinality`
+        self.cardinality: CardinalityEncoding = 'pb'
+
+    @classmethod
+    def from_graph(cls, graph: FaultTree) -> 'CompactFaultTree':
+        names = list(graph.nodes)
+        ids = {name: i for i, name in enumerate(names)}
+        gate_types, vot_comps, vot_ks = array('b'), array('b'), array('i')
+        child_offsets, children = array('i', [0]), array('i')
+
+        for name in names:
+            gate_type, comp, k = encode_gate(graph.nodes[name].get('gate'))
+            gate_types.append(gate_type)
+            vot_comps.append(comp)
+            vot_ks.append(k)
+            children.extend(ids[child] for child in graph.predecessors(name))
+            child_offsets.append(len(children))
+
+        return cls(names, gate_types, vot_comps, vot_ks, child_offsets,
+                   children)
+
+    def __reduce__(self):
+        # The caches contain z3 objects, which cannot be pickled, and the
+        # arrays can be views of a memory-mapped file, so they are copied.
+        return _restore, (self.names, array('b', self.gate_types),
+                          array('b', self.vot_comps), array('i', self.vot_ks),
+                          array('i', self.child_offsets),
+                          array('i', self.children),
+                          array('i', self.basic_event_ids), self.root_id,
+                          self.cardinality)
+
+    @property
+    def nodes(self) -> NodeView:
+        return NodeView(self)
+
+    def __contains__(self, node):
+        return node in self.ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def child_ids(self, node_id: int) -> array:
+        return self.children[
+               self.child_offsets[node_id]:self.child_offsets[node_id + 1]]
+
+    def in_degree(self, node: str) -> int:
+        i = self.ids[node]
+        return self.child_offsets[i + 1] - self.child_offsets[i]
+
+    def predecessors(self, node: str) -> list[str]:
+        names = self.names
+        return [names[child] for child in self.child_ids(self.ids[node])]
+
+    def get_gate(self, node: str) -> Gate | None:
+        i = self.ids[node]
+        key = (self.gate_types[i], self.vot_comps[i], self.vot_ks[i])
+        if key not in self._gates:
+            self._gates[key] = self._decode_gate(*key)
+        return self._gates[key]
+
+    @staticmethod
+    def _decode_gate(gate_type: int, comp: int, k: int) -> Gate | None:
+        if gate_type == AND_GATE:
+            return AndGate()
+        if gate_type == OR_GATE:
+            return OrGate()
+        if gate_type == VOT_GATE:
+            return VotGate(VOT_COMPS[comp], k)
+        return None
+
+    def get_basic_events(self) -> list[str]:
+        return list(self._basic_events)
+
+    def get_basic_events_set(self) -> frozenset[str]:
+        return self._basic_events_set
+
+    def get_basic_events_bools(self) -> list[BoolRef]:
+        if self._basic_events_bools is None:
+            self._basic_events_bools = tuple(map(Bool, self._basic_events))
+        return list(self._basic_events_bools)
+
+    def get_root(self) -> str:
+        if self.root_id < 0:
+            raise ValueError('Fault tree does not have a root')
+        return self.names[self.root_id]
+
+
+def _restore(names, gate_types, vot_comps, vot_ks, child_offsets, children,
+             basic_event_ids, root_id, cardinality) -> CompactFaultTree:
+    tree = CompactFaultTree(names, gate_types, vot_comps, vot_ks,
+                            child_offsets, children, basic_event_ids, root_id)
+    tree.cardinality = cardinality
+    return tree
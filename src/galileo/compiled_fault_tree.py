@@ -0,0 +1,135 @@
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import TextIO
+
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.stream_graph import GalileoReader, read_fault_tree
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BFLTREE\0'
+VERSION = 1
+COMPILED_EXTENSION = '.bflc'
+# magic, version, byte order, source hash, number of nodes, number of edges,
+# number of basic events, root id, size of the names section
+HEADER = struct.Struct('<8sHcx32sIIIiI')
+BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+assert array('i').itemsize == 4
+
+
+def compiled_path(source_path: str) -> str:
+    return os.path.splitext(source_path)[0] + COMPILED_EXTENSION
+
+
+def write_compiled(tree: CompactFaultTree, path: str, source_hash: str):
+    """
+    Writes `tree` to `path` in the following layout, after the header:
+    `child_offsets`, `children`, `basic_event_ids` and `vot_ks` as 32-bit
+    integers, `gate_types` and `vot_comps` as 8-bit integers, and finally the
+    newline-separated event names.
+    """
+    names = '\n'.join(tree.names).encode()
+    header = HEADER.pack(MAGIC, VERSION, BYTE_ORDER, bytes.fromhex(source_hash),
+                         len(tree.names), len(tree.children),
+                         len(tree.basic_event_ids), tree.root_id, len(names))
+
+    # Write to a temporary file first, so a running query never maps a
+    # partially written file.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for section in (tree.child_offsets, tree.children,
+                        tree.basic_event_ids, tree.vot_ks, tree.gate_types,
+                        tree.vot_comps):
+            f.write(section)
+        f.write(names)
+    os.replace(tmp_path, path)
+
+
+def load_compiled(path: str,
+                  source_hash: str | None = None) -> CompactFaultTree | None:
+    """
+    Memory-maps the compiled fault tree at `path`. Returns `None` if the file
+    does not exist, has an unsupported format, or was compiled from a source
+    other than the one with hash `source_hash`.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, file_hash, n_nodes, n_edges, \
+            n_basic_events, root_id, names_size = HEADER.unpack_from(mm)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    expected_size = HEADER.size + names_size + 2 * n_nodes \
+        + 4 * (2 * n_nodes + 1 + n_edges + n_basic_events)
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER \
+            or (source_hash is not None and file_hash.hex() != source_hash) \
+            or len(mm) != expected_size:
+        mm.close()
+        return None
+
+    view = memoryview(mm)
+    offset = HEADER.size
+
+    def section(length: int, fmt: str):
+        nonlocal offset
+        size = length * struct.calcsize(fmt)
+        result = view[offset:offset + size].cast(fmt)
+        offset += size
+        return result
+
+    child_offsets = section(n_nodes + 1, 'i')
+    children = section(n_edges, 'i')
+    basic_event_ids = section(n_basic_events, 'i')
+    vot_ks = section(n_nodes, 'i')
+    gate_types = section(n_nodes, 'b')
+    vot_comps = section(n_nodes, 'b')
+    names = bytes(view[offset:]).decode().split('\n')
+    return CompactFaultTree(names, gate_types, vot_comps, vot_ks,
+                            child_offsets, children, basic_event_ids, root_id)
+
+
+def compile_fault_tree(source_path: str, output_path: str | None = None):
+    output_path = output_path or compiled_path(source_path)
+    with open(source_path) as f:
+        reader = GalileoReader(f)
+        fault_tree = CompactFaultTree.from_graph(read_fault_tree(reader))
+    write_compiled(fault_tree, output_path, reader.hexdigest())
+    return fault_tree, output_path
+
+
+def load_fault_tree(file: TextIO, compiled_file: str | None = None) \
+        -> tuple[CompactFaultTree, str]:
+    """
+    Loads the fault tree at the start of `file`, and returns it together with
+    the remaining text of the file. If `compiled_file` exists and was compiled
+    from the same fault tree text, the fault tree is memory-mapped from it
+    instead. If the text has changed since, `compiled_file` is recompiled,
+    unless it cannot be written.
+    """
+    reader = GalileoReader(file)
+    if compiled_file is None or not os.path.exists(compiled_file):
+        return CompactFaultTree.from_graph(read_fault_tree(reader)), \
+            reader.rest
+
+    reader.skip()
+    fault_tree = load_compiled(compiled_file, reader.hexdigest())
+    if fault_tree is not None:
+        return fault_tree, reader.rest
+
+    file.seek(0)
+    reader = GalileoReader(file)
+    fault_tree = CompactFaultTree.from_graph(read_fault_tree(reader))
+    try:
+        write_compiled(fault_tree, compiled_file, reader.hexdigest())
+    except OSError as e:
+        # The parsed fault tree can still be used.
+        logger.warning('Cannot recompile the fault tree to %s: %s',
+                       compiled_file, e)
+    return fault_tree, reader.rest
@@ -8,3 +8,7 @@ class NotAcyclicError(Exception):
 
 class NotExactlyOneRootError(Exception):
     pass
+
+
+class GalileoSyntaxError(Exception):
+    pass
@@ -1,8 +1,22 @@
 import networkx as nx
 from z3 import BoolRef, Bool
 
+from gates import CardinalityEncoding
+
 
 class FaultTree(nx.DiGraph):
+    def __init__(self, incoming_graph_data=None, **attr):
+        super().__init__(incoming_graph_data, **attr)
+        # Formulas of the events in this tree, filled by `event_to_formula`.
+        # Events must not be changed after their formula has been computed.
+        self.formulas: dict[str, BoolRef] = {}
+        # Tseitin definitions of the intermediate events in this tree, filled
+        # by `event_to_var`
+        self.definitions: dict[str, tuple[BoolRef, list[str]]] = {}
+        # Encoding of voting gates. It must not be changed after formulas have
+        # been computed, as they are cached in the tables above.
+        self.cardinality: CardinalityEncoding = 'pb'
+
     def get_basic_events(self) -> list[str]:
         return [node for (node, in_deg) in self.in_degree if in_deg == 0]
 
@@ -0,0 +1,149 @@
+import hashlib
+import re
+from typing import TextIO, Iterator
+
+from galileo.build_graph import add_intermediate_event, add_basic_event, \
+    check_fault_tree
+from galileo.exceptions import GalileoSyntaxError
+from galileo.fault_tree import FaultTree
+from gates import AndGate, OrGate, VotGate, Gate
+
+# These mirror the terminals in `parser/grammar.lark`.
+EVENT_NAME = r'[A-Za-z_][A-Za-z0-9_]*'
+TLE_RE = re.compile(rf'toplevel\s+({EVENT_NAME})', re.IGNORECASE)
+EVENT_RE = re.compile(EVENT_NAME)
+GATE_RE = re.compile(
+    r'(?P<and>and)'
+    r'|(?P<or>or)'
+    r'|(?P<of_k>\d+)\s*of\s*\d+'
+    r'|vot\s*(?P<vot_comp><=|==|>=|<|>)\s*(?P<vot_k>\d+)',
+    re.IGNORECASE)
+SEPARATOR = '---'
+
+
+class GalileoReader:
+    """
+    Reads the Galileo section of a BFL file one statement at a time. After all
+    statements have been read, `rest` contains the text after the `---`
+    separator, and `hexdigest()` returns the SHA-256 hash of the text before
+    it.
+    """
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.rest: str | None = None
+        self.hash = hashlib.sha256()
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+    def skip(self):
+        """Reads up to the separator without splitting statements."""
+        for line in self.file:
+            if SEPARATOR in line:
+                index = line.split('//', 1)[0].find(SEPARATOR)
+                if index >= 0:
+                    self.hash.update(line[:index].encode())
+                    self.rest = line[index + len(SEPARATOR):] \
+                        + self.file.read()
+                    return
+            self.hash.update(line.encode())
+        raise GalileoSyntaxError(f'Expected `{SEPARATOR}` after fault tree')
+
+    def statements(self) -> Iterator[tuple[str, int]]:
+        buffer = []
+        start_line = None
+
+        for line_no, line in enumerate(self.file, 1):
+            code = line.split('//', 1)[0]
+            parts = code.split(';')
+
+            for i, part in enumerate(parts):
+                if start_line is None and part.lstrip().startswith(SEPARATOR):
+                    # Everything after the separator belongs to the BFL
+                    # section, so it is handed back unparsed.
+                    index = line.index(SEPARATOR)
+                    self.hash.update(line[:index].encode())
+                    self.rest = line[index + len(SEPARATOR):] \
+                        + self.file.read()
+                    return
+                if start_line is None and part.strip():
+                    start_line = line_no
+                buffer.append(part)
+
+                if i < len(parts) - 1:
+                    yield ' '.join(buffer).strip(), start_line or line_no
+                    buffer.clear()
+                    start_line = None
+
+            self.hash.update(line.encode())
+
+        if start_line is not None:
+            raise GalileoSyntaxError(
+                f'Expected `;` at end of statement (line {start_line})')
+        raise GalileoSyntaxError(f'Expected `{SEPARATOR}` after fault tree')
+
+
+def parse_gate(text: str, line: int) -> tuple[Gate, str]:
+    match = GATE_RE.match(text)
+    if match is None:
+        raise GalileoSyntaxError(f'Expected gate, got `{text}` (line {line})')
+    if match['and']:
+        gate = AndGate()
+    elif match['or']:
+        gate = OrGate()
+    elif match['of_k']:
+        gate = VotGate('>=', int(match['of_k']))
+    else:
+        gate = VotGate(match['vot_comp'], int(match['vot_k']))
+    return gate, text[match.end():]
+
+
+def stream_fault_tree(file: TextIO) -> tuple[FaultTree, str]:
+    """
+    Builds a fault tree from the Galileo section at the start of `file`
+    without constructing a parse tree. Returns the fault tree and the
+    remaining text of the file, which contains the BFL statements.
+    """
+    reader = GalileoReader(file)
+    return read_fault_tree(reader), reader.rest
+
+
+def read_fault_tree(reader: GalileoReader) -> FaultTree:
+    statements = reader.statements()
+    graph = FaultTree()
+    defined_events: dict[str, int] = {}
+
+    first = next(statements, None)
+    tle = TLE_RE.fullmatch(first[0]) if first is not None else None
+    if tle is None:
+        raise GalileoSyntaxError(
+            'Expected `toplevel <event>;` as first statement '
+            f'(line {first[1] if first is not None else 1})')
+    graph.add_node(tle[1])
+
+    for statement, line in statements:
+        event = EVENT_RE.match(statement)
+        if event is None:
+            raise GalileoSyntaxError(
+                f'Expected event name, got `{statement}` (line {line})')
+
+        rest = statement[event.end():].lstrip()
+        if not rest:
+            add_basic_event(graph, defined_events, event[0], line)
+            continue
+
+        gate, rest = parse_gate(rest, line)
+        children = rest.split()
+        if not children:
+            raise GalileoSyntaxError(
+                f'Event `{event[0]}` has no children (line {line})')
+        for child in children:
+            if not EVENT_RE.fullmatch(child):
+                raise GalileoSyntaxError(
+                    f'Invalid event name `{child}` (line {line})')
+        add_intermediate_event(graph, defined_events, event[0], gate,
+                               children, line)
+
+    check_fault_tree(graph, defined_events)
+    return graph
@@ -1,3 +1,4 @@
+from .cardinality import *
 from .and_gate import *
 from .gate import *
 from .or_gate import *
@@ -1,8 +1,12 @@
 from z3 import And
 
+from gates.cardinality import CardinalityEncoding
 from gates.gate import Gate
 
 
 class AndGate(Gate):
-    def to_z3(self, *args):
+    def to_z3(self, *args, cardinality: CardinalityEncoding = 'pb'):
         return And(*args)
+
+    def evaluate(self, *args: bool) -> bool:
+        return all(args)
@@ -0,0 +1,188 @@
+from typing import Literal
+
+from z3 import And, Or, Not, BoolRef, BoolVal, AtLeast, AtMost
+
+CardinalityEncoding = Literal['pb', 'sequential', 'totalizer', 'sorting',
+                              'auto']
+cardinality_encodings = {'pb', 'sequential', 'totalizer', 'sorting', 'auto'}
+# `auto` uses a sequential counter if it needs at most this many gates, and
+# pseudo-Boolean atoms otherwise.
+AUTO_MAX_COUNTER_SIZE = 2000
+
+# The encodings below are circuits over the inputs without auxiliary
+# variables, so they can be used anywhere in a quantified formula. Subterms
+# are shared, so their size is the number of gates in the circuit. `None`
+# stands for `False`, which keeps the circuits free of constants.
+
+
+def _or(a: BoolRef | None, b: BoolRef | None) -> BoolRef | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return Or(a, b)
+
+
+def _and(a: BoolRef | None, b: BoolRef | None) -> BoolRef | None:
+    if a is None or b is None:
+        return None
+    return And(a, b)
+
+
+def sequential_counter(args: list[BoolRef], m: int) -> list[BoolRef | None]:
+    """
+    Returns `counts`, where `counts[j]` holds iff at least `j + 1` of `args`
+    hold, for `j < m`. Uses `O(len(args) * m)` gates.
+    """
+    counts: list[BoolRef | None] = [None] * m
+    for x in args:
+        for j in range(m - 1, 0, -1):
+            counts[j] = _or(counts[j], _and(x, counts[j - 1]))
+        counts[0] = _or(counts[0], x)
+    return counts
+
+
+def totalizer(args: list[BoolRef], m: int) -> list[BoolRef | None]:
+    """
+    Same as `sequential_counter`, but merges the counts of both halves of
+    `args` in a balanced tree. Uses `O(len(args) * m)` gates, with depth
+    `O(log(len(args)) + m)`.
+    """
+    layer = [[x] for x in args] or [[]]
+    while len(layer) > 1:
+        merged = [_merge_counts(a, b, m)
+                  for a, b in zip(layer[::2], layer[1::2])]
+        if len(layer) % 2:
+            merged.append(layer[-1])
+        layer = merged
+    counts = layer[0][:m]
+    return counts + [None] * (m - len(counts))
+
+
+def _merge_counts(a: list[BoolRef | None], b: list[BoolRef | None],
+                  m: int) -> list[BoolRef | None]:
+    result = []
+    for j in range(min(len(a) + len(b), m)):
+        # At least `j + 1` hold if `p` hold in `a` and `j + 1 - p` in `b`.
+        count = _or(a[j] if j < len(a) else None,
+                    b[j] if j < len(b) else None)
+        for p in range(max(1, j + 1 - len(b)), min(j + 1, len(a) + 1)):
+            count = _or(count, _and(a[p - 1], b[j - p]))
+        result.append(count)
+    return result
+
+
+def sorting_network(args: list[BoolRef], m: int) -> list[BoolRef | None]:
+    """
+    Same as `sequential_counter`, but sorts `args` in descending order with
+    Batcher's odd-even merge sort. Uses `O(n log(n)^2)` gates for
+    `n = len(args)`, independent of `m`.
+    """
+    n = 1
+    while n < len(args):
+        n *= 2
+    values: list[BoolRef | None] = list(args) + [None] * (n - len(args))
+
+    def compare(i: int, j: int):
+        values[i], values[j] = _or(values[i], values[j]), \
+            _and(values[i], values[j])
+
+    # Iterative formulation of the odd-even merge sort network
+    p = 1
+    while p < n:
+        k = p
+        while k >= 1:
+            for j in range(k % p, n - k, 2 * k):
+                for i in range(min(k, n - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        compare(i + j, i + j + k)
+            k //= 2
+        p *= 2
+
+    counts = values[:m]
+    return counts + [None] * (m - len(counts))
+
+
+COUNTERS = {
+    'sequential': sequential_counter,
+    'totalizer': totalizer,
+    'sorting': sorting_network,
+}
+
+
+def at_least(args: list[BoolRef], thresholds: list[int],
+             encoding: CardinalityEncoding = 'pb') -> list[BoolRef]:
+    """
+    Returns, for every `t` in `thresholds`, a formula that holds iff at least
+    `t` of `args` hold.
+    """
+    n = len(args)
+    positive = [t for t in thresholds if 0 < t <= n]
+    if not positive:
+        return [BoolVal(t <= 0) for t in thresholds]
+    # At least `t` of `args` hold iff at most `n - t` of their negations
+    # hold, which needs a smaller counter when `t` is large.
+    direct_size, negated_size = max(positive), n - min(positive) + 1
+
+    if encoding == 'auto':
+        encoding = 'sequential' \
+            if n * min(direct_size, negated_size) <= AUTO_MAX_COUNTER_SIZE \
+            else 'pb'
+    if encoding == 'pb':
+        return [AtLeast(*args, t) for t in thresholds]
+    if encoding not in COUNTERS:
+        raise ValueError(f'Unknown cardinality encoding `{encoding}`')
+
+    counter = COUNTERS[encoding]
+    if direct_size <= negated_size:
+        counts = counter(args, direct_size)
+
+        def count(t: int) -> BoolRef:
+            return counts[t - 1]
+    else:
+        negated_counts = counter([Not(x) for x in args], negated_size)
+
+        def count(t: int) -> BoolRef:
+            return Not(negated_counts[n - t])
+
+    return [BoolVal(True) if t <= 0 else BoolVal(False) if t > n else count(t)
+            for t in thresholds]
+
+
+def cardinality_constraint(args: list[BoolRef], comp: str, k: int,
+                           encoding: CardinalityEncoding = 'pb') -> BoolRef:
+    """Returns a formula that holds iff the number of `args` that hold
+    compares to `k` according to `comp`."""
+    if encoding == 'pb':
+        return _pb_constraint(args, comp, k)
+
+    match comp:
+        case '<':
+            return Not(at_least(args, [k], encoding)[0])
+        case '<=':
+            return Not(at_least(args, [k + 1], encoding)[0])
+        case '>':
+            return at_least(args, [k + 1], encoding)[0]
+        case '>=':
+            return at_least(args, [k], encoding)[0]
+        case '==':
+            lower, upper = at_least(args, [k, k + 1], encoding)
+            return And(lower, Not(upper))
+        case _:
+            raise ValueError('Unknown comp')
+
+
+def _pb_constraint(args: list[BoolRef], comp: str, k: int) -> BoolRef:
+    match comp:
+        case '<':
+            return AtMost(*args, k - 1)
+        case '<=':
+            return AtMost(*args, k)
+        case '>':
+            return AtLeast(*args, k + 1)
+        case '>=':
+            return AtLeast(*args, k)
+        case '==':
+            return And(AtLeast(*args, k), AtMost(*args, k))
+        case _:
+            raise ValueError('Unknown comp')
@@ -1,3 +1,14 @@
+from gates.cardinality import CardinalityEncoding
+
+
 class Gate:
-    def to_z3(self, *args):
+    def to_z3(self, *args, cardinality: CardinalityEncoding = 'pb'):
         raise NotImplementedError('Implement this method in a subclass')
+
+    def evaluate(self, *args: bool) -> bool:
+        raise NotImplementedError('Implement this method in a subclass')
+
+    def is_monotone(self) -> bool:
+        """Returns whether the gate cannot become false when more of its
+        inputs hold."""
+        return True
@@ -1,8 +1,11 @@
 from z3 import Or
 
-from gates import Gate
+from gates import Gate, CardinalityEncoding
 
 
 class OrGate(Gate):
-    def to_z3(self, *args):
+    def to_z3(self, *args, cardinality: CardinalityEncoding = 'pb'):
         return Or(*args)
+
+    def evaluate(self, *args: bool) -> bool:
+        return any(args)
@@ -1,8 +1,6 @@
 from typing import Literal
 
-from z3 import AtMost, AtLeast, And
-
-from gates import Gate
+from gates import Gate, CardinalityEncoding, cardinality_constraint
 
 allowed_comparisons = {'<', '<=', '==', '>=', '>'}
 VotComp = Literal['<', '<=', '==', '>=', '>']
@@ -16,18 +14,27 @@ class VotGate(Gate):
         self.comp = comp
         self.k = k
 
-    def to_z3(self, *args):
-        match self.comp:
-            case '<':
-                return AtMost(*args, self.k - 1)
-            case '<=':
-                return AtMost(*args, self.k)
-            case '>':
-                return AtLeast(*args, self.k + 1)
-            case '>=':
-                return AtLeast(*args, self.k)
-            case '==':
-                return And(AtLeast(*args, self.k), AtMost(*args, self.k))
-            case _:
-                raise ValueError('Unknown comp')
-
+    def to_z3(self, *args, cardinality: CardinalityEncoding = 'pb'):
+        return cardinality_constraint(list(args), self.comp, self.k,
+                                      cardinality)
+
+    def evaluate(self, *args: bool) -> bool:
+        return compare(sum(args), self.comp, self.k)
+
+    def is_monotone(self) -> bool:
+        return self.comp in ('>=', '>')
+
+
+def compare(n: int, comp: VotComp, k: int) -> bool:
+    match comp:
+        case '<':
+            return n < k
+        case '<=':
+            return n <= k
+        case '>':
+            return n > k
+        case '>=':
+            return n >= k
+        case '==':
+            return n == k
+    raise ValueError('Unknown comp')
@@ -1,12 +1,53 @@
+import os
 from os import path
+from typing import Literal
 
 from lark import Lark, Token, Tree
 
-with open(path.join(path.dirname(__file__), "grammar.lark")) as g:
-    parser = Lark(g,
-                  start=['start', 'galileo', 'phi', 'bfl_statement'],
-                  maybe_placeholders=False)
+from utils.cache_dir import cache_dir
 
+GRAMMAR_PATH = path.join(path.dirname(__file__), 'grammar.lark')
+# Lark prefixes the cache file with a hash of the grammar text and the parser
+# options, so the cache is rebuilt automatically when `grammar.lark` changes.
+CACHE_PATH = str(cache_dir() / 'grammar.lalr.cache')
+START_SYMBOLS = ['start', 'galileo', 'bfl', 'phi', 'bfl_statement']
 
-def parse(text: str) -> Tree[Token]:
-    return parser.parse(text, 'start')
+ParserType = Literal['lalr', 'earley']
+parser_types = {'lalr', 'earley'}
+
+
+def build_parser(parser_type: ParserType = 'lalr',
+                 cache_path: str | None = CACHE_PATH) -> Lark:
+    if parser_type not in parser_types:
+        raise ValueError(f'Unknown parser type `{parser_type}`')
+    if cache_path:
+        try:
+            os.makedirs(path.dirname(path.abspath(cache_path)), exist_ok=True)
+        except OSError:
+            # The parser is still built, it is just not cached.
+            cache_path = None
+
+    with open(GRAMMAR_PATH) as g:
+        if parser_type == 'lalr':
+            return Lark(g, start=START_SYMBOLS, maybe_placeholders=False,
+                        parser='lalr', cache=cache_path or False)
+        return Lark(g, start=START_SYMBOLS, maybe_placeholders=False,
+                    parser='earley')
+
+
+parser = build_parser()
+_parsers: dict[str, Lark] = {'lalr': parser}
+
+
+def get_parser(parser_type: ParserType = 'lalr') -> Lark:
+    if parser_type not in _parsers:
+        _parsers[parser_type] = build_parser(parser_type)
+    return _parsers[parser_type]
+
+
+def parse(text: str, parser_type: ParserType = 'lalr') -> Tree[Token]:
+    return get_parser(parser_type).parse(text, 'start')
+
+
+def parse_bfl(text: str, parser_type: ParserType = 'lalr') -> Tree[Token]:
+    return get_parser(parser_type).parse(text, 'bfl')
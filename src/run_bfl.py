@@ -1,35 +1,311 @@
 import argparse
+import logging
 import sys
+from typing import TextIO
 
 from lark import UnexpectedInput
 
+from bfl.backend import BackendName, backend_names
+from bfl.build_bfl import Encoding, encodings
+from bfl.exceptions import BFLError
 from bfl.execute_bfl import execute_bfl
+from bfl.result_cache import ResultCache, MAX_CACHE_BYTES, \
+    default_cache_path, open_result_cache
+from bfl.satisfaction_stream import StreamOptions, output_formats
 from galileo.build_graph import build_fault_tree
-from parser.parser import parse
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.compiled_fault_tree import compiled_path, compile_fault_tree, \
+    load_fault_tree, COMPILED_EXTENSION
+from galileo.exceptions import GalileoSyntaxError
+from gates import CardinalityEncoding, cardinality_encodings
+from parser.parser import parse, parse_bfl, ParserType, parser_types, parser
 
 
-def main(bfl_text: str):
+def main(bfl_text: str, parser_type: ParserType = 'lalr',
+         encoding: Encoding = 'inline',
+         cardinality: CardinalityEncoding = 'pb', jobs=1,
+         stream: StreamOptions | None = None, backend: BackendName = 'z3'):
     try:
-        return execute_str(bfl_text, True)
+        return execute_str(bfl_text, True, parser_type, encoding, cardinality,
+                           jobs, stream, backend)
     except UnexpectedInput as e:
         print(f'Parse error:\n{e}\n', file=sys.stderr)
 
 
-def execute_str(bfl_text: str, print_output=False):
-    parse_tree = parse(bfl_text)
-    fault_tree = build_fault_tree(parse_tree)
-    return execute_bfl(parse_tree, fault_tree, print_output)
+def main_file(file: TextIO, parser_type: ParserType = 'lalr',
+              compiled_file: str | None = None,
+              encoding: Encoding = 'inline',
+              cardinality: CardinalityEncoding = 'pb', jobs=1,
+              stream: StreamOptions | None = None,
+              backend: BackendName = 'z3',
+              cache: ResultCache | None = None):
+    try:
+        return execute_file(file, True, parser_type, compiled_file, encoding,
+                            cardinality, jobs, stream, backend, cache)
+    except (UnexpectedInput, GalileoSyntaxError) as e:
+        print(f'Parse error:\n{e}\n', file=sys.stderr)
 
 
-if __name__ == '__main__':
+def main_compile(source_path: str, output_path: str | None = None):
+    try:
+        fault_tree, output_path = compile_fault_tree(source_path, output_path)
+    except GalileoSyntaxError as e:
+        print(f'Parse error:\n{e}\n', file=sys.stderr)
+        return
+    print(f'Compiled {len(fault_tree)} events to {output_path}')
+
+
+def main_check(file: TextIO, formula: str, vectors_path: str,
+               output_path: str | None = None,
+               compiled_file: str | None = None):
+    """
+    Prints how many status vectors in `vectors_path` satisfy `formula` on the
+    fault tree of `file`, and writes the result of every vector to
+    `output_path` if it is given. NumPy is only needed for this command.
+    """
+    from bfl.bulk import check_vectors, load_vectors
+    import numpy as np
+
+    try:
+        fault_tree, _ = load_fault_tree(file, compiled_file)
+        phi = parser.parse(formula, 'phi')
+    except (UnexpectedInput, GalileoSyntaxError) as e:
+        print(f'Parse error:\n{e}\n', file=sys.stderr)
+        return
+    try:
+        result = check_vectors(phi, fault_tree,
+                               load_vectors(vectors_path, fault_tree))
+    except (BFLError, OSError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return
+
+    if output_path == '-':
+        np.savetxt(sys.stdout, result, fmt='%d')
+    elif output_path is not None:
+        if output_path.endswith('.npy'):
+            np.save(output_path, result)
+        else:
+            np.savetxt(output_path, result, fmt='%d')
+    if output_path != '-':
+        print(f'{np.count_nonzero(result)} of {len(result)} status vectors '
+              f'satisfy the formula')
+    return result
+
+
+def execute_str(bfl_text: str, print_output=False,
+                parser_type: ParserType = 'lalr',
+                encoding: Encoding = 'inline',
+                cardinality: CardinalityEncoding = 'pb', jobs=1,
+                stream: StreamOptions | None = None,
+                backend: BackendName = 'z3',
+                cache: ResultCache | None = None):
+    parse_tree = parse(bfl_text, parser_type)
+    fault_tree = CompactFaultTree.from_graph(build_fault_tree(parse_tree))
+    fault_tree.cardinality = cardinality
+    return execute_bfl(parse_tree, fault_tree, print_output, encoding, jobs,
+                       stream, backend, cache)
+
+
+def execute_file(file: TextIO, print_output=False,
+                 parser_type: ParserType = 'lalr',
+                 compiled_file: str | None = None,
+                 encoding: Encoding = 'inline',
+                 cardinality: CardinalityEncoding = 'pb', jobs=1,
+                 stream: StreamOptions | None = None,
+                 backend: BackendName = 'z3',
+                 cache: ResultCache | None = None):
+    """
+    Like `execute_str`, but the fault tree is read statement by statement from
+    `file`, or loaded from `compiled_file` if it is up-to-date. Only the BFL
+    statements are parsed with the grammar.
+    """
+    fault_tree, bfl_text = load_fault_tree(file, compiled_file)
+    fault_tree.cardinality = cardinality
+    parse_tree = parse_bfl(bfl_text, parser_type)
+    return execute_bfl(parse_tree, fault_tree, print_output, encoding, jobs,
+                       stream, backend, cache)
+
+
+def compile_command(argv: list[str]):
     argparser = argparse.ArgumentParser(
-        description='Executes a BFL file and prints the results.')
+        prog='run_bfl.py compile',
+        description='Compiles the fault tree of a BFL file to a binary file. '
+                    'Later runs of the BFL file load the fault tree from this '
+                    'file, as long as the fault tree has not changed.')
+    argparser.add_argument('file', help='path to the BFL file to compile')
+    argparser.add_argument('-o', '--output',
+                           help='path of the compiled file (default: the '
+                                f'BFL file with extension {COMPILED_EXTENSION})')
+    args = argparser.parse_args(argv)
+    main_compile(args.file, args.output)
+
+
+def check_command(argv: list[str]):
+    argparser = argparse.ArgumentParser(
+        prog='run_bfl.py check',
+        description='Checks which status vectors satisfy a BFL formula on the '
+                    'fault tree of a BFL file. The status vectors are read '
+                    'from a CSV file, whose header names basic events and '
+                    'whose rows hold a 0 or 1 for each of them, or '
+                    'memory-mapped from a .npy file with one '
+                    'boolean column per basic event, in the order of the '
+                    'fault tree. Requires NumPy.')
+    argparser.add_argument('file', type=argparse.FileType('r'),
+                           help='path to the BFL file with the fault tree')
+    argparser.add_argument('formula', help='the BFL formula to check, e.g., '
+                                           '"\\mcs(IWoS) && !H1"')
+    argparser.add_argument('vectors',
+                           help='path to a .csv or .npy file of status '
+                                'vectors')
+    argparser.add_argument('-o', '--output',
+                           help='write whether each status vector satisfies '
+                                'the formula to this file, as a boolean '
+                                'array if it ends with .npy and one 0 or 1 '
+                                'per line otherwise; - writes the lines to '
+                                'stdout')
+    args = argparser.parse_args(argv)
+    compiled_file = None if args.file is sys.stdin \
+        else compiled_path(args.file.name)
+    try:
+        main_check(args.file, args.formula, args.vectors, args.output,
+                   compiled_file)
+    finally:
+        args.file.close()
+
+
+def cache_command(argv: list[str]):
+    argparser = argparse.ArgumentParser(
+        prog='run_bfl.py cache',
+        description='Prints statistics of the result cache, which holds the '
+                    'results of earlier runs.')
+    argparser.add_argument('--clear', action='store_true',
+                           help='remove all cached results and statistics')
+    args = argparser.parse_args(argv)
+    path = default_cache_path()
+    if path is None:
+        print('The result cache is disabled')
+        return
+    cache = ResultCache(path)
+    try:
+        if args.clear:
+            cache.clear()
+        stats = cache.stats()
+    finally:
+        cache.close()
+    lookups = stats['hits'] + stats['misses']
+    hit_rate = f' ({stats["hits"] / lookups:.0%})' if lookups else ''
+    print(f'{path}: {stats["results"]} results, {stats["bytes"]} bytes, '
+          f'{stats["hits"]} hits{hit_rate}, {stats["misses"]} misses')
+
+
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{text} is not a positive integer')
+    return value
+
+
+def positive_float(text: str) -> float:
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f'{text} is not a positive number')
+    return value
+
+
+def run_command(argv: list[str]):
+    argparser = argparse.ArgumentParser(
+        description='Executes a BFL file and prints the results. Use '
+                    '`run_bfl.py compile <file>` to compile the fault tree of '
+                    'a BFL file.')
     argparser.add_argument('file',
                            help='path to the BFL file you want to execute',
                            type=argparse.FileType('r'))
-    args = argparser.parse_args()
+    argparser.add_argument('--parser',
+                           help='parsing algorithm to use (default: lalr)',
+                           choices=sorted(parser_types), default='lalr')
+    argparser.add_argument('--encoding',
+                           help='how intermediate events are encoded: inline '
+                                'expands their gates, tseitin introduces a '
+                                'variable per event (default: inline)',
+                           choices=sorted(encodings), default='inline')
+    argparser.add_argument('--cardinality',
+                           help='how voting gates are encoded: pb uses '
+                                'pseudo-Boolean atoms, the others build a '
+                                'counting circuit, and auto picks a circuit '
+                                'for small gates (default: pb)',
+                           choices=sorted(cardinality_encodings),
+                           default='pb')
+    argparser.add_argument('--backend',
+                           help='how statements are solved: z3 encodes them '
+                                'as quantified formulas, bdd builds binary '
+                                'decision diagrams, and auto picks one of them '
+                                'per statement (default: z3)',
+                           choices=sorted(backend_names), default='z3')
+    argparser.add_argument('-v', '--verbose', action='store_true',
+                           help='log how each statement is solved to stderr, '
+                                'e.g., the backend chosen by --backend auto '
+                                'and why')
+    argparser.add_argument('-j', '--jobs', type=positive_int, default=1,
+                           help='number of processes that execute statements '
+                                'in parallel (default: 1)')
+    argparser.add_argument('--stream', action='store_true',
+                           help='print the status vectors of satisfaction '
+                                'sets as soon as they are found, instead of '
+                                'collecting them first')
+    argparser.add_argument('--format', choices=sorted(output_formats),
+                           default='text',
+                           help='output format of streamed satisfaction sets; '
+                                'with jsonl, all other output goes to stderr '
+                                '(default: text)')
+    argparser.add_argument('--max-models', type=positive_int,
+                           help='stop each streamed satisfaction set after '
+                                'this many status vectors')
+    argparser.add_argument('--count-only', action='store_true',
+                           help='only print the number of status vectors of '
+                                'streamed satisfaction sets')
+    argparser.add_argument('--time-limit', type=positive_float,
+                           help='stop each streamed satisfaction set after '
+                                'this many seconds; the limit is checked '
+                                'between status vectors, so the search for '
+                                'one vector is not interrupted')
+    argparser.add_argument('--no-cache', action='store_true',
+                           help='neither use nor store results of earlier '
+                                'runs in the result cache')
+    argparser.add_argument('--cache-size', type=positive_float,
+                           default=MAX_CACHE_BYTES / 2 ** 20, metavar='MB',
+                           help='evict the least recently used results once '
+                                'the result cache holds more than this many '
+                                'MiB (default: %(default)g)')
+    args = argparser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stream = None
+    if args.stream or args.format != 'text' or args.max_models is not None \
+            or args.count_only or args.time_limit is not None:
+        stream = StreamOptions(format=args.format, max_models=args.max_models,
+                               count_only=args.count_only,
+                               time_limit=args.time_limit)
+        if args.jobs > 1:
+            argparser.error('streaming satisfaction sets requires --jobs 1')
+    compiled_file = None if args.file is sys.stdin \
+        else compiled_path(args.file.name)
+    cache = None if args.no_cache \
+        else open_result_cache(int(args.cache_size * 2 ** 20))
     try:
-        file_text = args.file.read()
+        main_file(args.file, args.parser, compiled_file, args.encoding,
+                  args.cardinality, args.jobs, stream, args.backend, cache)
     finally:
         args.file.close()
-    main(file_text)
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['compile']:
+        compile_command(sys.argv[2:])
+    elif sys.argv[1:2] == ['check']:
+        check_command(sys.argv[2:])
+    elif sys.argv[1:2] == ['cache']:
+        cache_command(sys.argv[2:])
+    else:
+        run_command(sys.argv[1:])
@@ -1,24 +1,51 @@
 # https://theory.stanford.edu/~nikolaj/programmingz3.html#sec-blocking-evaluations
-from z3 import sat
-
-
-def all_models(s, initial_terms):
-    def block_term(s_, m, t):
-        s_.add(t != m.eval(t, model_completion=True))
-
-    def fix_term(s_, m, t):
-        s_.add(t == m.eval(t, model_completion=True))
-
-    def all_smt_rec(terms):
-        if sat == s.check():
-            m = s.model()
-            yield m
-            for i in range(len(terms)):
-                s.push()
-                block_term(s, m, terms[i])
-                for j in range(i):
-                    fix_term(s, m, terms[j])
-                yield from all_smt_rec(terms[i:])
+from typing import Iterable, Iterator
+
+from z3 import sat, Solver, ModelRef, ExprRef
+
+
+def all_models(s: Solver, initial_terms: Iterable[ExprRef]) \
+        -> Iterator[ModelRef]:
+    """
+    Yields models of `s` that differ in the value of at least one of
+    `initial_terms`, until all combinations of values have been found. This is
+    the recursive algorithm from the link above, with an explicit stack.
+    """
+    terms = list(initial_terms)
+
+    def block_term(m, t):
+        s.add(t != m.eval(t, model_completion=True))
+
+    def fix_term(m, t):
+        s.add(t == m.eval(t, model_completion=True))
+
+    if s.check() != sat:
+        return
+    m = s.model()
+    yield m
+
+    # Every frame `(m, start, i)` continues the search for models that differ
+    # from `m` in `terms[start:]`, at the `i`th term. Every iteration runs in a
+    # solver scope, which is popped when the next iteration starts, or when
+    # the generator is closed early.
+    scopes = s.num_scopes()
+    stack = [(m, 0, 0)]
+    try:
+        while stack:
+            m, start, i = stack.pop()
+            if i > 0:
                 s.pop()
+            if i >= len(terms) - start:
+                continue
+            stack.append((m, start, i + 1))
 
-    yield from all_smt_rec(list(initial_terms))
+            s.push()
+            block_term(m, terms[start + i])
+            for j in range(i):
+                fix_term(m, terms[start + j])
+            if s.check() == sat:
+                model = s.model()
+                yield model
+                stack.append((model, start + i, 0))
+    finally:
+        s.pop(s.num_scopes() - scopes)
@@ -0,0 +1,11 @@
+import os
+from pathlib import Path
+
+
+def cache_dir() -> Path:
+    """
+    Returns the directory for files that BFL keeps between runs, which is
+    `bfl` in `$XDG_CACHE_HOME`, or in `~/.cache` if that is not set.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'bfl'
@@ -1,4 +1,6 @@
 # https://stackoverflow.com/a/14089886/14851412
+from collections import OrderedDict
+
 from z3 import is_const, Ints, Bools, Implies, And, Or, Z3_OP_UNINTERPRETED, \
     AstRef, BoolRef, ForAll
 
@@ -23,19 +25,43 @@ def askey(n):
     return AstRefKey(n)
 
 
-def get_vars(f: BoolRef):
-    r = dict()
+CACHE_SIZE = 4096
+# Maps the ID of a formula to the formula itself and its variables. Keeping a
+# reference to the formula ensures Z3 does not reuse its ID for another AST.
+_cache: OrderedDict[int, tuple[AstRef, tuple[AstRef, ...]]] = OrderedDict()
+
+
+def get_vars(f: BoolRef) -> list[AstRef]:
+    """
+    Returns the free uninterpreted constants of `f` in the order they first
+    occur. Formulas are traversed as DAGs, so shared subterms are visited
+    only once, and the results for the last `CACHE_SIZE` formulas are cached.
+    """
+    key = f.get_id()
+    if key in _cache and _cache[key][0].eq(f):
+        _cache.move_to_end(key)
+        return list(_cache[key][1])
+
+    result = []
+    visited = set()
+    stack = [f]
+    while stack:
+        node = stack.pop()
+        node_id = node.get_id()
+        if node_id in visited:
+            continue
+        visited.add(node_id)
 
-    def collect(f):
-        if is_const(f):
-            if f.decl().kind() == Z3_OP_UNINTERPRETED and not askey(f) in r:
-                r[askey(f)] = None
+        if is_const(node):
+            if node.decl().kind() == Z3_OP_UNINTERPRETED:
+                result.append(node)
         else:
-            for c in f.children():
-                collect(c)
+            stack.extend(reversed(node.children()))
 
-    collect(f)
-    return [e.n for e in r]
+    _cache[key] = (f, tuple(result))
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
 
 
 if __name__ == '__main__':
@@ -0,0 +1,16 @@
+from functools import wraps
+
+
+def memoize_method(method):
+    """
+    Caches the results of `method` in the `cache` dictionary of the instance
+    it is called on, so the cached results are released together with the
+    instance. The arguments must be hashable.
+    """
+    @wraps(method)
+    def wrapper(self, *args):
+        key = (method.__name__, *args)
+        if key not in self.cache:
+            self.cache[key] = method(self, *args)
+        return self.cache[key]
+    return wrapper
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from z3 import Bool, BoolRef
+
+
+class VariablePool:
+    """
+    Allocates Boolean variables named `<prefix><index>` in a stack-like
+    manner. Z3 refers to bound variables by their position, so variables can
+    be released as soon as the quantifier that binds them has been created,
+    and then be reused by other quantifiers.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.variables: list[BoolRef] = []
+        self.in_use = 0
+
+    def acquire(self, n: int) -> list[BoolRef]:
+        start = self.in_use
+        self.in_use += n
+        for i in range(len(self.variables), self.in_use):
+            self.variables.append(Bool(f'{self.prefix}{i}'))
+        return self.variables[start:self.in_use]
+
+    def release(self, n: int):
+        if n > self.in_use:
+            raise ValueError(f'Cannot release {n} of {self.in_use} variables')
+        self.in_use -= n
+
+    @contextmanager
+    def scope(self, n: int) -> Iterator[list[BoolRef]]:
+        """Acquires `n` variables, which are released when the scope exits."""
+        variables = self.acquire(n)
+        try:
+            yield variables
+        finally:
+            self.release(n)
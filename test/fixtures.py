@@ -0,0 +1,87 @@
+"""
+The case-study fault tree, statements and formulas that several tests share.
+"""
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from parser.parser import parser
+
+tree = '''
+toplevel IWoS;
+IWoS vot>=2 CPR MoT SH;
+CPR or CP CR;
+CP and IW H3;
+CR and IT H2;
+MoT or CT DT AT CVT UT;
+CT or CIW CIO CIS;
+CIW and IW PP H1;
+CIO and IT MH1;
+MH1 and H1 H4;
+CIS and IS MH2;
+MH2 and H1 H5;
+DT and IW PP;
+AT and IW AB;
+CVT and IW MV H1;
+SH and VW H1;
+---
+'''
+
+statements = [
+    '\\forall IS => MoT;',
+    '\\forall !IS => !CIS;',
+    '\\forall (PP => DT[IW:1]) && (!AT[IW:0]);',
+    '\\exists IWoS && \\vot[<2](H1, H2, H3, H4, H5);',
+    '\\exists \\vot[>=2](CPR, SH, H1) && !MoT;',
+    '\\exists CP[IW: 0, H3: 1];',
+    '\\exists \\mps(IWoS)[H1: 0, H2: 0, H3: 0, H4: 0, H5: 0];',
+    '\\exists \\mcs(IWoS)[IW: 0];',
+    '\\forall \\mcs(CPR) => CPR;',
+    '\\forall \\mcs(\\mcs(MoT)) == \\mcs(MoT);',
+    '[[\\mcs(IWoS) && H4]];',
+    '[[\\mps(IWoS)]];',
+    '[[\\mps(CPR)[H3: 1]]];',
+    '[[\\mcs(\\mps(CPR) || CIS)]];',
+    '[[\\mps(\\mcs(SH) && !CR)]];',
+    '\\idp(CIO, CIS);',
+    '\\idp(IW, IT);',
+    '\\idp(CPR, SH[H1: 0]);',
+    '\\sup(PP);',
+    '\\sup(H4);',
+    'UT, IW, H3 |= CPR && MoT;',
+    'UT, IW, H3 |= CPR && MoT && SH;',
+    'IW, H3 |= \\mcs(CPR);',
+    'UT |= !MoT[UT: 0];',
+]
+
+# Formulas with every operator, including nested minimality operators.
+formulas = [
+    'IWoS',
+    '!CPR => MoT == SH',
+    'CPR != \\vot[<2](H1, H2, IW)',
+    '\\vot[==1](CP, CR, UT)',
+    '(CIW[PP: 1, IW: 1]) || !H1',
+    '(SH[H1: 1, H1: 0]) && IT',
+    '\\mcs(IWoS)',
+    '\\mps(CPR) || \\mcs(MoT[H1: 1])',
+    '\\mcs(\\vot[==1](IW, IT, H1))',
+    '\\mcs(\\mps(CPR) || CIS)',
+    '\\mps(\\mcs(SH) && !CR)',
+]
+
+# Formulas whose minimality operators are not nested, see `is_two_level`.
+two_level_formulas = [
+    '\\mcs(IWoS) && H4',
+    '\\mcs(IWoS) || \\mps(CPR)',
+    '!\\mcs(MoT) && MoT && !H1 && !UT && !IS && !IT',
+    '\\mcs(CPR) != \\mcs(CP || CR)',
+    '\\mps(IWoS) && !\\mcs(SH)',
+    '(\\mcs(\\vot[>=2](IW, IT, H1) && !H5) => H1) && !MoT && !CPR && !H5',
+    '\\mcs(CPR[H3: 1]) && !IW',
+    '\\mps(CPR) && \\vot[==1](H2, H3)',
+]
+
+
+def compact_fault_tree(text: str = tree) -> CompactFaultTree:
+    """Returns the compact fault tree defined by `text`, which ends with
+    `---` like `tree`."""
+    return CompactFaultTree.from_graph(
+        build_fault_tree(parser.parse(text + '[[a]];', 'start')))
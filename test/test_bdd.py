@@ -0,0 +1,98 @@
+import itertools
+import unittest
+
+from bdd import BDD, TRUE, FALSE, NodeLimitExceeded
+
+
+class BDDTest(unittest.TestCase):
+    def setUp(self):
+        self.bdd = BDD(['a', 'b', 'c', 'd'])
+        self.a, self.b, self.c, self.d = map(self.bdd.var, 'abcd')
+
+    def test_canonical(self):
+        bdd, a, b, c = self.bdd, self.a, self.b, self.c
+        self.assertEqual(bdd.conjoin([a, bdd.disjoin([b, c])]),
+                         bdd.disjoin([bdd.conjoin([a, b]),
+                                      bdd.conjoin([c, a])]))
+        self.assertEqual(bdd.disjoin([a, bdd.negate(a)]), TRUE)
+        self.assertEqual(bdd.conjoin([a, bdd.negate(a)]), FALSE)
+        self.assertEqual(bdd.negate(bdd.negate(b)), b)
+
+    def test_count(self):
+        bdd, a, b, c, d = self.bdd, self.a, self.b, self.c, self.d
+        self.assertEqual(bdd.count(TRUE), 16)
+        self.assertEqual(bdd.count(FALSE), 0)
+        self.assertEqual(bdd.count(d), 8)
+        self.assertEqual(bdd.count(bdd.conjoin([a, c])), 4)
+        self.assertEqual(bdd.count(bdd.disjoin([b, d])), 12)
+        self.assertEqual(bdd.count(bdd.equiv(a, d)), 8)
+
+    def test_at_least(self):
+        fs = [self.a, self.b, self.c, self.bdd.negate(self.d)]
+        for k in range(-1, 6):
+            with self.subTest(k=k):
+                expected = sum(
+                    sum(v[:3]) + (not v[3]) >= k
+                    for v in itertools.product([0, 1], repeat=4))
+                self.assertEqual(self.bdd.count(self.bdd.at_least(fs, k)),
+                                 expected)
+
+    def test_many_variables(self):
+        names = [f'x{i}' for i in range(3000)]
+        bdd = BDD(names)
+        chain = bdd.conjoin(map(bdd.var, names))
+        self.assertEqual(bdd.count(chain), 1)
+        self.assertEqual(bdd.count(bdd.negate(chain)), 2 ** 3000 - 1)
+
+    def test_models(self):
+        bdd, a, b, c = self.bdd, self.a, self.b, self.c
+        f = bdd.conjoin([a, bdd.negate(c)])
+        self.assertEqual(set(bdd.models(f)),
+                         {frozenset('a'), frozenset('ab'), frozenset('ad'),
+                          frozenset('abd')})
+        self.assertEqual(set(bdd.models(FALSE)), set())
+
+    def test_minimal(self):
+        bdd, a, b, c, d = self.bdd, self.a, self.b, self.c, self.d
+        f = bdd.disjoin([bdd.conjoin([a, b]), bdd.conjoin([b, c]),
+                         bdd.conjoin([c, bdd.negate(d)])])
+        self.assertEqual(set(bdd.models(bdd.minimal(f))),
+                         {frozenset('ab'), frozenset('c')})
+        self.assertEqual(set(bdd.models(bdd.minimal(bdd.negate(a)))),
+                         {frozenset()})
+        self.assertEqual(set(bdd.models(bdd.minimal(TRUE))), {frozenset()})
+
+    def test_restrict_and_support(self):
+        bdd, a, b, c = self.bdd, self.a, self.b, self.c
+        f = bdd.disjoin([bdd.conjoin([a, b]), c])
+        self.assertEqual(bdd.support(f), {'a', 'b', 'c'})
+        self.assertEqual(bdd.restrict(f, {'a': True, 'x': False}),
+                         bdd.disjoin([b, c]))
+        self.assertEqual(bdd.restrict(f, {'c': True}), TRUE)
+        self.assertEqual(bdd.support(bdd.restrict(f, {'a': False})), {'c'})
+
+    def test_closest(self):
+        bdd, a, b, c = self.bdd, self.a, self.b, self.c
+        f = bdd.conjoin([a, bdd.negate(b)])
+        self.assertTrue(bdd.evaluate(f, {'a', 'c'}))
+        self.assertFalse(bdd.evaluate(f, {'a', 'b'}))
+        self.assertEqual(bdd.closest(f, {'b', 'd'}), {'a', 'd'})
+        self.assertIsNone(bdd.closest(FALSE, {'a'}))
+
+        # Keeping `a` would need two changes, dropping it only one.
+        g = bdd.disjoin([bdd.conjoin([bdd.negate(a), b, c]),
+                         bdd.conjoin([a, bdd.negate(b), bdd.negate(c)])])
+        self.assertEqual(bdd.closest(g, {'a', 'b', 'c'}), {'b', 'c'})
+
+    def test_node_limit(self):
+        bdd = BDD([f'x{i}' for i in range(20)], max_nodes=30)
+        with self.assertRaises(NodeLimitExceeded):
+            bdd.at_least([bdd.var(f'x{i}') for i in range(20)], 10)
+
+    def test_duplicate_variables(self):
+        with self.assertRaises(ValueError):
+            BDD(['a', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
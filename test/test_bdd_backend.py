@@ -0,0 +1,78 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from z3 import Solver, Not, Bool, sat
+
+from bfl.build_bfl import build_formula, get_definitions
+from bfl.execute_bfl import AutoBackend
+from bfl.planner import STATS_ENV
+from fixtures import tree, statements, compact_fault_tree
+from parser.parser import parser
+from run_bfl import execute_str
+
+extra_statements = [
+    '[[\\mcs(IWoS)]];',
+    '[[\\mcs(IWoS[H1: 1]) && !IW]];',
+    '[[\\mps(MoT) && \\vot[==2](H1, H2, H3)]];',
+    '|[[CPR || SH]]|;',
+    '|[[\\mcs(MoT)]]|;',
+    '\\sup(*);',
+    '\\exists \\mcs(MoT) && !H1 && UT;',
+    '\\forall \\vot[>1](IW, IT) => \\vot[<=0](IW, IT) || IW || IT;',
+    'H1, H2 |= \\mps(SH);',
+    'H1 |= IW && !IW;',
+]
+
+
+def satisfies(vector, query: str) -> bool:
+    fault_tree = compact_fault_tree()
+    formula = build_formula(parser.parse(query, 'phi'), fault_tree)
+    _, definitions = get_definitions(formula, fault_tree)
+    names = {decl.name() for decl in vector}
+    s = Solver()
+    s.add(formula, *definitions, *(
+        Bool(be) if be in names else Not(Bool(be))
+        for be in fault_tree.get_basic_events()))
+    return s.check() == sat
+
+
+@patch.dict(os.environ, {STATS_ENV: ''})
+class BddBackendTest(unittest.TestCase):
+    def test_same_results_as_z3(self):
+        for statement in statements + extra_statements:
+            with self.subTest(statement):
+                expected = execute_str(tree + statement)
+                for backend in ('bdd', 'auto'):
+                    actual = execute_str(tree + statement, backend=backend)
+                    if isinstance(expected[0], frozenset) and '|=' in statement:
+                        # Counterexamples depend on the search order, so
+                        # they only need to satisfy the formula.
+                        self.assertIsInstance(actual[0], frozenset)
+                        self.assertTrue(satisfies(
+                            actual[0], statement.split('|=')[1][:-1]))
+                    else:
+                        self.assertEqual(expected, actual)
+
+    def test_errors(self):
+        text = tree + '\\exists XY;\nIW, CP |= CP;\nH1 |= IW && !IW;'
+        self.assertEqual(execute_str(text, backend='bdd'), [None] * 3)
+
+    def test_parallel(self):
+        text = tree + '\n'.join(statements)
+        self.assertEqual(execute_str(text, backend='bdd'),
+                         execute_str(text, jobs=2, backend='bdd'))
+
+    def test_auto_falls_back(self):
+        fault_tree = compact_fault_tree()
+        statement = parser.parse('\\exists \\mcs(IWoS) && H5',
+                                 'bfl_statement')
+        with patch('bfl.execute_bfl.AUTO_MAX_BDD_NODES', 10):
+            backend = AutoBackend(fault_tree)
+        self.assertEqual(
+            [backend.quantified(statement)],
+            execute_str(tree + '\\exists \\mcs(IWoS) && H5;'))
+        self.assertIsNone(backend.bdd)
+
+if __name__ == '__main__':
+    unittest.main()
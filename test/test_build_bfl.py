@@ -1,12 +1,17 @@
+import gc
+import sys
 import unittest
+import weakref
 
 from z3 import BoolRef, Solver, Not, unsat, Bools, And, Or, Implies, eq, \
-    ForAll, Exists, Function, BoolSort, AtLeast, AtMost
+    ForAll, Exists, Function, BoolSort, AtLeast, AtMost, substitute, BoolVal
 
-from bfl.build_bfl import BflTransformer, event_to_formula
+from bfl.build_bfl import BflTransformer, event_to_formula, event_to_var, \
+    get_definitions, dual_var, build_formula
 from bfl.exceptions import BFLError
 from galileo.build_graph import build_fault_tree
 from galileo.fault_tree import FaultTree
+from gates import AndGate
 from parser.parser import parser
 
 default_tree = build_fault_tree(
@@ -19,8 +24,10 @@ def z3_equality(formula1: BoolRef, formula2: BoolRef):
     return s.check() == unsat
 
 
-def parse_helper(formula: str, start='bfl_statement', tree=default_tree):
-    return BflTransformer(tree).transform(parser.parse(formula, start))
+def parse_helper(formula: str, start='bfl_statement', tree=default_tree,
+                 encoding='inline'):
+    return BflTransformer(tree, encoding).transform(
+        parser.parse(formula, start))
 
 
 class BuildBflTest(unittest.TestCase):
@@ -58,6 +65,19 @@ class BuildBflTest(unittest.TestCase):
             Exists([a, c], ForAll(b, Implies(Not(b), Or(a, And(b, c)))))
         ))
 
+    def test_substituting_evidence(self):
+        a, b, c = Bools('a b c')
+        self.assertTrue(eq(
+            build_formula(parser.parse('(a || b && c)[b: 0, c: 1]', 'phi'),
+                          default_tree, substitute_evidence=True),
+            Or(a, And(False, True))
+        ))
+        self.assertTrue(eq(
+            build_formula(parser.parse('a[a: 0, a: 1]', 'phi'), default_tree,
+                          substitute_evidence=True),
+            BoolVal(True)
+        ))
+
     def test_evidence_quantifier_arrangement_equality(self):
         a, b = Bools('a b')
         f = Function('f', BoolSort(), BoolSort(), BoolSort())
@@ -67,7 +87,7 @@ class BuildBflTest(unittest.TestCase):
         ))
 
     def test_mcs(self):
-        a, b, c, a_, b_, c_ = Bools("a b c a' b' c'")
+        a, b, c, p = Bools("a b c '0")
         self.assertTrue(eq(
             parse_helper('\\exists \\mcs(a)'),
             Exists(
@@ -75,19 +95,21 @@ class BuildBflTest(unittest.TestCase):
                 And(
                     a,
                     Not(Exists(
-                        [a_, b_, c_],
+                        [p],
                         And(
-                            And(Implies(a_, a), Implies(b_, b), Implies(c_, c)),
-                            Or(a_ != a, b_ != b, c_ != c),
-                            a_
+                            And(Implies(p, a)),
+                            Or(p != a),
+                            p
                         )
-                    ))
+                    )),
+                    Not(b),
+                    Not(c)
                 )
             )
         ))
 
     def test_two_mcs(self):
-        a, b, c, a_, b_, c_, a__, b__, c__ = Bools("a b c a' b' c' a'' b'' c''")
+        a, b, c, p = Bools("a b c '0")
         self.assertTrue(eq(
             parse_helper('\\exists \\mcs(a) && \\mcs(b)'),
             Exists(
@@ -96,34 +118,61 @@ class BuildBflTest(unittest.TestCase):
                     And(
                         a,
                         Not(Exists(
-                            [a_, b_, c_],
-                            And(
-                                And(Implies(a_, a), Implies(b_, b),
-                                    Implies(c_, c)),
-                                Or(a_ != a, b_ != b, c_ != c),
-                                a_
-                            )
-                        ))
+                            [p],
+                            And(And(Implies(p, a)), Or(p != a), p)
+                        )),
+                        Not(b),
+                        Not(c)
                     ),
                     And(
                         b,
                         Not(Exists(
-                            [a__, b__, c__],
-                            And(
-                                And(Implies(a__, a), Implies(b__, b),
-                                    Implies(c__, c)),
-                                Or(a__ != a, b__ != b, c__ != c),
-                                b__
-                            )
-                        ))
+                            [p],
+                            And(And(Implies(p, b)), Or(p != b), p)
+                        )),
+                        Not(a),
+                        Not(c)
                     )
                 )
             )
 
         ))
 
+    def test_nested_mcs(self):
+        a, b, c, p = Bools("a b c '0")
+        inner = And(
+            a,
+            Not(Exists([p], And(And(Implies(p, a)), Or(p != a), p))),
+            Not(b),
+            Not(c)
+        )
+        # `b` and `c` are false in `inner`, so they do not get primed copies,
+        # and the primed copy of `a` is reused.
+        self.assertTrue(eq(
+            parse_helper('\\exists \\mcs(\\mcs(a))'),
+            Exists(
+                [a, b, c],
+                And(
+                    inner,
+                    Not(Exists(
+                        [p],
+                        And(And(Implies(p, a)), Or(p != a),
+                            substitute(inner, (a, p)))
+                    ))
+                )
+            )
+        ))
+
+    def test_mcs_without_variables(self):
+        a, b, c = Bools('a b c')
+        self.assertTrue(eq(
+            parse_helper('\\exists \\mcs(a[a: 1])'),
+            Exists([a, b, c], And(ForAll([a], Implies(a, a)), Not(False),
+                                  Not(a), Not(b), Not(c)))
+        ))
+
     def test_mps(self):
-        a, b, c, a_, b_, c_ = Bools("a b c a' b' c'")
+        a, b, c, p = Bools("a b c '0")
         self.assertTrue(eq(
             parse_helper('\\exists \\mps(a)'),
             Exists(
@@ -131,13 +180,15 @@ class BuildBflTest(unittest.TestCase):
                 And(
                     Not(Not(a)),
                     Not(Exists(
-                        [a_, b_, c_],
+                        [p],
                         And(
-                            And(Implies(a_, a), Implies(b_, b), Implies(c_, c)),
-                            Or(a_ != a, b_ != b, c_ != c),
-                            Not(Not(a_))
+                            And(Implies(p, a)),
+                            Or(p != a),
+                            Not(Not(p))
                         )
-                    ))
+                    )),
+                    Not(b),
+                    Not(c)
                 )
             )
         ))
@@ -172,6 +223,65 @@ class BuildBflTest(unittest.TestCase):
             lambda: event_to_formula('e', default_tree)
         )
 
+    def test_event_to_formula_deep_tree(self):
+        depth = 5 * sys.getrecursionlimit()
+        tree = FaultTree()
+        for i in range(depth):
+            tree.add_node(f'g{i}', gate=AndGate())
+            tree.add_edge(f'g{i + 1}', f'g{i}')
+            tree.add_edge(f'b{i}', f'g{i}')
+        formula = event_to_formula('g0', tree)
+        self.assertEqual(formula.num_args(), 2)
+        self.assertEqual(len(tree.formulas), 2 * depth + 1)
+
+    def test_formula_table(self):
+        tree = build_fault_tree(
+            parser.parse('toplevel top; top or a b; a and c d;', 'galileo'))
+        formula = event_to_formula('top', tree)
+        self.assertSetEqual({'top', 'a', 'b', 'c', 'd'}, set(tree.formulas))
+        self.assertIs(formula, tree.formulas['top'])
+        self.assertTrue(eq(event_to_formula('a', tree), tree.formulas['a']))
+
+        ref = weakref.ref(tree)
+        del tree, formula
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_event_to_var(self):
+        tree = build_fault_tree(
+            parser.parse('toplevel top; top or a b; a and c d;', 'galileo'))
+        top, a, b, c, d = Bools('top a b c d')
+        self.assertTrue(eq(event_to_var('top', tree), top))
+        self.assertTrue(eq(event_to_var('c', tree), c))
+        self.assertTrue(eq(tree.definitions['top'][0], top == Or(a, b)))
+        self.assertTrue(eq(tree.definitions['a'][0], a == And(c, d)))
+
+        self.assertEqual(([], []), get_definitions(And(b, c), tree))
+        tseitin_vars, definitions = get_definitions(Or(top, c), tree)
+        self.assertListEqual(['top', 'a'], list(map(str, tseitin_vars)))
+        self.assertEqual(2, len(definitions))
+
+        not_top, not_a = Bools('~top ~a')
+        self.assertTrue(eq(dual_var('top', tree), not_top))
+        self.assertTrue(eq(tree.definitions['~top'][0],
+                           not_top == Or(not_a, Not(b))))
+        self.assertTrue(eq(dual_var('~top', tree), top))
+
+    def test_tseitin_quantifiers(self):
+        tree = build_fault_tree(
+            parser.parse('toplevel top; top or a b; a and c d;', 'galileo'))
+        top, a, b, c, d = Bools('top a b c d')
+        self.assertTrue(eq(
+            parse_helper('\\exists top', tree=tree, encoding='tseitin'),
+            Exists([top, a, b, c, d],
+                   And(top == Or(a, b), a == And(c, d), top))
+        ))
+        self.assertTrue(eq(
+            parse_helper('\\forall a[c: 1]', tree=tree, encoding='tseitin'),
+            ForAll([d], ForAll([c, a],
+                               Implies(And(c, a == And(c, d)), a)))
+        ))
+
     def test_no_gate_error(self):
         tree = FaultTree()
         tree.add_node('top')
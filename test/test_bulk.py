@@ -0,0 +1,176 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from bfl.evaluate import Evaluator, MAX_SUBSET_EVENTS
+from bfl.exceptions import BFLError
+from fixtures import tree, formulas, compact_fault_tree
+from parser.parser import parser
+
+try:
+    import numpy as np
+    from bfl.bulk import check_vectors, read_csv, load_vectors, CHUNK_ROWS
+    from run_bfl import check_command
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class BulkTest(unittest.TestCase):
+    def setUp(self):
+        self.fault_tree = compact_fault_tree()
+        self.basic_events = self.fault_tree.get_basic_events()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.random((300, len(self.basic_events))) < 0.3
+
+    def failed(self, row, basic_events=None) -> frozenset[str]:
+        return frozenset(be for be, value
+                         in zip(basic_events or self.basic_events, row)
+                         if value)
+
+    def test_same_values_as_evaluator(self):
+        evaluator = Evaluator(self.fault_tree)
+        # Minimal vectors are rare among random ones, so some are added.
+        vectors = np.vstack([self.vectors, np.array(
+            [[be in ('IW', 'H3') for be in self.basic_events],
+             [be in ('IT', 'H2') for be in self.basic_events],
+             [be in ('H1', 'IS', 'H5') for be in self.basic_events]])])
+        for formula in formulas:
+            phi = parser.parse(formula, 'phi')
+            with self.subTest(formula):
+                self.assertEqual(
+                    list(check_vectors(phi, self.fault_tree, vectors)),
+                    [evaluator.evaluate(phi, self.failed(row))
+                     for row in vectors])
+
+    def test_nested_minimal_operators(self):
+        fault_tree = compact_fault_tree('toplevel g; g or e0 e1;\n---\n')
+        phi = parser.parse('\\mps(!\\mcs(e0))', 'phi')
+        vectors = np.array([[be == 'e1' for be
+                             in fault_tree.get_basic_events()]])
+        self.assertEqual(list(check_vectors(phi, fault_tree, vectors)),
+                         [True])
+
+    def test_random_formulas(self):
+        fault_tree = compact_fault_tree(
+            'toplevel g; g or g0 g1; g0 and e0 e1; g1 vot>=2 e1 e2 e3;\n---\n')
+        basic_events = fault_tree.get_basic_events()
+        events = basic_events + ['g', 'g0', 'g1']
+        # All status vectors of the fault tree.
+        vectors = np.array([[v >> i & 1 for i in range(len(basic_events))]
+                            for v in range(1 << len(basic_events))],
+                           dtype=bool)
+        evaluator = Evaluator(fault_tree)
+        rng = random.Random(0)
+
+        def formula(depth: int) -> str:
+            if depth == 0:
+                return rng.choice(events)
+            match rng.randrange(6):
+                case 0:
+                    return f'!{formula(depth - 1)}'
+                case 1:
+                    return f'({formula(depth - 1)} && {formula(depth - 1)})'
+                case 2:
+                    return f'({formula(depth - 1)} || {formula(depth - 1)})'
+                case 3:
+                    return f'\\mcs({formula(depth - 1)})'
+                case 4:
+                    return f'\\mps({formula(depth - 1)})'
+                case _:
+                    be = rng.choice(basic_events)
+                    return f'({formula(depth - 1)}[{be}: {rng.randrange(2)}])'
+
+        for _ in range(200):
+            text = formula(rng.randrange(1, 5))
+            phi = parser.parse(text, 'phi')
+            with self.subTest(text):
+                self.assertEqual(
+                    list(check_vectors(phi, fault_tree, vectors)),
+                    [evaluator.evaluate(phi, self.failed(row, basic_events))
+                     for row in vectors])
+
+    def test_subset_limit(self):
+        basic_events = sorted(self.basic_events)
+        self.assertGreater(len(basic_events), MAX_SUBSET_EVENTS)
+        # Removing any single event makes the argument false, but removing
+        # two makes it true again, so the first vector is not minimal.
+        phi = parser.parse(f'\\mcs(!\\vot[=={len(basic_events) - 1}]'
+                           f'({", ".join(basic_events)}))', 'phi')
+        vectors = np.ones((3, len(basic_events)), dtype=bool)
+        vectors[1, :2] = False
+        vectors[2] = False
+        self.assertEqual(list(check_vectors(phi, self.fault_tree, vectors)),
+                         [False, False, True])
+
+    def test_chunks(self):
+        vectors = np.repeat(self.vectors[:3], CHUNK_ROWS, axis=0)
+        result = check_vectors(parser.parse('\\mcs(CPR) || IWoS', 'phi'),
+                               self.fault_tree, vectors)
+        self.assertEqual(result.shape, (3 * CHUNK_ROWS,))
+        self.assertEqual(list(result[::CHUNK_ROWS]), list(check_vectors(
+            parser.parse('\\mcs(CPR) || IWoS', 'phi'), self.fault_tree,
+            self.vectors[:3])))
+
+    def read_csv(self, text: str, rows: int = CHUNK_ROWS) -> np.ndarray:
+        chunks = list(read_csv(io.StringIO(text), self.fault_tree, rows))
+        self.assertTrue(all(len(chunk) <= rows for chunk in chunks))
+        return np.vstack([np.zeros((0, len(self.basic_events)), dtype=bool),
+                          *chunks])
+
+    def test_read_csv(self):
+        vectors = self.read_csv('IW, H3\n1,1\n0,1\n')
+        self.assertEqual([self.failed(row) for row in vectors],
+                         [{'IW', 'H3'}, {'H3'}])
+        self.assertEqual(self.read_csv('IW\n').shape,
+                         (0, len(self.basic_events)))
+        self.assertTrue(np.array_equal(
+            self.read_csv('IW,H3\n1,1\n\n0,1\n1,0\n', rows=2),
+            self.read_csv('IW,H3\n1,1\n0,1\n1,0\n')))
+        for text in ('XY\n1\n', 'IW,H3\n1\n', 'IW\n2\n', 'IW\na\n'):
+            with self.subTest(text):
+                with self.assertRaises(BFLError):
+                    self.read_csv(text)
+
+    def test_errors(self):
+        with self.assertRaises(BFLError):
+            check_vectors(parser.parse('XY', 'phi'), self.fault_tree,
+                          self.vectors)
+        with self.assertRaises(BFLError):
+            check_vectors(parser.parse('IW', 'phi'), self.fault_tree,
+                          self.vectors[:, 1:])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            bfl_path = os.path.join(directory, 'tree.bfl')
+            with open(bfl_path, 'w') as f:
+                f.write(tree + 'IW |= IW;\n')
+            npy_path = os.path.join(directory, 'vectors.npy')
+            np.save(npy_path, self.vectors)
+            self.assertTrue(np.array_equal(
+                np.vstack(list(load_vectors(npy_path, self.fault_tree))),
+                self.vectors))
+            output_path = os.path.join(directory, 'result.npy')
+            with redirect_stdout(io.StringIO()) as output:
+                check_command([bfl_path, 'CPR && !H1', npy_path,
+                               '-o', output_path])
+            expected = check_vectors(parser.parse('CPR && !H1', 'phi'),
+                                     self.fault_tree, self.vectors)
+            self.assertTrue(np.array_equal(np.load(output_path), expected))
+            self.assertEqual(output.getvalue(),
+                             f'{expected.sum()} of 300 status vectors '
+                             f'satisfy the formula\n')
+
+            csv_path = os.path.join(directory, 'vectors.csv')
+            with open(csv_path, 'w') as f:
+                f.write('IW,H3\n1,1\n0,0\n')
+            with redirect_stdout(io.StringIO()) as output:
+                check_command([bfl_path, 'CP', csv_path, '-o', '-'])
+            self.assertEqual(output.getvalue(), '1\n0\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import itertools
+import unittest
+
+from z3 import Bools, BoolVal, substitute, simplify, is_true, is_false
+
+from fixtures import tree, statements
+from gates import VotGate, cardinality_constraint, at_least
+from run_bfl import execute_str
+
+encodings = ['pb', 'sequential', 'totalizer', 'sorting', 'auto']
+comparisons = ['<', '<=', '==', '>=', '>']
+
+
+def evaluate(formula, xs, values):
+    value = simplify(substitute(formula, *(
+        (x, BoolVal(v)) for x, v in zip(xs, values))))
+    assert is_true(value) or is_false(value)
+    return is_true(value)
+
+
+class CardinalityTest(unittest.TestCase):
+    def test_all_vectors(self):
+        for n in range(1, 6):
+            xs = Bools(' '.join(f'x{i}' for i in range(n)))
+            for encoding, comp in itertools.product(encodings, comparisons):
+                for k in range(1, n + 2):
+                    formula = cardinality_constraint(xs, comp, k, encoding)
+                    for values in itertools.product([False, True], repeat=n):
+                        count = sum(values)
+                        expected = {'<': count < k, '<=': count <= k,
+                                    '==': count == k, '>=': count >= k,
+                                    '>': count > k}[comp]
+                        with self.subTest(n=n, encoding=encoding, comp=comp,
+                                          k=k, values=values):
+                            self.assertEqual(expected,
+                                             evaluate(formula, xs, values))
+
+    def test_trivial_thresholds(self):
+        xs = Bools('a b c')
+        self.assertListEqual(
+            [True, False],
+            [is_true(f) for f in at_least(xs, [0, 4], 'sequential')])
+
+    def test_unknown_encoding(self):
+        xs = Bools('a b c')
+        self.assertRaises(ValueError,
+                          lambda: at_least(xs, [2], 'binary'))
+
+    def test_vot_gate(self):
+        xs = Bools('a b c d')
+        for encoding in encodings:
+            formula = VotGate('>=', 3).to_z3(*xs, cardinality=encoding)
+            self.assertTrue(evaluate(formula, xs, [True, True, False, True]))
+            self.assertFalse(evaluate(formula, xs, [True, False, False, True]))
+
+    def test_same_results(self):
+        for statement in statements:
+            for encoding in encodings[1:]:
+                with self.subTest(statement=statement, encoding=encoding):
+                    self.assertEqual(
+                        execute_str(tree + statement),
+                        execute_str(tree + statement, cardinality=encoding))
+
+
+if __name__ == '__main__':
+    unittest.main()
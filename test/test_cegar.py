@@ -0,0 +1,97 @@
+import unittest
+
+from z3 import Solver, sat
+
+from bfl.bdd_backend import BddBackend
+from bfl.build_bfl import build_formula
+from bfl.cegar import is_two_level, minimality_problem
+from bfl.execute_bfl import quantified_statement, check_model
+from fixtures import tree, two_level_formulas, compact_fault_tree
+from parser.parser import parser
+from run_bfl import execute_str
+
+
+class CegarTest(unittest.TestCase):
+    def setUp(self):
+        self.fault_tree = compact_fault_tree()
+
+    def test_is_two_level(self):
+        for formula, expected in [('\\mcs(IWoS) && H1', True),
+                                  ('\\mcs(\\mps(IWoS))', False),
+                                  ('\\mcs(IWoS[H1: 1])', True),
+                                  ('\\mcs(IWoS)[H1: 1]', False),
+                                  ('(IWoS && \\mps(CPR))[H1: 1]', False),
+                                  ('(IWoS[H1: 1]) && \\mps(CPR)', True)]:
+            with self.subTest(formula):
+                self.assertEqual(
+                    is_two_level(parser.parse(formula, 'phi')), expected)
+        self.assertFalse(is_two_level(
+            parser.parse('(IWoS[H1: 1]) && \\mps(CPR)', 'phi'), 'tseitin'))
+
+    def bdd_vectors(self, formula: str):
+        return BddBackend(self.fault_tree).satisfaction_set(
+            parser.parse(f'[[{formula}]]', 'bfl_statement'))
+
+    def test_same_vectors_as_bdd(self):
+        for encoding in ('inline', 'tseitin'):
+            for formula in two_level_formulas:
+                with self.subTest(formula, encoding=encoding):
+                    problem = minimality_problem(
+                        parser.parse(formula, 'phi'), self.fault_tree,
+                        encoding)
+                    if problem is None:
+                        # Evidence is quantified with the Tseitin encoding.
+                        self.assertEqual(encoding, 'tseitin')
+                        continue
+                    self.assertEqual(set(problem.vectors()),
+                                     self.bdd_vectors(formula))
+
+    def test_same_decisions_as_qbf(self):
+        for encoding in ('inline', 'tseitin'):
+            for formula in two_level_formulas:
+                for quantifier in ('\\exists', '\\forall'):
+                    statement = parser.parse(f'{quantifier} {formula}',
+                                             'bfl_statement')
+                    with self.subTest(statement, encoding=encoding):
+                        s = Solver()
+                        s.add(build_formula(statement, self.fault_tree,
+                                            encoding))
+                        self.assertEqual(
+                            quantified_statement(statement, self.fault_tree,
+                                                 encoding),
+                            s.check() == sat)
+
+    def test_check_model(self):
+        for formula in two_level_formulas:
+            vectors = self.bdd_vectors(formula)
+            if not vectors:
+                continue
+            names = {frozenset(map(str, vector)) for vector in vectors}
+            for status_vector in ('IW, H3', 'H1, VW, UT', 'H4'):
+                with self.subTest(formula, status_vector=status_vector):
+                    result = check_model(
+                        parser.parse(f'{status_vector} |= {formula}',
+                                     'bfl_statement'), self.fault_tree)
+                    failed = frozenset(status_vector.split(', '))
+                    if result is True:
+                        self.assertIn(failed, names)
+                    else:
+                        self.assertNotIn(failed, names)
+                        self.assertIn(result, vectors)
+                        self.assertEqual(
+                            len(failed.symmetric_difference(map(str, result))),
+                            min(len(failed.symmetric_difference(name))
+                                for name in names))
+
+    def test_execute(self):
+        text = tree + '\n'.join(f'[[{formula}]];\n|[[{formula}]]|;'
+                                for formula in two_level_formulas[:2])
+        self.assertEqual(execute_str(text), execute_str(text, backend='bdd'))
+
+    def test_unsatisfiable_counterexample(self):
+        self.assertEqual(
+            execute_str(tree + 'H1 |= \\mcs(CPR) && !CPR;'), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
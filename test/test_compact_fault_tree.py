@@ -0,0 +1,65 @@
+import unittest
+
+from z3 import eq
+
+from bfl.build_bfl import event_to_formula
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.fault_tree import FaultTree
+from gates import AndGate, OrGate, VotGate
+from parser.parser import parser
+
+graph = build_fault_tree(parser.parse('toplevel top;'
+                                      'top or a b c l;'
+                                      'a and d e;'
+                                      'b 2of3 f g h;'
+                                      'c vot<3 i j k;'
+                                      'l vot==2 m d c;', 'galileo'))
+
+
+class CompactFaultTreeTest(unittest.TestCase):
+    def test_query_methods(self):
+        tree = CompactFaultTree.from_graph(graph)
+        self.assertListEqual(graph.get_basic_events(),
+                             tree.get_basic_events())
+        self.assertSetEqual(graph.get_basic_events_set(),
+                            tree.get_basic_events_set())
+        self.assertListEqual(graph.get_basic_events_bools(),
+                             tree.get_basic_events_bools())
+        self.assertEqual(graph.get_root(), tree.get_root())
+
+        self.assertListEqual(list(graph.nodes), list(tree.nodes))
+        for node in graph.nodes:
+            self.assertIn(node, tree.nodes)
+            self.assertEqual(graph.in_degree(node), tree.in_degree(node))
+            self.assertListEqual(list(graph.predecessors(node)),
+                                 list(tree.predecessors(node)))
+        self.assertNotIn('x', tree.nodes)
+
+    def test_gates(self):
+        tree = CompactFaultTree.from_graph(graph)
+        self.assertIsInstance(tree.nodes['top']['gate'], OrGate)
+        self.assertIsInstance(tree.nodes['a']['gate'], AndGate)
+        vot = tree.nodes['l']['gate']
+        self.assertIsInstance(vot, VotGate)
+        self.assertEqual(('==', 2), (vot.comp, vot.k))
+        self.assertNotIn('gate', tree.nodes['d'])
+
+    def test_event_to_formula(self):
+        tree = CompactFaultTree.from_graph(graph)
+        self.assertTrue(eq(event_to_formula('top', graph),
+                           event_to_formula('top', tree)))
+
+    def test_no_gate_error(self):
+        ft = FaultTree()
+        ft.add_node('top')
+        ft.add_node('a')
+        ft.add_edge('a', 'top')
+        self.assertRaises(
+            ValueError,
+            lambda: event_to_formula('top', CompactFaultTree.from_graph(ft))
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
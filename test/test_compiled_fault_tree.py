@@ -0,0 +1,121 @@
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from galileo.compiled_fault_tree import write_compiled, load_compiled, \
+    compile_fault_tree, load_fault_tree, compiled_path
+from parser.parser import parse
+from run_bfl import execute_file, execute_str
+
+bfl_text = '''
+toplevel top;
+top or a b c l;
+a and d e;
+b 2of3 f g h;
+c vot<3 i j k;
+l vot==2 m d c;
+---
+[[\\mcs(top)]];
+\\exists l && !b;
+'''
+tree = CompactFaultTree.from_graph(build_fault_tree(parse(bfl_text)))
+source_hash = 'ab' * 32
+
+
+def gate_attrs(gate):
+    return None if gate is None else vars(gate) | {'type': type(gate)}
+
+
+class CompiledFaultTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'tree.bflc')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def assertSameTree(self, tree1: CompactFaultTree,
+                       tree2: CompactFaultTree):
+        self.assertEqual(tree1.names, tree2.names)
+        self.assertEqual(tree1.get_basic_events(), tree2.get_basic_events())
+        self.assertEqual(tree1.get_root(), tree2.get_root())
+        for node in tree1.nodes:
+            self.assertEqual(tree1.predecessors(node),
+                             tree2.predecessors(node))
+            self.assertEqual(gate_attrs(tree1.get_gate(node)),
+                             gate_attrs(tree2.get_gate(node)))
+
+    def test_round_trip(self):
+        write_compiled(tree, self.path, source_hash)
+        self.assertSameTree(tree, load_compiled(self.path, source_hash))
+        self.assertSameTree(tree, load_compiled(self.path))
+
+    def test_pickle(self):
+        write_compiled(tree, self.path, source_hash)
+        compiled = load_compiled(self.path)
+        compiled.cardinality = 'totalizer'
+        copy = pickle.loads(pickle.dumps(compiled))
+        self.assertSameTree(tree, copy)
+        self.assertEqual('totalizer', copy.cardinality)
+
+    def test_invalid_files(self):
+        self.assertIsNone(load_compiled(self.path))
+
+        write_compiled(tree, self.path, source_hash)
+        self.assertIsNone(load_compiled(self.path, 'cd' * 32))
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertIsNone(load_compiled(self.path, source_hash))
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a fault tree')
+        self.assertIsNone(load_compiled(self.path))
+
+    def test_load_fault_tree(self):
+        source_path = os.path.join(self.dir.name, 'tree.bfl')
+        with open(source_path, 'w') as f:
+            f.write(bfl_text)
+        _, path = compile_fault_tree(source_path)
+        self.assertEqual(compiled_path(source_path), path)
+
+        with open(source_path) as f:
+            compiled, rest = load_fault_tree(f, path)
+        self.assertIsInstance(compiled.children, memoryview)
+        self.assertSameTree(tree, compiled)
+        self.assertEqual(bfl_text.split('---')[1], rest)
+
+        with open(source_path) as f:
+            self.assertEqual(execute_str(bfl_text), execute_file(f, False,
+                                                                 'lalr', path))
+
+    def test_recompiles_changed_source(self):
+        changed_text = bfl_text.replace('a and d e;', 'a and d e n;')
+        changed_tree = CompactFaultTree.from_graph(
+            build_fault_tree(parse(changed_text)))
+        write_compiled(tree, self.path, source_hash)
+
+        loaded, _ = load_fault_tree(io.StringIO(changed_text), self.path)
+        self.assertSameTree(changed_tree, loaded)
+        self.assertSameTree(changed_tree, load_compiled(self.path))
+
+    def test_recompile_fails(self):
+        write_compiled(tree, self.path, source_hash)
+        changed_text = bfl_text.replace('a and d e;', 'a and d e n;')
+        with patch('galileo.compiled_fault_tree.write_compiled',
+                   side_effect=OSError('Read-only file system')), \
+                self.assertLogs('galileo.compiled_fault_tree', 'WARNING'):
+            loaded, rest = load_fault_tree(io.StringIO(changed_text),
+                                           self.path)
+        self.assertSameTree(CompactFaultTree.from_graph(
+            build_fault_tree(parse(changed_text))), loaded)
+        self.assertEqual(changed_text.split('---')[1], rest)
+
+
+if __name__ == '__main__':
+    unittest.main()
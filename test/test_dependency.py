@@ -0,0 +1,48 @@
+import unittest
+
+from z3 import Bools, Or, And, Not, Xor, ForAll, Implies
+
+from bfl.build_bfl import event_to_var
+from bfl.dependency import DependencyChecker
+from galileo.build_graph import build_fault_tree
+from parser.parser import parser
+
+tree_text = 'toplevel top; top or x y; x and a b; y and a c;'
+
+
+class DependencyCheckerTest(unittest.TestCase):
+    def test_depends_on(self):
+        tree = build_fault_tree(parser.parse(tree_text, 'galileo'))
+        a, b, c, d = Bools('a b c d')
+        checker = DependencyChecker(Or(a, And(b, Not(b)), Xor(c, c)), tree)
+        self.assertTrue(checker.depends_on(a))
+        self.assertFalse(checker.depends_on(b))
+        self.assertFalse(checker.depends_on(c))
+        self.assertFalse(checker.depends_on(d))
+        # Results are cached
+        self.assertEqual({a.get_id(): True, b.get_id(): False,
+                          c.get_id(): False}, checker.results)
+
+    def test_quantifier(self):
+        tree = build_fault_tree(parser.parse(tree_text, 'galileo'))
+        a, b, c = Bools('a b c')
+        checker = DependencyChecker(ForAll([a], Implies(a, Or(b, c))), tree)
+        self.assertFalse(checker.depends_on(a))
+        self.assertTrue(checker.depends_on(b))
+        self.assertTrue(checker.depends_on(c))
+
+    def test_tseitin(self):
+        tree = build_fault_tree(parser.parse(tree_text, 'galileo'))
+        a, b, c = Bools('a b c')
+        top = event_to_var('top', tree)
+        # `top` implies `a`, so this is equivalent to `a`
+        checker = DependencyChecker(Or(top, a), tree)
+        self.assertTrue(checker.depends_on(a))
+        self.assertFalse(checker.depends_on(b))
+        self.assertFalse(checker.depends_on(c))
+        checker = DependencyChecker(top, tree)
+        self.assertTrue(all(map(checker.depends_on, (a, b, c))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from bfl.bdd_backend import BddBackend
+from bfl.evaluate import Evaluator, EvaluationLimitExceeded, \
+    MAX_SUBSET_EVENTS
+from bfl.exceptions import BFLError
+from fixtures import tree, formulas, compact_fault_tree
+from parser.parser import parser
+from run_bfl import execute_str
+
+
+class EvaluatorTest(unittest.TestCase):
+    def setUp(self):
+        self.fault_tree = compact_fault_tree()
+        self.evaluator = Evaluator(self.fault_tree)
+
+    def test_same_values_as_bdd(self):
+        backend = BddBackend(self.fault_tree)
+        basic_events = sorted(self.fault_tree.get_basic_events())
+        rng = random.Random(0)
+        for formula in formulas:
+            phi = parser.parse(formula, 'phi')
+            f = backend.formula(phi)
+            vectors = list(backend.bdd.models(f))[:50]
+            vectors += [frozenset(be for be in basic_events
+                                  if rng.random() < 0.3) for _ in range(50)]
+            for vector in vectors:
+                with self.subTest(formula, vector=sorted(vector)):
+                    self.assertEqual(self.evaluator.evaluate(phi, vector),
+                                     backend.bdd.evaluate(f, vector))
+
+    def test_is_monotone(self):
+        for formula, expected in [('IWoS && (H1 || !!CPR)', True),
+                                  ('!IWoS', False),
+                                  ('!(!CPR && \\vot[<2](H1, H2))', True),
+                                  ('IW => CPR', False),
+                                  ('\\vot[==1](H1, H2)', False),
+                                  ('(!IT => CPR)[H1: 0]', True),
+                                  ('\\mcs(CPR)', False)]:
+            with self.subTest(formula):
+                self.assertEqual(self.evaluator.is_monotone(
+                    parser.parse(formula, 'phi')), expected)
+
+    def test_subset_limit(self):
+        failed = frozenset(self.fault_tree.get_basic_events())
+        self.assertGreater(len(failed), MAX_SUBSET_EVENTS)
+        # Removing any single event makes the argument false, but removing
+        # two makes it true again.
+        phi = parser.parse(f'\\mcs(!\\vot[=={len(failed) - 1}]'
+                           f'({", ".join(sorted(failed))}))', 'phi')
+        with self.assertRaises(EvaluationLimitExceeded):
+            self.evaluator.evaluate(phi, failed)
+
+    def test_unknown_event(self):
+        with self.assertRaises(BFLError):
+            self.evaluator.evaluate(parser.parse('XY', 'phi'), frozenset())
+
+    def test_check_model_without_solver(self):
+        with patch('bfl.execute_bfl.Solver') as solver:
+            self.assertEqual(
+                execute_str(tree + 'IW, H3 |= \\mcs(CPR);\n'
+                                   'UT |= !MoT[UT: 0];'), [True, True])
+        solver.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
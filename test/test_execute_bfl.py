@@ -0,0 +1,105 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from z3 import Solver, sat
+
+from bfl.bdd_backend import BddBackend
+from bfl.build_bfl import build_formula
+from bfl.execute_bfl import quantified_statement, check_model
+from bfl.incremental_solver import IncrementalSolver
+from fixtures import tree, statements, compact_fault_tree
+from parser.parser import parser
+from run_bfl import execute_str
+
+quantified_statements = [
+    '\\exists IWoS && !CPR',
+    '\\forall CP => IW',
+    '\\forall (CIW[PP: 1, IW: 1]) == H1',
+    '\\exists (IWoS && !H1)[MoT: 0]',
+    '\\forall (CP && !CP)[H3: 1, H3: 0]',
+    '\\exists \\mcs(IWoS) && H4',
+    '\\forall (\\mps(CPR)[H3: 1]) => !IT',
+]
+
+check_model_formulas = [
+    'CPR && MoT && SH',
+    '(CIW[H1: 1]) && !H1',
+    '\\vot[==1](H2, H3) || IT && UT',
+    '\\mcs(\\mps(CPR)) && !H2',
+]
+
+
+class ParallelTest(unittest.TestCase):
+    def test_same_results_as_sequential(self):
+        text = tree + '\n'.join(statements)
+        self.assertEqual(execute_str(text), execute_str(text, jobs=3))
+
+    def test_errors(self):
+        text = tree + '\\exists IW;\n\\exists XY;\n[[\\mcs(CP)]];\n' \
+                      'IW, CP |= CP;\n\\idp(IW, H3);'
+        with redirect_stdout(io.StringIO()) as sequential_output:
+            sequential = execute_str(text, True)
+        with redirect_stdout(io.StringIO()) as parallel_output:
+            parallel = execute_str(text, True, jobs=2)
+        self.assertEqual(sequential, parallel)
+        self.assertIsNone(parallel[1])
+        self.assertEqual(sequential_output.getvalue(),
+                         parallel_output.getvalue())
+        self.assertIn('Error: Unknown event `XY`', parallel_output.getvalue())
+
+
+class QuantifiedStatementTest(unittest.TestCase):
+    def test_same_results_as_qbf(self):
+        for encoding in ('inline', 'tseitin'):
+            fault_tree = compact_fault_tree()
+            solver = IncrementalSolver(fault_tree)
+            for statement in quantified_statements:
+                with self.subTest(statement, encoding=encoding):
+                    parse_tree = parser.parse(statement, 'bfl_statement')
+                    s = Solver()
+                    s.add(build_formula(parse_tree, fault_tree, encoding))
+                    self.assertEqual(
+                        quantified_statement(parse_tree, fault_tree,
+                                             encoding, solver),
+                        s.check() == sat)
+
+    def test_solver_keeps_definitions(self):
+        fault_tree = compact_fault_tree()
+        solver = IncrementalSolver(fault_tree)
+        for statement in ('\\exists CPR && !CP', '\\forall CP => CPR'):
+            self.assertTrue(quantified_statement(
+                parser.parse(statement, 'bfl_statement'), fault_tree,
+                'tseitin', solver))
+        self.assertEqual(solver.defined, {'CPR', 'CP', 'CR'})
+        self.assertEqual(len(solver.solver.assertions()), 3)
+
+
+class CheckModelTest(unittest.TestCase):
+    def test_closest_counterexamples(self):
+        fault_tree = compact_fault_tree()
+        bdd = BddBackend(fault_tree)
+        for encoding in ('inline', 'tseitin'):
+            for formula in check_model_formulas:
+                for status_vector in ('IW, H3', 'H1, VW, UT', 'H4'):
+                    statement = parser.parse(f'{status_vector} |= {formula}',
+                                             'bfl_statement')
+                    with self.subTest(statement, encoding=encoding):
+                        result = check_model(statement, fault_tree, encoding)
+                        expected = bdd.check_model(statement)
+                        if expected is True:
+                            self.assertIs(result, True)
+                            continue
+                        # Both are closest, but may break ties differently.
+                        failed = frozenset(status_vector.split(', '))
+                        self.assertEqual(
+                            len(failed.symmetric_difference(map(str, result))),
+                            len(failed.symmetric_difference(
+                                map(str, expected))))
+                        self.assertEqual(
+                            check_model(statement, fault_tree, encoding),
+                            result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+
+from bfl.bdd_backend import BddBackend
+from bfl.exhaustive import TruthTables, EXHAUSTIVE_MAX_EVENTS, \
+    is_exhaustive, exhaustive_count, exhaustive_vectors
+from bfl.exceptions import BFLError
+from fixtures import tree, formulas, two_level_formulas, compact_fault_tree
+from parser.parser import parser
+from run_bfl import execute_str
+
+
+class ExhaustiveTest(unittest.TestCase):
+    def setUp(self):
+        self.fault_tree = compact_fault_tree()
+
+    def test_same_vectors_as_bdd(self):
+        backend = BddBackend(self.fault_tree)
+        for formula in formulas + two_level_formulas \
+                + ['\\vot[>5](H1, H2)', '\\vot[<=0](H1, H2)']:
+            with self.subTest(formula):
+                phi = parser.parse(formula, 'phi')
+                vectors = set(exhaustive_vectors(phi, self.fault_tree))
+                self.assertEqual(vectors, backend.satisfaction_set(
+                    parser.parse(f'[[{formula}]]', 'bfl_statement')))
+                self.assertEqual(exhaustive_count(phi, self.fault_tree),
+                                 len(vectors))
+
+    def test_vectors_in_chunks(self):
+        tables = TruthTables(self.fault_tree)
+        table = tables.table(parser.parse('H1 || !IW', 'phi'))
+        with patch('bfl.exhaustive.DECODE_BITS', 64):
+            self.assertEqual(list(tables.vectors(table)),
+                             list(TruthTables(self.fault_tree).vectors(table)))
+
+    def test_is_exhaustive(self):
+        phi = parser.parse('CIW[PP: 1]', 'phi')
+        self.assertTrue(is_exhaustive(phi, self.fault_tree))
+        self.assertFalse(is_exhaustive(phi, self.fault_tree, 'tseitin'))
+        self.assertTrue(is_exhaustive(parser.parse('CIW', 'phi'),
+                                      self.fault_tree, 'tseitin'))
+        with patch('bfl.exhaustive.EXHAUSTIVE_MAX_EVENTS',
+                   len(self.fault_tree.get_basic_events()) - 1):
+            self.assertFalse(is_exhaustive(phi, self.fault_tree))
+
+    def test_without_solver(self):
+        with patch('bfl.execute_bfl.Solver') as solver:
+            self.assertEqual(execute_str(tree + '|[[\\mcs(IWoS)]]|;'), [20])
+        solver.assert_not_called()
+
+    def test_large_tree(self):
+        basic_events = [f'e{i}' for i in range(EXHAUSTIVE_MAX_EVENTS + 1)]
+        text = f'toplevel t;\nt or {" ".join(basic_events)};\n---\n' \
+               f'[[\\mcs(t)]];\n|[[t && !e0]]|;'
+        vectors, count = execute_str(text)
+        self.assertEqual({frozenset(map(str, vector)) for vector in vectors},
+                         {frozenset({be}) for be in basic_events})
+        self.assertEqual(count, 2 ** EXHAUSTIVE_MAX_EVENTS - 1)
+
+    def test_unknown_event(self):
+        with self.assertRaises(BFLError):
+            exhaustive_count(parser.parse('XY', 'phi'), self.fault_tree)
+
+
+if __name__ == '__main__':
+    unittest.main()
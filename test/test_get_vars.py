@@ -0,0 +1,43 @@
+import unittest
+
+from z3 import Bools, And, Or, Not, ForAll, Exists
+
+from utils.get_vars import get_vars
+
+
+class GetVarsTest(unittest.TestCase):
+    def test_order(self):
+        a, b, c = Bools('a b c')
+        self.assertListEqual(
+            [c, a, b], get_vars(Or(And(c, a), Not(a), And(b, c))))
+
+    def test_bound_vars(self):
+        a, b, c = Bools('a b c')
+        self.assertListEqual([c], get_vars(And(c, ForAll([a, b], Or(a, b)))))
+        self.assertListEqual(
+            [b], get_vars(Exists([a], And(a, ForAll([c], Or(b, c))))))
+
+    def test_shared_subterms(self):
+        a, b = Bools('a b')
+        # Without sharing, this formula has 2 ** 200 paths.
+        f = Or(a, b)
+        for _ in range(200):
+            f = And(f, Not(f))
+        self.assertListEqual([a, b], get_vars(f))
+
+    def test_deep_formula(self):
+        xs = Bools(' '.join(f'x{i}' for i in range(5000)))
+        f = xs[-1]
+        for x in reversed(xs[:-1]):
+            f = And(x, f)
+        self.assertListEqual(xs, get_vars(f))
+
+    def test_cached_result_is_copied(self):
+        a, b = Bools('a b')
+        f = Or(a, b)
+        get_vars(f).append(a)
+        self.assertListEqual([a, b], get_vars(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
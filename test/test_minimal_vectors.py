@@ -0,0 +1,62 @@
+import unittest
+
+from z3 import Solver
+
+from bfl.build_bfl import build_formula, get_definitions
+from bfl.execute_bfl import get_true_events, minimal_argument
+from bfl.minimal_vectors import minimal_vectors
+from fixtures import compact_fault_tree
+from parser.parser import parser
+from utils.all_models import all_models
+
+queries = [
+    '\\mcs(IWoS)',
+    '\\mps(IWoS)',
+    '\\mcs(CPR || SH)',
+    '\\mps(CP && MoT)',
+    '\\mcs(MoT && !H1)',
+    '\\mps(CPR != SH)',
+    '\\mcs(CPR[H3: 1])',
+    '\\mcs(\\mcs(MoT) || CR)',
+    '\\mcs(!IW)',
+    '\\mps(H1 && !H1)',
+]
+
+
+def generic_satisfaction_set(query: str, tree, encoding: str):
+    formula = build_formula(parser.parse(query, 'phi'), tree, encoding)
+    _, definitions = get_definitions(formula, tree)
+    s = Solver()
+    s.add(formula, *definitions)
+    bes = tree.get_basic_events_set()
+    return {get_true_events(m, bes)
+            for m in all_models(s, tree.get_basic_events_bools())}
+
+
+def minimal_vector_set(query: str, tree, encoding: str = 'inline'):
+    return set(minimal_vectors(
+        minimal_argument(parser.parse(query, 'phi'), tree, encoding), tree))
+
+
+class MinimalVectorsTest(unittest.TestCase):
+    def test_same_as_generic(self):
+        for encoding in ('inline', 'tseitin'):
+            tree = compact_fault_tree()
+            for query in queries:
+                with self.subTest(query=query, encoding=encoding):
+                    self.assertSetEqual(
+                        generic_satisfaction_set(query, tree, encoding),
+                        minimal_vector_set(query, tree, encoding))
+
+    def test_empty_vector(self):
+        tree = compact_fault_tree()
+        self.assertSetEqual(
+            {frozenset()},
+            minimal_vector_set('\\mcs(!IW)', tree))
+        self.assertSetEqual(
+            set(),
+            minimal_vector_set('\\mcs(IW && !IW)', tree))
+
+
+if __name__ == '__main__':
+    unittest.main()
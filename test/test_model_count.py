@@ -0,0 +1,58 @@
+import unittest
+
+from run_bfl import execute_str
+
+tree = '''
+toplevel top;
+top or g1 g2 g3;
+g1 and a b;
+g2 2of3 b c d;
+g3 vot<2 d e f;
+a; b; c; d; e; f;
+---
+'''
+
+queries = [
+    'g1',
+    '!top',
+    'top && !b',
+    'g1 == g2',
+    'g1 != g3',
+    'g2 => g3',
+    'g2[b: 0, c: 1]',
+    '\\vot[>=2](g1, g3, e) && !g2',
+    '\\vot[==2](a, b, c, d)',
+    'a && !a',
+    '\\mcs(top)',
+    '\\mps(g2)',
+    '\\mcs(top) && b',
+]
+
+
+class ModelCountTest(unittest.TestCase):
+    def test_same_as_satisfaction_set(self):
+        for encoding in ('inline', 'tseitin'):
+            for cardinality in ('pb', 'sequential'):
+                for query in queries:
+                    with self.subTest(query, encoding=encoding,
+                                      cardinality=cardinality):
+                        text = f'{tree}[[{query}]];\n|[[{query}]]|;'
+                        satisfaction_set, count = execute_str(
+                            text, encoding=encoding, cardinality=cardinality)
+                        self.assertEqual(count, len(satisfaction_set))
+
+    def test_large_tree(self):
+        # A chain of 500 `or` gates over 1000 basic events, far too many
+        # models to enumerate.
+        n = 500
+        gates = [f'g{i} or g{i + 1} a{i} b{i};' for i in range(n - 1)]
+        text = 'toplevel g0;\n' + '\n'.join(gates) \
+            + f'\ng{n - 1} and a{n - 1} b{n - 1};\n---\n|[[!g0]]|;\n' \
+            + '|[[g0 && !a0]]|;'
+        none_failed, failed = execute_str(text)
+        self.assertEqual(none_failed, 3)
+        self.assertEqual(failed, 2 ** (2 * n - 1) - 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
+import os
+import tempfile
 import unittest
 
 from lark import Tree, Token
 
-from parser.parser import parse
+from parser.parser import parse, build_parser, CACHE_PATH
+from utils.cache_dir import cache_dir
 
 
 class ParserTest(unittest.TestCase):
@@ -280,6 +283,51 @@ class ParserTest(unittest.TestCase):
         ''').pretty())
         self.assertTrue(True)
 
+    def test_lalr_and_earley_agree(self):
+        text = '''
+        toplevel top;
+        top and a b c;
+        b Or or d;
+        d 2oF4 e f g h;
+        e vOt<2 i j k;
+        l;
+        ---
+        \\exists a && b;
+        \\forall a[a: 1, b: 0];
+        a, b |= a && b;
+        a |= \\vot[>=1](a, b) => top;
+        \\idP(a, b || c);
+        [[a]];
+        |[[a && !b]]|;
+        \\SUP(*);
+        '''
+        self.assertEqual(parse(text, 'lalr'), parse(text, 'earley'))
+
+    def test_lalr_status_vector(self):
+        self.assertEqual(
+            build_parser('lalr', None).parse('a, b |= a', 'bfl_statement'),
+            Tree('check_model', [
+                Tree(Token('RULE', 'basic_events'),
+                     [Token('BASIC_EVENT', 'a'), Token('BASIC_EVENT', 'b')]),
+                Tree('event', [Token('EVENT_NAME', 'a')])])
+        )
+
+    def test_lalr_cache(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache_path = os.path.join(d, 'bfl', 'grammar.lalr.cache')
+            built = build_parser('lalr', cache_path)
+            self.assertTrue(os.path.exists(cache_path))
+            loaded = build_parser('lalr', cache_path)
+            text = 'toplevel top; top or a b; --- [[top]];'
+            self.assertEqual(built.parse(text, 'start'),
+                             loaded.parse(text, 'start'))
+
+    def test_default_lalr_cache(self):
+        self.assertEqual(os.path.dirname(CACHE_PATH), str(cache_dir()))
+
+    def test_unknown_parser_type(self):
+        self.assertRaises(ValueError, lambda: build_parser('cyk'))
+
 
 if __name__ == '__main__':
     unittest.main()
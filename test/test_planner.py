@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from bfl.execute_bfl import AutoBackend, execute_bfl
+from bfl.planner import QueryFeatures, Planner, TimingStats, query_features, \
+    MIN_SAMPLES, STATS_ENV, default_stats_path
+from fixtures import tree, compact_fault_tree
+from parser.parser import parser
+
+
+def features(kind='exists', nesting=0, basic_events=100, max_fan_in=2):
+    return QueryFeatures(kind, nesting, basic_events, max_fan_in)
+
+
+class PlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.fault_tree = compact_fault_tree()
+
+    def features(self, statement: str) -> QueryFeatures:
+        return query_features(parser.parse(statement, 'bfl_statement'),
+                              self.fault_tree)
+
+    def test_query_features(self):
+        self.assertEqual(self.features('\\exists H1 && H2'),
+                         QueryFeatures('exists', 0, 2, 0))
+        self.assertEqual(self.features('[[\\mcs(\\mps(CPR)[H1: 1])]]'),
+                         QueryFeatures('satisfaction_set', 3, 5, 2))
+        self.assertEqual(self.features('|[[IWoS]]|'),
+                         QueryFeatures('count', 0, 13, 5))
+        self.assertEqual(self.features('H1, UT |= \\vot[>1](H1, H2, H3)'),
+                         QueryFeatures('check_model', 0, 4, 0))
+        self.assertEqual(self.features('\\sup(*)'),
+                         QueryFeatures('sup_all', 0, 13, 5))
+        self.assertEqual(self.features('\\exists XY').basic_events, 0)
+
+    def test_rules(self):
+        planner = Planner()
+        self.assertEqual(planner.choose(features(basic_events=10)), 'bdd')
+        self.assertEqual(planner.choose(features(nesting=2)), 'z3')
+        self.assertEqual(planner.choose(features('count', nesting=1)), 'bdd')
+        self.assertEqual(planner.choose(features(basic_events=1000)), 'z3')
+        self.assertEqual(planner.choose(features(max_fan_in=100)), 'z3')
+        self.assertEqual(planner.choose(features()), 'bdd')
+        self.assertEqual(planner.choose(features(), ('z3',)), 'z3')
+
+    def test_timings_overrule_rules(self):
+        planner = Planner()
+        query = features()
+        for _ in range(MIN_SAMPLES):
+            planner.record(query, 'bdd', 2.0)
+        # `bdd` is slow, so `z3` is tried until it has enough samples.
+        self.assertEqual(planner.choose(query), 'z3')
+        for _ in range(MIN_SAMPLES):
+            planner.record(query, 'z3', 0.5)
+        self.assertEqual(planner.choose(query), 'z3')
+        self.assertEqual(planner.choose(features('forall')), 'bdd')
+        for _ in range(3 * MIN_SAMPLES):
+            planner.record(query, 'z3', 5.0)
+        self.assertEqual(planner.choose(query), 'bdd')
+
+    def test_decisions_are_logged(self):
+        with self.assertLogs('bfl.planner', 'INFO') as logs:
+            Planner().choose(features(nesting=2))
+        self.assertIn('Planned exists with z3: nested minimality',
+                      logs.output[0])
+
+    def test_stats_are_saved(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats', 'planner.json')
+            stats1, stats2 = TimingStats(path), TimingStats(path)
+            stats1.record('a', 'bdd', 1.0)
+            stats1.save()
+            stats2.record('a', 'bdd', 3.0)
+            stats2.record('b', 'z3', 1.0)
+            stats2.save()
+            stats = TimingStats(path)
+            self.assertEqual(stats.mean('a', 'bdd', 2), 2.0)
+            self.assertIsNone(stats.mean('a', 'bdd', 3))
+            self.assertEqual(stats.mean('b', 'z3'), 1.0)
+
+            with open(path, 'w') as f:
+                f.write('{')
+            self.assertIsNone(TimingStats(path).mean('a', 'bdd'))
+
+    def test_stats_are_saved_once(self):
+        statements = parser.parse(
+            tree + '\\exists IWoS; [[CPR]]; |[[SH]]|;', 'start')
+        for jobs in (1, 2):
+            with tempfile.TemporaryDirectory() as directory, \
+                    self.subTest(jobs=jobs):
+                path = os.path.join(directory, 'planner.json')
+                with patch.dict(os.environ, {STATS_ENV: path}), \
+                        patch.object(TimingStats, 'save', autospec=True,
+                                     side_effect=TimingStats.save) as save:
+                    execute_bfl(statements, self.fault_tree, jobs=jobs,
+                                backend='auto')
+                    if jobs == 1:
+                        self.assertEqual(save.call_count, 1)
+                runs = TimingStats(path).runs
+                self.assertEqual(sum(n for by_strategy in runs.values()
+                                     for n, _ in by_strategy.values()), 3)
+
+    def test_default_stats_path(self):
+        with patch.dict(os.environ, {STATS_ENV: ''}):
+            self.assertIsNone(default_stats_path())
+        with patch.dict(os.environ, {STATS_ENV: 'stats.json',
+                                     'XDG_CACHE_HOME': 'cache'}):
+            self.assertEqual(str(default_stats_path()), 'stats.json')
+            del os.environ[STATS_ENV]
+            self.assertEqual(str(default_stats_path()),
+                             os.path.join('cache', 'bfl', 'planner.json'))
+
+    def test_auto_backend_records_timings(self):
+        planner = Planner()
+        backend = AutoBackend(self.fault_tree, planner=planner)
+        statement = parser.parse('[[IWoS && !H1]]', 'bfl_statement')
+        with self.assertLogs('bfl.planner', 'INFO'):
+            vectors = set(backend.satisfaction_vectors(statement))
+            self.assertTrue(backend.quantified(
+                parser.parse('\\exists IWoS', 'bfl_statement')))
+        self.assertEqual(len(vectors), backend.z3.count(
+            parser.parse('|[[IWoS && !H1]]|', 'bfl_statement')))
+        bucket = query_features(statement, self.fault_tree).bucket()
+        self.assertIsNotNone(planner.stats.mean(bucket, 'bdd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from bfl.result_cache import ResultCache, CACHE_ENV, fault_tree_hash, \
+    open_result_cache, result_key
+from bfl.satisfaction_stream import StreamOptions
+from fixtures import tree, compact_fault_tree
+from run_bfl import execute_str
+
+statements = '''
+\\exists IWoS && !H1;
+[[\\mcs(CPR)]];
+|[[MoT]]|;
+H1, VW |= SH && !CPR;
+\\sup(*);
+'''
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'results.sqlite'
+        self.cache = ResultCache(self.path)
+        self.addCleanup(self.cache.close)
+
+    def test_fault_tree_hash(self):
+        lines = tree.strip().split('\n')
+        reordered = '\n'.join([lines[0]] + lines[-2:0:-1] + lines[-1:])
+        def tree_hash(text: str) -> str:
+            return fault_tree_hash(compact_fault_tree(text))
+
+        self.assertEqual(tree_hash(tree), tree_hash(reordered))
+        self.assertNotEqual(tree_hash(tree),
+                            tree_hash(tree.replace('CP and', 'CP or')))
+        self.assertNotEqual(tree_hash(tree),
+                            tree_hash(tree.replace('vot>=2', 'vot>=1')))
+
+    def test_results_are_reused(self):
+        expected = execute_str(tree + statements)
+        self.assertEqual(execute_str(tree + statements, cache=self.cache),
+                         expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 5))
+        with patch('bfl.execute_bfl.execute_safely') as execute_safely:
+            # Formatting of statements does not matter.
+            self.assertEqual(execute_str(tree + statements.replace(' ', ''),
+                                         cache=self.cache), expected)
+        execute_safely.assert_not_called()
+        self.assertEqual((self.cache.hits, self.cache.misses), (5, 5))
+
+    def test_key(self):
+        self.assertNotEqual(result_key('tree', 'inline', '\\exists H1'),
+                            result_key('tree', 'tseitin', '\\exists H1'))
+        execute_str(tree + '\\exists CPR[H1: 1];', cache=self.cache)
+        execute_str(tree + '\\exists CPR[H1: 1];', encoding='tseitin',
+                    cache=self.cache)
+        execute_str(tree.replace('CP and', 'CP or') + '\\exists CPR[H1: 1];',
+                    cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+
+    def test_errors_and_streams_are_not_cached(self):
+        execute_str(tree + '\\exists XY;', cache=self.cache)
+        stream = StreamOptions(io.StringIO(), count_only=True)
+        execute_str(tree + '[[\\mcs(IWoS)]];', stream=stream,
+                    cache=self.cache)
+        self.assertEqual(self.cache.stats()['results'], 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_eviction(self):
+        cache = ResultCache(self.path, max_bytes=100)
+        self.addCleanup(cache.close)
+        for i in range(10):
+            cache.put(f'key{i}', {frozenset({f'e{i}'})})
+            self.assertLessEqual(cache.stats()['bytes'], 100)
+        self.assertIsNone(cache.get('key0'))
+        self.assertEqual(cache.get('key9'), {frozenset({'e9'})})
+
+    def test_stats_are_persisted(self):
+        self.cache.put('key', True)
+        self.assertIs(self.cache.get('key'), True)
+        self.assertIsNone(self.cache.get('other'))
+        self.cache.close()
+        cache = ResultCache(self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.stats(), {'results': 1, 'bytes': 7,
+                                         'hits': 1, 'misses': 1})
+        cache.clear()
+        self.assertEqual(cache.stats(), {'results': 0, 'bytes': 0,
+                                         'hits': 0, 'misses': 0})
+
+    def test_default_path(self):
+        with patch.dict(os.environ, {CACHE_ENV: ''}):
+            self.assertIsNone(open_result_cache())
+        with patch.dict(os.environ, {CACHE_ENV: str(self.path)}):
+            cache = open_result_cache()
+            self.addCleanup(cache.close)
+            self.assertEqual(cache.path, self.path)
+
+    def test_unusable_path(self):
+        with self.assertLogs('bfl.result_cache', 'WARNING'):
+            cache = ResultCache(self.path / 'results.sqlite')
+        cache.put('key', True)
+        self.assertIsNone(cache.get('key'))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import json
+import sys
+import unittest
+from unittest.mock import patch
+
+from z3 import Solver, Bools, Or
+
+from run_bfl import execute_str
+from bfl.satisfaction_stream import StreamOptions, limit_vectors
+from utils.all_models import all_models
+
+text = '''
+toplevel top;
+top or g1 g2;
+g1 and a b;
+g2 2of3 b c d;
+a; b; c; d;
+---
+[[g2]];
+[[\\mcs(top)]];
+\\exists g1;
+'''
+
+
+def names(vectors):
+    return {frozenset(e.name() for e in v) for v in vectors}
+
+
+class SatisfactionStreamTest(unittest.TestCase):
+    def test_text(self):
+        expected = execute_str(text)
+        output = io.StringIO()
+        results = execute_str(text, stream=StreamOptions(file=output))
+        lines = output.getvalue().splitlines()
+        self.assertEqual(results, [len(expected[0]), len(expected[1]),
+                                   expected[2]])
+        self.assertEqual(len(lines), results[0] + results[1])
+        self.assertIn('{' + ', '.join(sorted(
+            e.name() for e in next(iter(expected[1])))) + '}', lines)
+
+    def test_jsonl(self):
+        expected = execute_str(text)
+        output = io.StringIO()
+        execute_str(text, stream=StreamOptions(file=output, format='jsonl'))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual({frozenset(r['vector']) for r in records
+                          if r['statement'] == '[[\\mcs(top)]]'},
+                         names(expected[1]))
+
+    def test_max_models(self):
+        expected = execute_str(text)
+        output = io.StringIO()
+        results = execute_str(text, stream=StreamOptions(file=output,
+                                                         max_models=2))
+        self.assertEqual(results[:2], [min(2, len(expected[0])),
+                                       min(2, len(expected[1]))])
+        self.assertEqual(len(output.getvalue().splitlines()), sum(results[:2]))
+
+    def test_no_vector_after_limits(self):
+        def vectors():
+            yield frozenset()
+            yield frozenset()
+            raise AssertionError('Vector requested after the limit')
+
+        self.assertEqual(len(list(limit_vectors(
+            vectors(), StreamOptions(max_models=2)))), 2)
+        with patch('bfl.satisfaction_stream.time.monotonic',
+                   side_effect=[0.0, 0.5, 2.0]):
+            self.assertEqual(len(list(limit_vectors(
+                vectors(), StreamOptions(time_limit=1)))), 1)
+
+    def test_count_only(self):
+        expected = execute_str(text)
+        output = io.StringIO()
+        execute_str(text, stream=StreamOptions(file=output, format='jsonl',
+                                               count_only=True))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([r['count'] for r in records],
+                         [len(expected[0]), len(expected[1])])
+
+    def test_parallel(self):
+        with self.assertRaises(ValueError):
+            execute_str(text, jobs=2, stream=StreamOptions())
+
+
+class AllModelsTest(unittest.TestCase):
+    def test_deeper_than_recursion_limit(self):
+        # Each model is found one solver scope deeper than the previous one,
+        # which was one level of recursion before.
+        n = sys.getrecursionlimit() + 100
+        terms = Bools(' '.join(f'x{i}' for i in range(n)))
+        s = Solver()
+        s.add(Or(terms))
+        models = all_models(s, terms)
+        self.assertEqual(sum(1 for _ in zip(models, range(n))), n)
+        self.assertGreater(s.num_scopes(), sys.getrecursionlimit())
+        models.close()
+        self.assertEqual(s.num_scopes(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import unittest
+from os import path
+
+import networkx as nx
+from networkx.utils import nodes_equal
+
+from galileo.build_graph import build_fault_tree
+from galileo.exceptions import EventAlreadyDefinedError, NotAcyclicError, \
+    NotExactlyOneRootError, GalileoSyntaxError
+from galileo.stream_graph import stream_fault_tree, GalileoReader
+from parser.parser import parse
+
+
+def my_graph_equals(graph1: nx.Graph, graph2: nx.Graph):
+    return graph1.adj == graph2.adj \
+           and nodes_equal(graph1.nodes, graph2.nodes) \
+           and graph1.graph == graph2.graph
+
+
+def gate_attrs(graph: nx.Graph):
+    return {n: vars(g) | {'type': type(g)}
+            for n, g in graph.nodes(data='gate') if g is not None}
+
+
+def stream_helper(text: str):
+    return stream_fault_tree(io.StringIO(text))
+
+
+class StreamGraphTest(unittest.TestCase):
+    def assertSameTree(self, text: str):
+        graph, _ = stream_helper(text)
+        expected = build_fault_tree(parse(text))
+        self.assertTrue(my_graph_equals(graph, expected))
+        self.assertEqual(gate_attrs(graph), gate_attrs(expected))
+
+    def test_same_as_parse_tree(self):
+        self.assertSameTree('''
+        toplevel top;
+        top and a b c;
+        a or d e;
+        d 2of3 f g h;
+        h vot<=2 i j k l;
+        ---
+        [[a]];
+        ''')
+
+    def test_case_study(self):
+        with open(path.join(path.dirname(__file__), '..', 'examples',
+                            'case-study.bfl')) as f:
+            self.assertSameTree(f.read())
+
+    def test_syntax_variants(self):
+        self.assertSameTree('''
+        toPlevel top; // a comment; with a semicolon
+        top AND a
+            b c;
+        b Or or d; c orOr ca;
+        d 2 oF 4 e f g h;
+        e vOt <2 i j k;
+        l; top2 vot >= 1 l; ca vot==1 top2 m;
+        --- [[a]];
+        ''')
+
+    def test_rest(self):
+        _, rest = stream_helper('toplevel top; // ---\n--- [[top]];\n'
+                                '\\exists top;')
+        self.assertEqual(rest, ' [[top]];\n\\exists top;')
+
+    def test_skip_and_statements_agree(self):
+        text = 'toplevel top; // ---\ntop or a;\n a; --- [[top]];\n'
+        reader1 = GalileoReader(io.StringIO(text))
+        reader1.skip()
+        reader2 = GalileoReader(io.StringIO(text))
+        for _ in reader2.statements():
+            pass
+        self.assertEqual(reader1.rest, reader2.rest)
+        self.assertEqual(reader1.hexdigest(), reader2.hexdigest())
+
+    def test_only_top_event(self):
+        graph, _ = stream_helper('toplevel top;\n---\n[[top]];')
+        self.assertEqual(list(graph.nodes), ['top'])
+
+    def test_errors(self):
+        self.assertRaisesRegex(
+            EventAlreadyDefinedError, r'`a` is already defined \(line 4\)',
+            lambda: stream_helper('toplevel top;\ntop and a b c;\n'
+                                  'a or d e;\na and m n;\n---\n[[a]];'))
+        self.assertRaisesRegex(
+            NotAcyclicError, r'line 3',
+            lambda: stream_helper('toplevel top;\ntop or a;\na or b;\n'
+                                  'b or top;\n---\n[[a]];'))
+        self.assertRaisesRegex(
+            NotExactlyOneRootError, r'`a` \(line 2\)',
+            lambda: stream_helper('toplevel top;\na or b;\n---\n[[a]];'))
+
+    def test_syntax_errors(self):
+        self.assertRaisesRegex(
+            GalileoSyntaxError, r'toplevel',
+            lambda: stream_helper('top or a;\n---\n[[a]];'))
+        self.assertRaisesRegex(
+            GalileoSyntaxError, r'Expected gate.*\(line 3\)',
+            lambda: stream_helper('toplevel top;\ntop or a;\na xor b c;\n'
+                                  '---\n[[a]];'))
+        self.assertRaisesRegex(
+            GalileoSyntaxError, r'`;`.*\(line 2\)',
+            lambda: stream_helper('toplevel top;\ntop or a\n'))
+        self.assertRaisesRegex(
+            GalileoSyntaxError, r'---',
+            lambda: stream_helper('toplevel top;\ntop or a;\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from z3 import Bools
+
+from bfl.superfluous import superfluous_events, SuperfluousnessChecker
+from galileo.build_graph import build_fault_tree
+from galileo.compact_fault_tree import CompactFaultTree
+from parser.parser import parser
+from run_bfl import execute_str
+
+# `x` is absorbed by `a`, so `y`, `b` and `c` do not influence `top`.
+tree_text = '''
+toplevel top;
+top or a x z;
+x and a y;
+y or b c;
+z 2of3 d e f;
+'''
+
+
+class SuperfluousTest(unittest.TestCase):
+    def test_superfluous_events(self):
+        tree = build_fault_tree(parser.parse(tree_text, 'galileo'))
+        y, b, c = Bools('y b c')
+        expected = frozenset({y.decl(), b.decl(), c.decl()})
+        self.assertEqual(expected, superfluous_events(tree))
+        self.assertEqual(expected, superfluous_events(tree, jobs=2))
+
+    def test_same_as_sup(self):
+        tree = build_fault_tree(parser.parse(tree_text, 'galileo'))
+        statements = ''.join(f'\\sup({event});' for event in tree.nodes)
+        results = execute_str(f'{tree_text}---\n{statements}\\sup(*);')
+        self.assertSetEqual(
+            {event for event, result in zip(tree.nodes, results) if result},
+            {event.name() for event in results[-1]})
+
+    def test_root_dependencies_are_shared(self):
+        tree = CompactFaultTree.from_graph(
+            build_fault_tree(parser.parse(tree_text, 'galileo')))
+        checker = SuperfluousnessChecker(tree)
+        self.assertTrue(checker.is_superfluous('y'))
+        self.assertFalse(checker.is_superfluous('z'))
+        # `top` does not depend on `b` or `c`, so `y` itself is never encoded
+        self.assertSetEqual({'top', 'z'}, set(checker.differs))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from fixtures import tree, statements
+from run_bfl import execute_str
+
+# Evidence on intermediate events has no effect in either encoding.
+gate_evidence_tree = '''
+toplevel g;
+g or g0 g3;
+g0 or e0 e2 e3 g1;
+g1 and e1 e4;
+g3 and e2 e4;
+---
+'''
+
+gate_evidence_statements = [
+    '[[(\\mps((g0)[g0: 1])) && (e4)]];',
+    'e4, e3 |= \\mps(((g3) && (g0))[g0: 1, e0: 1]);',
+    '\\exists \\mcs(g3[g3: 0, e2: 1]) && !e2;',
+    '[[\\mcs(g) || g0[g0: 1, g0: 0]]];',
+    '[[\\mcs(g1[g1: 1, e1: 1])]];',
+]
+
+
+class TseitinTest(unittest.TestCase):
+    def test_same_results_as_inline(self):
+        for statement in statements:
+            with self.subTest(statement):
+                self.assertEqual(
+                    execute_str(tree + statement, encoding='inline'),
+                    execute_str(tree + statement, encoding='tseitin'))
+
+    def test_evidence_on_gates(self):
+        for cardinality in ('pb', 'totalizer'):
+            for statement in gate_evidence_statements:
+                with self.subTest(statement, cardinality=cardinality):
+                    text = gate_evidence_tree + statement
+                    self.assertEqual(
+                        execute_str(text, encoding='inline',
+                                    cardinality=cardinality),
+                        execute_str(text, encoding='tseitin',
+                                    cardinality=cardinality))
+
+
+if __name__ == '__main__':
+    unittest.main()
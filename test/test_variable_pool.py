@@ -0,0 +1,34 @@
+import unittest
+
+from z3 import Bools
+
+from utils.variable_pool import VariablePool
+
+
+class VariablePoolTest(unittest.TestCase):
+    def test_acquire(self):
+        pool = VariablePool("'")
+        self.assertListEqual(list(Bools("'0 '1")), pool.acquire(2))
+        self.assertListEqual(list(Bools("'2")), pool.acquire(1))
+        pool.release(3)
+        self.assertListEqual(list(Bools("'0")), pool.acquire(1))
+
+    def test_scope(self):
+        pool = VariablePool('p')
+        with pool.scope(2) as outer:
+            with pool.scope(2) as inner:
+                self.assertListEqual(list(Bools('p2 p3')), inner)
+            with pool.scope(1) as sibling:
+                self.assertListEqual(list(Bools('p2')), sibling)
+            self.assertListEqual(list(Bools('p0 p1')), outer)
+        self.assertEqual(0, pool.in_use)
+        self.assertEqual(4, len(pool.variables))
+
+    def test_release_too_many(self):
+        pool = VariablePool('p')
+        pool.acquire(1)
+        self.assertRaises(ValueError, lambda: pool.release(2))
+
+
+if __name__ == '__main__':
+    unittest.main()